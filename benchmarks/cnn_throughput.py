@@ -0,0 +1,50 @@
+'''
+Positions per second of the NumPy policy/value network against the batch size.
+
+Usage:
+    python -m benchmarks.cnn_throughput --batches 1 8 32 128 --time 2
+'''
+import argparse
+import time
+import numpy as np
+from src.AI3.network import PolicyValueNetwork
+
+def measure(network, board_size, batch_size, time_budget, rng):
+    '''
+    Return the positions per second of predict_batch on random boards
+    '''
+    boards = rng.integers(0, 3, (batch_size, board_size, board_size), dtype=np.int8)
+    network.predict_batch(boards)
+    num_positions = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < time_budget:
+        network.predict_batch(boards)
+        num_positions += batch_size
+    return num_positions / (time.perf_counter() - start)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark batched CNN inference')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[9, 19])
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--weights', help='.npz weights, or an untrained network by default')
+    parser.add_argument('--channels', type=int, default=32)
+    parser.add_argument('--layers', type=int, default=4)
+    parser.add_argument('--time', type=float, default=2.0, help='seconds per measurement')
+    args = parser.parse_args(argv)
+
+    if args.weights:
+        network = PolicyValueNetwork.load(args.weights)
+    else:
+        network = PolicyValueNetwork.initialize(args.channels, args.layers, seed=0)
+    rng = np.random.default_rng(0)
+
+    print(f'{"size":>4} {"batch":>5} {"positions/s":>12} {"speedup":>8}')
+    for board_size in args.sizes:
+        base = None
+        for batch_size in args.batches:
+            rate = measure(network, board_size, batch_size, args.time, rng)
+            base = base or rate
+            print(f'{board_size:>4} {batch_size:>5} {rate:>12.1f} {rate / base:>8.2f}')
+
+if __name__ == '__main__':
+    main()
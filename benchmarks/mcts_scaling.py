@@ -0,0 +1,54 @@
+'''
+Playouts per second of the MCTS player against the number of workers,
+for root-parallel processes and tree-parallel threads.
+
+Usage:
+    python -m benchmarks.mcts_scaling --workers 1 2 4 8 --time 2
+'''
+import argparse
+import os
+from src.game import GameUI
+from src.utils import Stone
+
+def measure(board_size, parallel, num_workers, time_budget):
+    '''
+    Return the playouts per second of one search from the empty board
+    '''
+    config = {'black_stone': 'b',
+              'white_stone': 'w',
+              'board_size': board_size,
+              'enable_self_destruct': False,
+              'mcts_time': time_budget,
+              'mcts_workers': num_workers,
+              'mcts_parallel': parallel,
+              'seed': 0}
+    ui = GameUI(config, 'AI 4', 'AI 4', render=False)
+    ai = ui.players[Stone.BLACK]
+    try:
+        # the first search also starts the worker processes
+        ai.nextMove(ui)
+        ai._root = None
+        ai.nextMove(ui)
+    finally:
+        ai.close()
+    return ai.stats['playouts_per_second']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark parallel MCTS scaling')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[9, 19])
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--time', type=float, default=2.0, help='seconds per search')
+    args = parser.parse_args(argv)
+
+    print(f'{"size":>4} {"mode":>5} {"workers":>7} {"playouts/s":>11} {"speedup":>8}')
+    for board_size in args.sizes:
+        for parallel in ('root', 'tree'):
+            base = None
+            for num_workers in args.workers:
+                rate = measure(board_size, parallel, num_workers, args.time)
+                base = base or rate
+                print(f'{board_size:>4} {parallel:>5} {num_workers:>7} {rate:>11.1f} {rate / base:>8.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+'''
+Replay rate of SGF records: parsing, replaying on one reused Game per board
+size, and replaying on a new Game per record.
+
+Usage:
+    python -m benchmarks.sgf_replay --size 19 --games 200
+'''
+import argparse
+import random
+import time
+from src.game import Game
+from src.sgf import GameRecord, parse_sgf, replay_records
+from src.utils import Stone, get_opposite_stone
+
+def random_records(config, num_games, seed):
+    '''
+    Return the SGF text of random games ending after two passes
+    '''
+    rng = random.Random(seed)
+    game = Game(config)
+    records = []
+    for _ in range(num_games):
+        game.reset()
+        stone = Stone.BLACK
+        for _ in range(3 * game.board_size ** 2):
+            move = game.sample_legal_move(stone, rng)
+            if move is None:
+                game.pass_turn(stone)
+                if game.is_over():
+                    break
+            else:
+                game.try_play(stone, *move)
+            stone = get_opposite_stone(stone)
+        records.append(GameRecord.from_game(game).to_sgf())
+    return ''.join(records)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark SGF parsing and replay')
+    parser.add_argument('--size', type=int, default=19)
+    parser.add_argument('--games', type=int, default=200, help='number of records replayed')
+    args = parser.parse_args(argv)
+
+    config = {'black_stone': 'b',
+              'white_stone': 'w',
+              'board_size': args.size,
+              'enable_self_destruct': False}
+    text = random_records(config, args.games, seed=0)
+
+    start = time.perf_counter()
+    records = parse_sgf(text)
+    parse_time = time.perf_counter() - start
+    num_positions = sum(len(record.moves) for record in records)
+
+    stats = replay_records(records, config)
+
+    start = time.perf_counter()
+    for record in records:
+        record.replay(Game(config))
+    fresh_time = time.perf_counter() - start
+
+    print(f'{len(records)} games, {num_positions} positions on {args.size}x{args.size}')
+    print(f'{"":>16} {"games/s":>10} {"positions/s":>12}')
+    for name, seconds in [('parse', parse_time), ('replay reused', stats['seconds']),
+                          ('replay new Game', fresh_time)]:
+        print(f'{name:>16} {len(records) / seconds:>10.1f} {num_positions / seconds:>12.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+'''
+Benchmark suite of the engine hot paths across board sizes.
+
+Every benchmark runs a few warmup rounds, then repeated timed rounds, and reports
+the median and 95th percentile time per operation over the rounds. Results can
+be saved as JSON and compared against a saved baseline, flagging benchmarks whose
+median got slower by more than a threshold.
+
+Usage:
+    python -m benchmarks --output baseline.json
+    python -m benchmarks --compare baseline.json --threshold 0.1
+    python -m benchmarks --only place_stone playout --sizes 9
+'''
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import numpy as np
+from src.game import Game, GameUI
+from src.utils import Stone, MoveStatus, get_opposite_stone
+
+# board sizes benchmarked by default
+SIZES = [9, 13, 19]
+
+# positions timed per round by the benchmarks of single moves
+NUM_POSITIONS = 50
+
+# most random games searched for those positions, after which the round times the
+# positions found, since on small boards some kinds of moves are rare or impossible
+MAX_SETUP_GAMES = 200
+
+def make_config(board_size):
+    return {'black_stone': 'b',
+            'white_stone': 'w',
+            'board_size': board_size,
+            'enable_self_destruct': False}
+
+def random_game(board_size, rng, max_moves=None, record=True):
+    '''
+    Play a random game and return the (snapshot before the move, stone, move) of
+    every stone placed, or None without `record`, and the final game
+    '''
+    game = Game(make_config(board_size))
+    max_moves = max_moves or 2 * board_size * board_size
+    stone = Stone.BLACK
+    moves = [] if record else None
+    for _ in range(max_moves):
+        move = game.sample_legal_move(stone, rng)
+        if move is None:
+            break
+        snapshot = game.snapshot() if record else None
+        if game.try_play(stone, *move) == MoveStatus.OK and record:
+            moves.append((snapshot, stone, move))
+        stone = get_opposite_stone(stone)
+    return moves, game
+
+
+class Benchmark(object):
+    '''
+    A benchmarked operation. setup(board_size, rng) prepares untimed state and
+    run(state) performs the timed operations, returning (number of operations, seconds)
+    '''
+    def __init__(self, name, description, setup, run):
+
+        # name the benchmark is selected and reported by
+        self.name = name
+
+        # what is measured
+        self.description = description
+
+        # prepares the state of one round
+        self.setup = setup
+
+        # runs one round
+        self.run = run
+
+
+def _timed(func, num_ops):
+    start = time.perf_counter()
+    func()
+    return num_ops, time.perf_counter() - start
+
+def _setup_sequence(board_size, rng):
+    moves, _ = random_game(board_size, rng)
+    return Game(make_config(board_size)), [(stone, y, x) for _, stone, (y, x) in moves]
+
+def _run_place_stone(state):
+    game, sequence = state
+    def play():
+        for stone, y, x in sequence:
+            game._place_stone(stone, y, x)
+    return _timed(play, len(sequence))
+
+def _setup_resolve(predicate, kind):
+    '''
+    Return the setup of up to NUM_POSITIONS positions before a move for which
+    `predicate(game, stone, y, x)` is true, taken from at most MAX_SETUP_GAMES random games.
+    Raise ValueError if no such move was played, naming the `kind` of move sought
+    '''
+    def setup(board_size, rng):
+        positions = []
+        for _ in range(MAX_SETUP_GAMES):
+            if len(positions) >= NUM_POSITIONS:
+                break
+            moves, _ = random_game(board_size, rng)
+            game = Game(make_config(board_size))
+            for snapshot, stone, (y, x) in moves:
+                game.restore(snapshot)
+                if predicate(game, stone, y, x):
+                    positions.append((snapshot, stone, y, x))
+        if not positions:
+            raise ValueError(f'No {kind} found in {MAX_SETUP_GAMES} random games '
+                             f'on a {board_size}x{board_size} board')
+        return Game(make_config(board_size)), positions[:NUM_POSITIONS]
+    return setup
+
+def _captures(game, stone, y, x):
+    opposite_stone = get_opposite_stone(stone)
+    return any(game.board[ly, lx] == opposite_stone and
+               game.gm._get_group(ly, lx).num_liberties == 1
+               for ly, lx in game.board.get_liberty_coords(y, x))
+
+def _merges(game, stone, y, x):
+    groups = {game.gm._get_group(ly, lx) for ly, lx in game.board.get_liberty_coords(y, x)
+              if game.board[ly, lx] == stone}
+    return len(groups) >= 2
+
+def _run_resolve(state):
+    game, positions = state
+    elapsed = 0.0
+    for snapshot, stone, y, x in positions:
+        game.restore(snapshot)
+        start = time.perf_counter()
+        game.board.place_stone(stone, y, x)
+        game.gm.resolve_board(y, x)
+        game.gm.update_state()
+        elapsed += time.perf_counter() - start
+    return len(positions), elapsed
+
+def _setup_midgames(board_size, rng):
+    games = []
+    for _ in range(20):
+        moves, _ = random_game(board_size, rng, max_moves=board_size * board_size // 2)
+        game = Game(make_config(board_size))
+        if moves:
+            game.restore(moves[-1][0])
+        games.append(game)
+    return games
+
+def _run_board_legal_actions(games):
+    return _timed(lambda: [game.board.get_legal_actions(Stone.BLACK) for game in games],
+                  len(games))
+
+def _setup_legal_after_move(board_size, rng):
+    return _setup_resolve(lambda game, stone, y, x: True, 'move')(board_size, rng)
+
+def _run_game_legal_actions(state):
+    game, positions = state
+    elapsed = 0.0
+    for snapshot, stone, y, x in positions:
+        game.restore(snapshot)
+        game.try_play(stone, y, x)
+        start = time.perf_counter()
+        game.get_legal_actions(get_opposite_stone(stone))
+        elapsed += time.perf_counter() - start
+    return len(positions), elapsed
+
+def _setup_endgames(board_size, rng):
+    return [random_game(board_size, rng)[1] for _ in range(20)]
+
+def _run_get_scores(games):
+    return _timed(lambda: [game.get_scores() for game in games], len(games))
+
+def _setup_playout(board_size, rng):
+    return board_size, random.Random(rng.random())
+
+def _run_playout(state):
+    board_size, rng = state
+    def play():
+        for _ in range(5):
+            random_game(board_size, rng, record=False)
+    return _timed(play, 5)
+
+def _setup_gameui(board_size, rng):
+    return dict(make_config(board_size), seed=rng.getrandbits(32))
+
+def _run_gameui(config):
+    return _timed(lambda: GameUI(config, 'AI 2', 'AI 2', render=False).play(), 1)
+
+BENCHMARKS = [
+    Benchmark('place_stone', 'Game._place_stone per move of a random legal sequence',
+              _setup_sequence, _run_place_stone),
+    Benchmark('resolve_capture', 'resolve_board and update_state per capturing move',
+              _setup_resolve(_captures, 'capturing move'), _run_resolve),
+    Benchmark('resolve_merge', 'resolve_board and update_state per move joining groups',
+              _setup_resolve(_merges, 'move joining groups'), _run_resolve),
+    Benchmark('board_legal_actions', 'Board.get_legal_actions per midgame position',
+              _setup_midgames, _run_board_legal_actions),
+    Benchmark('game_legal_actions', 'Game.get_legal_actions per position, right after a move',
+              _setup_legal_after_move, _run_game_legal_actions),
+    Benchmark('get_scores', 'Game.get_scores per finished random game',
+              _setup_endgames, _run_get_scores),
+    Benchmark('playout', 'full random game from the empty board',
+              _setup_playout, _run_playout),
+    Benchmark('gameui', 'headless GameUI game between two AI 2 players',
+              _setup_gameui, _run_gameui),
+]
+
+def measure(benchmark, board_size, repeat, warmup, seed):
+    '''
+    Return the result of a benchmark at a board size as a JSON-serializable dictionary
+    of the seconds per operation of every round, their median and 95th percentile
+    '''
+    rng = random.Random(f'{seed}-{benchmark.name}-{board_size}')
+    samples = []
+    for i in range(warmup + repeat):
+        num_ops, elapsed = benchmark.run(benchmark.setup(board_size, rng))
+        if i >= warmup:
+            samples.append(elapsed / num_ops)
+    median = float(np.median(samples))
+    return {'name': benchmark.name,
+            'board_size': board_size,
+            'median': median,
+            'p95': float(np.percentile(samples, 95)),
+            'ops_per_second': 1 / median if median > 0 else 0.0,
+            'samples': samples}
+
+def run_suite(names=None, sizes=SIZES, repeat=7, warmup=1, seed=0, log=print):
+    '''
+    Run the selected benchmarks, or all of them, at every size.
+    Return the results with a description of the machine
+    '''
+    benchmarks = [b for b in BENCHMARKS if names is None or b.name in names]
+    results = []
+    for benchmark in benchmarks:
+        for board_size in sizes:
+            result = measure(benchmark, board_size, repeat, warmup, seed)
+            results.append(result)
+            log(f'{benchmark.name:>20} {board_size:>4} {result["median"] * 1e6:>12.1f} '
+                f'{result["p95"] * 1e6:>12.1f} {result["ops_per_second"]:>12.1f}')
+    return {'machine': {'python': sys.version.split()[0],
+                        'numpy': np.__version__,
+                        'platform': platform.platform()},
+            'settings': {'repeat': repeat, 'warmup': warmup, 'seed': seed},
+            'results': results}
+
+def compare(baseline, current, threshold=0.1):
+    '''
+    Compare the medians of two suite results. Return (name, board_size, baseline median,
+    current median, ratio, regressed) for every benchmark found in both, where a ratio
+    above 1 + threshold is a regression
+    '''
+    base = {(r['name'], r['board_size']): r['median'] for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        key = (result['name'], result['board_size'])
+        if key not in base:
+            continue
+        ratio = result['median'] / base[key] if base[key] > 0 else float('inf')
+        rows.append(key + (base[key], result['median'], ratio, ratio > 1 + threshold))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the engine hot paths')
+    parser.add_argument('--only', nargs='+', choices=[b.name for b in BENCHMARKS],
+                        help='benchmarks to run, all by default')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=7, help='timed rounds per benchmark')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed rounds per benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='save the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results to compare against')
+    parser.add_argument('--current', help='compare these saved JSON results instead of running')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown of the median flagged as a regression')
+    args = parser.parse_args(argv)
+
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        print(f'{"benchmark":>20} {"size":>4} {"median us":>12} {"p95 us":>12} {"ops/s":>12}')
+        current = run_suite(args.only, args.sizes, args.repeat, args.warmup, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    print(f'\n{"benchmark":>20} {"size":>4} {"baseline us":>12} {"current us":>12} {"ratio":>7}')
+    for name, board_size, base, median, ratio, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{name:>20} {board_size:>4} {base * 1e6:>12.1f} {median * 1e6:>12.1f} '
+              f'{ratio:>7.2f}{flag}')
+    num_regressions = sum(row[-1] for row in rows)
+    print(f'{num_regressions} regression(s) over {args.threshold:.0%}')
+    return 1 if num_regressions else 0
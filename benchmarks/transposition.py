@@ -0,0 +1,95 @@
+'''
+Hit rate of the MCTS transposition table when worker processes search the
+positions of the same game, each with a private table or all sharing one.
+Each worker starts at a different position and goes around the game, the way
+games of a tournament meet the same openings at different times.
+
+Usage:
+    python -m benchmarks.transposition --workers 4 --positions 20 --playouts 200
+'''
+import argparse
+import random
+from concurrent.futures import ProcessPoolExecutor
+from src.game import Game
+from src.utils import Stone, get_opposite_stone
+from src.transposition import TranspositionTable
+from src.AI4.AI4 import MCTS, Node
+
+def game_positions(config, num_positions, seed):
+    '''
+    Return (snapshot, stone to move) of the first positions of a random game
+    '''
+    rng = random.Random(seed)
+    game = Game(config)
+    stone = Stone.BLACK
+    positions = []
+    for _ in range(num_positions):
+        positions.append((game.snapshot(), stone))
+        move = game.sample_legal_move(stone, rng)
+        if move is None:
+            break
+        game.make_move(stone, move)
+        stone = get_opposite_stone(stone)
+    return positions
+
+def search_positions(config, positions, table_name, num_playouts, seed):
+    '''
+    Search every position with the table named `table_name`.
+    Return the number of lookups and hits of the worker
+    '''
+    table = TranspositionTable.attach(table_name)
+    probes, hits = table.probes, table.hits
+    game = Game(config)
+    search = MCTS(rng=random.Random(seed), table=table)
+    for snapshot, stone in positions:
+        game.restore(snapshot)
+        root = Node(None, get_opposite_stone(stone), None, game.position_hash)
+        search.search(game, root, stone, max_playouts=num_playouts)
+    return table.probes - probes, table.hits - hits
+
+def measure(config, positions, num_workers, num_playouts, num_entries, shared):
+    '''
+    Return the hit rate of the workers searching the same positions, starting
+    evenly spread over them
+    '''
+    tables = [TranspositionTable.create(num_entries)
+              for _ in range(1 if shared else num_workers)]
+    try:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = []
+            for i in range(num_workers):
+                offset = i * len(positions) // num_workers
+                futures.append(executor.submit(search_positions, config,
+                                               positions[offset:] + positions[:offset],
+                                               tables[i % len(tables)].name, num_playouts, i))
+            results = [future.result() for future in futures]
+    finally:
+        for table in tables:
+            table.close()
+    probes = sum(p for p, _ in results)
+    hits = sum(h for _, h in results)
+    return hits / probes if probes else 0.0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the shared transposition table')
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--positions', type=int, default=20, help='positions of the game searched')
+    parser.add_argument('--playouts', type=int, default=200, help='playouts per position')
+    parser.add_argument('--entries', type=int, default=1 << 16, help='slots of each table')
+    args = parser.parse_args(argv)
+
+    config = {'black_stone': 'b',
+              'white_stone': 'w',
+              'board_size': args.size,
+              'enable_self_destruct': False}
+    positions = game_positions(config, args.positions, seed=0)
+
+    print(f'{"workers":>7} {"private hit rate":>16} {"shared hit rate":>15}')
+    for num_workers in args.workers:
+        private = measure(config, positions, num_workers, args.playouts, args.entries, False)
+        shared = measure(config, positions, num_workers, args.playouts, args.entries, True)
+        print(f'{num_workers:>7} {private:>16.3f} {shared:>15.3f}')
+
+if __name__ == '__main__':
+    main()
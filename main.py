@@ -1,9 +1,10 @@
 import yaml
 from src.board import Board
-from src.game import GameUI
+from src.game import GameUI, AI_PLAYERS
+from src.sgf import write_sgf
 
 def select_players():
-    players = ['Human', 'AI 1', 'AI 2', 'AI 3']
+    players = ['Human'] + list(AI_PLAYERS)
     print("Available players:")
     for index, player in enumerate(players, 1):
         print(f"{index}. {player}")
@@ -21,6 +22,8 @@ def main(config):
     print(f"Starting a game with {selected_players[0]} and {selected_players[1]}")
     game = GameUI(config, selected_players[0], selected_players[1])
     game.play()
+    if config.get('sgf_output'):
+        write_sgf(config['sgf_output'], [game.record()], append=True)
     
 if __name__ == '__main__':
     
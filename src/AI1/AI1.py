@@ -1,4 +1,7 @@
 class ImageInfillAI:
+    def __init__(self, config=None):
+        self.config = config
+
     def nextMove(self, gameUI):
         print("AI 1 Not Implmented. Ending Game.")
         return "quit"
\ No newline at end of file
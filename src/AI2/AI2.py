@@ -1,10 +1,15 @@
 import random
+from src.playout import PlayoutPolicy
 
 class RandomAI:
+    def __init__(self, config=None):
+        # random number generator, seeded from the config if a seed is given
+        seed = None if config is None else config.get('seed')
+        self.rng = random.Random(seed)
+
+        # light policy that never fills the AI's own eyes
+        self.policy = PlayoutPolicy(self.rng)
+
     def nextMove(self, gameUI):
-        actions = gameUI.game.board.get_legal_actions(gameUI.turn)
-        if len(actions) < 1:
-            {
-               print("testing")
-            }
-        return random.choice(actions) if actions else None
+        move = self.policy.select_move(gameUI.game, gameUI.turn)
+        return move if move is not None else 'pass'
@@ -1,4 +1,66 @@
+import random
+import numpy as np
+from src.AI3.network import PolicyValueNetwork
+from src.cache import EvaluationCache
+
+# (network, evaluation cache) by weights file and cache settings, shared by the players of
+# a process so that repeated positions across games are evaluated once
+_SHARED_NETWORKS = {}
+
+def _make_cache(network, config):
+    '''
+    Create the evaluation cache of a network as configured
+    '''
+    def evaluate(board, stone):
+        policy, value = network.predict_batch(board[None], stone)
+        return policy[0], value[0]
+    return EvaluationCache(evaluate, max_entries=config.get('cnn_cache_entries', 100000),
+                           symmetry=config.get('cnn_cache_symmetry', True))
+
 class ImageCNNAI:
+    def __init__(self, config=None):
+        config = config or {}
+        self.config = config
+
+        # policy/value network loaded from `cnn_weights`, or untrained and seeded from
+        # the config, and the cache of its evaluations
+        path = config.get('cnn_weights')
+        if path:
+            key = (path, config.get('cnn_cache_entries', 100000),
+                   config.get('cnn_cache_symmetry', True))
+            if key not in _SHARED_NETWORKS:
+                network = PolicyValueNetwork.load(path)
+                _SHARED_NETWORKS[key] = (network, _make_cache(network, config))
+            self.network, self.cache = _SHARED_NETWORKS[key]
+        else:
+            seed = config.get('seed')
+            if seed is not None:
+                # derived seeds such as '0-1' are strings, which NumPy does not accept
+                seed = random.Random(seed).getrandbits(63)
+            self.network = PolicyValueNetwork.initialize(seed=seed)
+            self.cache = _make_cache(self.network, config)
+
+        # (position hash, stone to play) and the moves already returned for it, so that
+        # a move rejected by the game (positional superko) is not chosen again on the retry
+        self._tried = (None, [])
+
     def nextMove(self, gameUI):
-        print("AI 3 Not Implmented. Ending Game.")
-        return "quit"
\ No newline at end of file
+        '''
+        Play the legal move the network gives the highest probability, or pass
+        '''
+        game = gameUI.game
+        policy, _ = self.cache.evaluate(game, gameUI.turn)
+        legal = game.legal_mask(gameUI.turn).ravel().copy()
+
+        key, tried = self._tried
+        if key != (game.position_hash, gameUI.turn):
+            tried = []
+            self._tried = ((game.position_hash, gameUI.turn), tried)
+        legal[tried] = False
+        if not legal.any():
+            return 'pass'
+        move = int(np.argmax(np.where(legal, policy[:-1], -1.0)))
+        if policy[move] < policy[-1]:
+            return 'pass'
+        tried.append(move)
+        return divmod(move, game.board_size)
@@ -0,0 +1,141 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.utils import Stone
+
+# number of input planes made by encode_boards: own stones, opponent stones, empty points
+NUM_INPUT_PLANES = 3
+
+def encode_boards(boards, stones=None):
+    '''
+    Encode an (N, S, S) array of boards as (N, 3, S, S) float32 input planes
+    seen from the stone to play in each game, black by default
+    '''
+    boards = np.asarray(boards, dtype=np.int8)
+    if stones is None:
+        stones = Stone.BLACK
+    own = np.broadcast_to(np.asarray(stones, dtype=np.int8), boards.shape[:1])[:, None, None]
+    planes = np.empty((boards.shape[0], NUM_INPUT_PLANES) + boards.shape[1:], dtype=np.float32)
+    planes[:, 0] = boards == own
+    planes[:, 1] = (boards != own) & (boards != Stone.EMPTY)
+    planes[:, 2] = boards == Stone.EMPTY
+    return planes
+
+def _conv3x3_relu(x, weights, bias):
+    '''
+    Convolve (N, H, W, C) activations with a 3x3 kernel reshaped to (9 * C, O),
+    with zero padding, then add the bias and apply ReLU.
+    The patches are gathered by im2col from a strided window view
+    '''
+    num_games, height, width, channels = x.shape
+    padded = np.pad(x, ((0, 0), (1, 1), (1, 1), (0, 0)))
+    windows = sliding_window_view(padded, (3, 3), axis=(1, 2))
+    # (N, H, W, C, 3, 3) windows become (N * H * W, 3 * 3 * C) rows, matching the kernel layout
+    cols = windows.transpose(0, 1, 2, 4, 5, 3).reshape(-1, 9 * channels)
+    out = cols @ weights
+    out += bias
+    np.maximum(out, 0, out=out)
+    return out.reshape(num_games, height, width, -1)
+
+
+class PolicyValueNetwork(object):
+    '''
+    Convolutional policy/value network evaluated on the CPU with NumPy.
+    A stack of 3x3 convolutions with ReLU feeds two heads: a 1x1 convolution
+    giving a logit per point plus a pass logit from the pooled features, and
+    a value in [-1, 1] for the stone to play from the pooled features.
+    The network is fully convolutional, so the same weights work for every board size.
+
+    Weights are stored in a .npz file with the arrays
+        conv_w_{i} (O, C, 3, 3) and conv_b_{i} (O,) for each convolution i,
+        policy_w (C,), policy_b (), pass_w (C,), pass_b (), value_w (C,), value_b ()
+    '''
+    def __init__(self, weights):
+
+        # number of convolution layers
+        self.num_layers = sum(1 for name in weights if name.startswith('conv_w_'))
+        if self.num_layers == 0:
+            raise ValueError('The network weights have no convolution layers')
+
+        # number of input planes
+        self.num_input_planes = weights['conv_w_0'].shape[1]
+
+        # weights as given, kept for saving
+        self.weights = {name: np.asarray(value, dtype=np.float32) for name, value in weights.items()}
+
+        # convolution kernels reshaped to (3 * 3 * C, O) matrices, and their biases
+        self._convs = []
+        for i in range(self.num_layers):
+            kernel = self.weights[f'conv_w_{i}']
+            self._convs.append((kernel.transpose(2, 3, 1, 0).reshape(-1, kernel.shape[0]),
+                                self.weights[f'conv_b_{i}']))
+
+        # 1x1 policy convolution, pass and value heads of shape (C, 3), one column each
+        self._heads = np.stack([self.weights['policy_w'], self.weights['pass_w'],
+                                self.weights['value_w']], axis=1)
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Load the network from a .npz file
+        '''
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    @classmethod
+    def initialize(cls, num_channels=32, num_layers=4, num_input_planes=NUM_INPUT_PLANES, seed=None):
+        '''
+        Create an untrained network with He initialized weights
+        '''
+        rng = np.random.default_rng(seed)
+        weights = {}
+        channels = num_input_planes
+        for i in range(num_layers):
+            std = np.sqrt(2.0 / (9 * channels))
+            weights[f'conv_w_{i}'] = rng.normal(0, std, (num_channels, channels, 3, 3))
+            weights[f'conv_b_{i}'] = np.zeros(num_channels)
+            channels = num_channels
+        for head in ('policy', 'pass', 'value'):
+            weights[f'{head}_w'] = rng.normal(0, np.sqrt(1.0 / channels), channels)
+            weights[f'{head}_b'] = np.zeros(())
+        return cls(weights)
+
+    def save(self, path):
+        '''
+        Save the network weights to a .npz file
+        '''
+        np.savez(path, **self.weights)
+
+    def predict_planes(self, planes):
+        '''
+        Evaluate (N, C, S, S) input planes.
+        Return the (N, S * S + 1) move probabilities, with passing last,
+        and the (N,) values for the stone to play
+        '''
+        planes = np.asarray(planes, dtype=np.float32)
+        if planes.ndim != 4 or planes.shape[1] != self.num_input_planes:
+            raise ValueError(f'Expected (N, {self.num_input_planes}, S, S) input planes, '
+                             f'got {planes.shape}')
+        x = np.ascontiguousarray(planes.transpose(0, 2, 3, 1))
+        for weights, bias in self._convs:
+            x = _conv3x3_relu(x, weights, bias)
+
+        num_games = x.shape[0]
+        heads = x @ self._heads
+        pooled = heads.reshape(num_games, -1, 3).mean(axis=1)
+
+        logits = np.empty((num_games, heads.shape[1] * heads.shape[2] + 1), dtype=np.float32)
+        logits[:, :-1] = heads[..., 0].reshape(num_games, -1) + self.weights['policy_b']
+        logits[:, -1] = pooled[:, 1] + self.weights['pass_b']
+        logits -= logits.max(axis=1, keepdims=True)
+        policy = np.exp(logits, out=logits)
+        policy /= policy.sum(axis=1, keepdims=True)
+
+        value = np.tanh(pooled[:, 2] + self.weights['value_b'])
+        return policy, value
+
+    def predict_batch(self, boards, stones=None):
+        '''
+        Evaluate an (N, S, S) array of boards with the given stone, or black, to play
+        in each. Return the move probabilities and values as predict_planes does
+        '''
+        return self.predict_planes(encode_boards(boards, stones))
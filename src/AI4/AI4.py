@@ -0,0 +1,477 @@
+import math
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.utils import Stone, MoveStatus, get_opposite_stone
+from src.playout import PlayoutPolicy
+from src.transposition import TranspositionTable, table_key, PASS, NO_MOVE
+
+# most visits a new node takes from a transposition table record
+TABLE_PRIOR_VISITS = 10
+
+# playouts between the stores of the tree into the transposition table during a search,
+# so that searches running at the same time in other processes see each other's results
+TABLE_STORE_INTERVAL = 256
+
+# fraction of the time left before the move deadline of the game that a search may use,
+# leaving the rest to start the search, merge the results and return the move
+DEADLINE_MARGIN = 0.8
+
+# transposition tables shared by the players of this process, as [table, number of players]
+# by number of slots. Records are keyed by the stone to move, so both colors can share one
+_SHARED_TABLES = {}
+
+def _acquire_table(num_entries):
+    '''
+    Return the transposition table of `num_entries` slots shared by the players of
+    this process, creating it for the first player
+    '''
+    shared = _SHARED_TABLES.get(num_entries)
+    if shared is None:
+        shared = _SHARED_TABLES[num_entries] = [TranspositionTable.create(num_entries), 0]
+    shared[1] += 1
+    return shared[0]
+
+def _release_table(table):
+    '''
+    Release a table returned by _acquire_table, closing and unlinking it after its last player
+    '''
+    shared = _SHARED_TABLES[table.num_entries]
+    shared[1] -= 1
+    if shared[1] == 0:
+        del _SHARED_TABLES[table.num_entries]
+        table.close()
+
+class Node(object):
+    '''
+    Node of the search tree, reached by `stone` playing `move`,
+    a (y, x) coordinate or None to pass
+    '''
+    __slots__ = ('move', 'stone', 'parent', 'children', 'untried', 'visits', 'wins',
+                 'position_hash')
+
+    def __init__(self, move, stone, parent, position_hash):
+
+        # the move leading to this node
+        self.move = move
+
+        # the stone that played the move
+        self.stone = stone
+
+        # the parent node, or None for the root
+        self.parent = parent
+
+        # children by move
+        self.children = {}
+
+        # moves not expanded yet, or None before the node is first expanded
+        self.untried = None
+
+        # number of playouts through this node
+        self.visits = 0
+
+        # playouts through this node won by `stone`, with ties counted as half
+        self.wins = 0.0
+
+        # zobrist hash of the position after the move
+        self.position_hash = position_hash
+
+    def select_child(self, exploration):
+        '''
+        Return the child with the highest upper confidence bound (UCT)
+        '''
+        log_visits = math.log(self.visits)
+        return max(self.children.values(),
+                   key=lambda child: child.wins / child.visits +
+                   exploration * math.sqrt(log_visits / child.visits))
+
+    def size(self):
+        '''
+        Return the number of nodes of the subtree rooted at this node
+        '''
+        size = 0
+        nodes = [self]
+        while nodes:
+            node = nodes.pop()
+            size += 1
+            nodes.extend(node.children.values())
+        return size
+
+
+class MCTS(object):
+    '''
+    Monte Carlo tree search with UCT selection and eye-aware light playouts.
+    Playouts run on a working copy of the game, which is restored from a snapshot
+    after each playout. With a transposition table, new nodes start from the
+    statistics recorded for their position, and every search records its tree
+    '''
+    def __init__(self, exploration=1.4, playout_moves=None, rng=None, table=None):
+
+        # exploration constant of the UCT formula
+        self.exploration = exploration
+
+        # maximum number of moves of a playout, or None for twice the number of points
+        self.playout_moves = playout_moves
+
+        # random number generator of the playouts
+        self.rng = rng or random.Random()
+
+        # light playout policy, which never fills the eyes of the player to move
+        self.policy = PlayoutPolicy(self.rng)
+
+        # transposition table shared with other searches, or None
+        self.table = table
+
+    def search(self, game, root, stone, time_budget=None, max_playouts=None):
+        '''
+        Run playouts from the position of `game`, with `stone` to play, adding them
+        to the tree at `root` until the time budget in seconds or the number of
+        playouts runs out. The game is left unchanged. Return the number of playouts
+        '''
+        snapshot = game.snapshot()
+        start = time.perf_counter()
+        num_playouts = 0
+        if self.table is not None and root.visits == 0:
+            self._seed(root)
+        while max_playouts is None or num_playouts < max_playouts:
+            if time_budget is not None and time.perf_counter() - start >= time_budget:
+                break
+            node, to_play = self._select(game, root, stone)
+            self._backpropagate(node, self._playout(game, to_play))
+            game.restore(snapshot)
+            num_playouts += 1
+            if self.table is not None and num_playouts % TABLE_STORE_INTERVAL == 0:
+                self.store_tree(root, game.board_size)
+        if self.table is not None:
+            self.store_tree(root, game.board_size)
+        return num_playouts
+
+    def search_threads(self, game, root, stone, num_threads, time_budget=None,
+                       max_playouts=None, virtual_loss=1):
+        '''
+        Run the search with several threads over the shared tree at `root`, each
+        playing out on its own clone of `game`. Nodes on the path of a playout in
+        progress count `virtual_loss` extra lost visits, so that other threads
+        explore elsewhere. Return the number of playouts
+        '''
+        lock = threading.Lock()
+        start = time.perf_counter()
+        num_playouts = [0]
+
+        def worker(rng):
+            search = MCTS(self.exploration, self.playout_moves, rng, self.table)
+            worker_game = game.clone()
+            snapshot = worker_game.snapshot()
+            while True:
+                with lock:
+                    if max_playouts is not None and num_playouts[0] >= max_playouts:
+                        return
+                    if time_budget is not None and time.perf_counter() - start >= time_budget:
+                        return
+                    num_playouts[0] += 1
+                    node, to_play = search._select(worker_game, root, stone, virtual_loss)
+                winner = search._playout(worker_game, to_play)
+                with lock:
+                    search._backpropagate(node, winner, virtual_loss)
+                worker_game.restore(snapshot)
+
+        threads = [threading.Thread(target=worker,
+                                    args=(random.Random(self.rng.getrandbits(63)),))
+                   for _ in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.table is not None:
+            self.store_tree(root, game.board_size)
+        return num_playouts[0]
+
+    def _select(self, game, root, stone, virtual_loss=0):
+        '''
+        Select a leaf of the tree and expand it by one move, playing the moves
+        on the game. Every node on the path gets `virtual_loss` extra visits until
+        it is backpropagated. Return the new node and the stone to play from it
+        '''
+        node = root
+        node.visits += virtual_loss
+
+        # selection
+        while node.untried is not None and not node.untried and node.children:
+            node = node.select_child(self.exploration)
+            node.visits += virtual_loss
+            self._play(game, node.stone, node.move)
+            stone = get_opposite_stone(node.stone)
+
+        # expansion
+        if not game.is_over():
+            if node.untried is None:
+                node.untried = self._candidate_moves(game, stone)
+            while node.untried:
+                move = node.untried.pop()
+                if self._play(game, stone, move) != MoveStatus.OK:
+                    continue
+                child = Node(move, stone, node, game.position_hash)
+                if self.table is not None:
+                    self._seed(child)
+                child.visits += virtual_loss
+                node.children[move] = child
+                node = child
+                stone = get_opposite_stone(stone)
+                break
+
+        return node, stone
+
+    def _seed(self, node):
+        '''
+        Start a new node from the transposition table record of its position, if any
+        '''
+        record = self.table.probe(table_key(node.position_hash, get_opposite_stone(node.stone)))
+        if record is not None:
+            visits, value, _ = record
+            visits = min(visits, TABLE_PRIOR_VISITS)
+            node.visits += visits
+            node.wins += value * visits
+
+    def store_tree(self, root, board_size, min_visits=2):
+        '''
+        Record the visits, value and most visited move of every node of the tree
+        with at least `min_visits` visits in the transposition table
+        '''
+        nodes = [root]
+        while nodes:
+            node = nodes.pop()
+            if node.visits < min_visits:
+                continue
+            move = NO_MOVE
+            if node.children:
+                best = max(node.children.values(), key=lambda child: child.visits)
+                move = PASS if best.move is None else best.move[0] * board_size + best.move[1]
+            self.table.store(table_key(node.position_hash, get_opposite_stone(node.stone)),
+                             node.visits, node.wins / node.visits, move)
+            nodes.extend(node.children.values())
+
+    def _backpropagate(self, node, winner, virtual_loss=0):
+        '''
+        Record the winner of a playout, or None for a tie, from `node` up to the root,
+        taking back the virtual loss of the selection
+        '''
+        while node is not None:
+            node.visits += 1 - virtual_loss
+            if winner is None:
+                node.wins += 0.5
+            elif node.stone == winner:
+                node.wins += 1
+            node = node.parent
+
+    def _candidate_moves(self, game, stone):
+        '''
+        Return the moves to expand from a position in the order they are tried,
+        the legal moves at random and passing last
+        '''
+        moves = game.get_legal_actions(stone)
+        self.rng.shuffle(moves)
+        return [None] + moves
+
+    def _play(self, game, stone, move):
+        '''
+        Play a move on the working game. Return its MoveStatus
+        '''
+        if move is None:
+            game.pass_turn(stone)
+            return MoveStatus.OK
+        return game.try_play(stone, *move)
+
+    def _playout(self, game, stone):
+        '''
+        Play light policy moves until both players pass or the playout is too long.
+        Return the winning stone, or None for a tie
+        '''
+        playout_moves = self.playout_moves or 2 * game.board_size ** 2
+        for _ in range(playout_moves):
+            if game.is_over():
+                break
+            move = self.policy.select_move(game, stone)
+            if self._play(game, stone, move) != MoveStatus.OK:
+                game.pass_turn(stone)
+            stone = get_opposite_stone(stone)
+
+        scores = game.get_scores()
+        if scores[Stone.BLACK] == scores[Stone.WHITE]:
+            return None
+        return Stone.BLACK if scores[Stone.BLACK] > scores[Stone.WHITE] else Stone.WHITE
+
+
+def search_root(config, snapshot, stone, exploration, playout_moves, seed,
+                time_budget=None, max_playouts=None, table_name=None):
+    '''
+    Search from a snapshot of a game in its own tree, as a root-parallel worker,
+    sharing the transposition table named `table_name` if given.
+    Return the number of playouts, the tree size and the (visits, wins) of every root move
+    '''
+    from src.game import Game
+    game = Game(config)
+    game.restore(snapshot)
+    root = Node(None, get_opposite_stone(stone), None, game.position_hash)
+    table = None if table_name is None else TranspositionTable.attach(table_name)
+    search = MCTS(exploration, playout_moves, random.Random(seed), table)
+    num_playouts = search.search(game, root, stone, time_budget, max_playouts)
+    children = {move: (child.visits, child.wins) for move, child in root.children.items()}
+    return num_playouts, root.size(), children
+
+
+class MCTSAI:
+    def __init__(self, config=None):
+        config = config or {}
+
+        # seconds to search per move, or None to only stop after `max_playouts`
+        self.time_budget = config.get('mcts_time', 1.0)
+
+        # playouts to run per move, or None to only stop after `time_budget`
+        self.max_playouts = config.get('mcts_playouts')
+        if self.time_budget is None and self.max_playouts is None:
+            raise ValueError('MCTS needs a time budget (mcts_time) or a number of playouts '
+                             '(mcts_playouts) per move')
+
+        # print the search statistics after every move
+        self.verbose = config.get('mcts_verbose', False)
+
+        # number of parallel searches per move
+        self.num_workers = config.get('mcts_workers', 1)
+
+        # 'root' to merge independent trees searched by worker processes, or
+        # 'tree' to share one tree between threads using virtual loss
+        self.parallel = config.get('mcts_parallel', 'root')
+        if self.parallel not in ('root', 'tree'):
+            raise ValueError(f'Unknown MCTS parallel mode: {self.parallel}')
+
+        # the search, seeded from the config if a seed is given
+        self.mcts = MCTS(exploration=config.get('mcts_exploration', 1.4),
+                         playout_moves=config.get('mcts_playout_moves'),
+                         rng=random.Random(config.get('seed')))
+
+        # number of slots of the transposition table shared by the searches, or None for no table
+        self.table_entries = config.get('mcts_table_entries')
+
+        # transposition table in shared memory, shared with the other players of this
+        # process that have the same number of slots, acquired on first use
+        self.table = None
+
+        # process pool of the root-parallel search, created on first use
+        self._executor = None
+
+        # node of the move played last, kept to reuse its subtree on the next move
+        self._root = None
+
+        # statistics of the last search
+        self.stats = {}
+
+    def _find_root(self, game, stone):
+        '''
+        Return the node of the current position from the previous search,
+        matched by the position hash after the opponent's move, or a new root
+        '''
+        if self._root is not None:
+            for node in self._root.children.values():
+                if node.stone != stone and node.position_hash == game.position_hash:
+                    node.parent = None
+                    return node
+        return Node(None, get_opposite_stone(stone), None, game.position_hash)
+
+    def _search_time(self, gameUI):
+        '''
+        Return the seconds to search: the time budget, shortened to a fraction of
+        the time left before the move deadline of the game if there is one
+        '''
+        time_left = gameUI.time_left()
+        if time_left is None:
+            return self.time_budget
+        deadline_budget = DEADLINE_MARGIN * time_left
+        if self.time_budget is None:
+            return deadline_budget
+        return min(self.time_budget, deadline_budget)
+
+    def _search_processes(self, game, stone, time_budget):
+        '''
+        Search independent trees in worker processes and merge their root moves.
+        Root-parallel trees are not kept between moves.
+        Return the number of playouts, the total tree size and the merged
+        (visits, wins) of every root move
+        '''
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.num_workers)
+        table_name = None if self.table is None else self.table.name
+        max_playouts = self.max_playouts
+        if max_playouts is not None:
+            max_playouts = -(-max_playouts // self.num_workers)
+        snapshot = game.snapshot()
+        futures = [self._executor.submit(search_root, game.config, snapshot, stone,
+                                         self.mcts.exploration, self.mcts.playout_moves,
+                                         self.mcts.rng.getrandbits(63),
+                                         time_budget, max_playouts, table_name)
+                   for _ in range(self.num_workers)]
+
+        num_playouts = 0
+        tree_size = 0
+        children = {}
+        for future in futures:
+            playouts, size, worker_children = future.result()
+            num_playouts += playouts
+            tree_size += size
+            for move, (visits, wins) in worker_children.items():
+                total_visits, total_wins = children.get(move, (0, 0.0))
+                children[move] = (total_visits + visits, total_wins + wins)
+        return num_playouts, tree_size, children
+
+    def close(self):
+        '''
+        Shut down the worker processes of the root-parallel search
+        and release this player's hold on the transposition table
+        '''
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.table is not None:
+            _release_table(self.table)
+            self.table = None
+            self.mcts.table = None
+
+    def nextMove(self, gameUI):
+        time_budget = self._search_time(gameUI)
+        game = gameUI.game.clone()
+        stone = gameUI.turn
+        start = time.perf_counter()
+        if self.table_entries and self.table is None:
+            self.table = self.mcts.table = _acquire_table(self.table_entries)
+
+        if self.num_workers > 1 and self.parallel == 'root':
+            root = None
+            reused_visits = 0
+            num_playouts, tree_size, children = self._search_processes(game, stone, time_budget)
+        else:
+            root = self._find_root(game, stone)
+            reused_visits = root.visits
+            if self.num_workers > 1:
+                num_playouts = self.mcts.search_threads(game, root, stone, self.num_workers,
+                                                        time_budget, self.max_playouts)
+            else:
+                num_playouts = self.mcts.search(game, root, stone, time_budget,
+                                                self.max_playouts)
+            tree_size = root.size()
+            children = {move: (child.visits, child.wins) for move, child in root.children.items()}
+        elapsed = time.perf_counter() - start
+
+        self.stats = {'playouts': num_playouts,
+                      'playouts_per_second': num_playouts / elapsed if elapsed > 0 else 0.0,
+                      'reused_visits': reused_visits,
+                      'tree_size': tree_size}
+        if self.verbose:
+            print(f'MCTS: {num_playouts} playouts ({self.stats["playouts_per_second"]:.0f}/s), '
+                  f'{tree_size} nodes, {reused_visits} visits reused')
+
+        if not children:
+            self._root = None
+            return 'pass'
+        move = max(children, key=lambda move: children[move][0])
+        self._root = None if root is None else root.children[move]
+        return 'pass' if move is None else move
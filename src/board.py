@@ -1,72 +1,30 @@
 import numpy as np
 from src.utils import Stone
+from src.neighbors import get_neighbor_table
 
-class Board(np.ndarray):
+class BoardMixin(object):
     '''
-    Instance of a 2D grid board extended from np.ndarray
+    Board operations shared by every board backend.
+    Backends provide scalar access through board[y, x]
     '''
-    def __new__(cls, config={}):
-        '''
-        Standard procedure for subclassing np.ndarray
-        '''
-        # dimension of the board
-        board_size = config['board_size']
-        shape = (board_size, board_size)
-        obj = super(Board, cls).__new__(cls, shape, dtype=np.int_)
-
-        obj.board_size = board_size
-
-        # string to display as a black stone
-        obj.black_stone_render = config['black_stone']
-
-        # string to display as a white stone
-        obj.white_stone_render = config['white_stone']
-
-        # fill board with empty slots
-        obj.fill(Stone.EMPTY)
-
-        return obj
-
-    def __array_finalize__(self, obj):
-        '''
-        Standard procedure for subclassing np.ndarray
-        '''
-        if obj is None:
-            return
-        self.board_size = getattr(obj, 'board_size')
-        self.black_stone_render = getattr(obj, 'black_stone_render')
-        self.white_stone_render = getattr(obj, 'white_stone_render')
+    __slots__ = ()
 
     def get_liberty_coords(self, y, x):
         '''
         Return the liberty coordinates for (y, x). This constitutes
         "up", "down", "left", "right" if possible.
+        The returned tuple is shared and must not be modified
         '''
-        coords = []
-        if y > 0:
-            coords.append((y-1, x))
-        if y < self.board_size-1:
-            coords.append((y+1, x))
-        if x > 0:
-            coords.append((y, x-1))
-        if x < self.board_size-1:
-            coords.append((y, x+1))
-        return coords
+        return self.neighbor_table.liberty_coords[y][x]
 
-    #def place_stone(self, stone, y, x):
-        '''
-        Place a stone at the specified coordinate
-        '''
-        self[y][x] = stone
-        
     def place_stone(self, stone, y, x):
     # Check if the position is within the board boundaries
         if 0 <= y < self.board_size and 0 <= x < self.board_size:
         # Check if the position is already occupied
-            if self[y][x] != Stone.EMPTY:
+            if self[y, x] != Stone.EMPTY:
                 raise Exception("Position already occupied")
             else:
-                self[y][x] = stone
+                self[y, x] = stone
         else:
             raise Exception("Invalid position")
 
@@ -75,13 +33,13 @@ class Board(np.ndarray):
         '''
         Remove the stone at the specified coordinate
         '''
-        self[y][x] = Stone.EMPTY
+        self[y, x] = Stone.EMPTY
 
     def is_within_bounds(self, y, x):
         '''
         Check if the given coordinate is within bounds of the board
         '''
-        return 0 <= y <= self.board_size and 0 <= x <= self.board_size
+        return 0 <= y < self.board_size and 0 <= x < self.board_size
 
     def _value_to_render(self, stone):
         '''
@@ -140,7 +98,171 @@ class Board(np.ndarray):
         A move is legal if it would result in capturing opponent stones.
         '''
         # Check if the position is within the board boundaries
-        if not self.is_within_bounds(y, x) or self[y][x] != Stone.EMPTY:
+        if not self.is_within_bounds(y, x) or self[y, x] != Stone.EMPTY:
             return False
         
         return True
+
+
+class Board(BoardMixin, np.ndarray):
+    '''
+    Instance of a 2D grid board extended from np.ndarray
+    '''
+    def __new__(cls, config={}):
+        '''
+        Standard procedure for subclassing np.ndarray
+        '''
+        # dimension of the board
+        board_size = config['board_size']
+        shape = (board_size, board_size)
+        obj = super(Board, cls).__new__(cls, shape, dtype=np.int_)
+
+        obj.board_size = board_size
+
+        # precomputed neighbor structure shared by all boards of this size
+        obj.neighbor_table = get_neighbor_table(board_size)
+
+        # string to display as a black stone
+        obj.black_stone_render = config['black_stone']
+
+        # string to display as a white stone
+        obj.white_stone_render = config['white_stone']
+
+        # fill board with empty slots
+        obj.fill(Stone.EMPTY)
+
+        return obj
+
+    def __array_finalize__(self, obj):
+        '''
+        Standard procedure for subclassing np.ndarray
+        '''
+        if obj is None:
+            return
+        self.board_size = getattr(obj, 'board_size')
+        self.neighbor_table = getattr(obj, 'neighbor_table', None)
+        self.black_stone_render = getattr(obj, 'black_stone_render')
+        self.white_stone_render = getattr(obj, 'white_stone_render')
+
+
+class PaddedBoard(BoardMixin):
+    '''
+    Compact board backend storing one byte per point in a flat buffer.
+    The buffer is padded with a border of Stone.BORDER so that the
+    neighbors of any point on the board are always valid indices.
+    Numpy views of the playing area are available on demand
+    '''
+    __slots__ = ('board_size', 'neighbor_table', 'black_stone_render',
+                 'white_stone_render', '_stride', '_padded_index', '_cells', '_view')
+
+    def __init__(self, config={}):
+
+        # dimension of the board
+        self.board_size = config['board_size']
+
+        # precomputed neighbor structure shared by all boards of this size
+        self.neighbor_table = get_neighbor_table(self.board_size)
+
+        # string to display as a black stone
+        self.black_stone_render = config['black_stone']
+
+        # string to display as a white stone
+        self.white_stone_render = config['white_stone']
+
+        # row length of the padded buffer
+        self._stride = self.board_size + 2
+
+        # buffer index of each point, indexed as [y][x]
+        self._padded_index = self.neighbor_table.padded_index
+
+        # flat padded buffer of stones
+        self._cells = bytearray([Stone.BORDER]) * (self._stride * self._stride)
+
+        # writable 2D numpy view of the playing area, sharing memory with the buffer
+        padded = np.frombuffer(self._cells, dtype=np.int8).reshape(self._stride, self._stride)
+        self._view = padded[1:-1, 1:-1]
+        self._view.fill(Stone.EMPTY)
+
+    def __getitem__(self, key):
+        '''
+        Return the stone at board[y, x]. Any other key is applied to the numpy view
+        '''
+        if key.__class__ is tuple and len(key) == 2:
+            y, x = key
+            if y.__class__ is int and x.__class__ is int:
+                return self._cells[self._padded_index[y][x]]
+        return self._view[key]
+
+    def __setitem__(self, key, value):
+        '''
+        Set the stone at board[y, x]. Any other key is applied to the numpy view
+        '''
+        if key.__class__ is tuple and len(key) == 2:
+            y, x = key
+            if y.__class__ is int and x.__class__ is int:
+                self._cells[self._padded_index[y][x]] = value
+                return
+        self._view[key] = value
+
+    def __array__(self, dtype=None, copy=None):
+        '''
+        Expose the playing area to numpy
+        '''
+        if dtype is None and not copy:
+            return self._view
+        return np.array(self._view, dtype=dtype)
+
+    def __eq__(self, other):
+        return self._view == other
+
+    def __ne__(self, other):
+        return self._view != other
+
+    __hash__ = None
+
+    def __len__(self):
+        return self.board_size
+
+    def __iter__(self):
+        return iter(self._view)
+
+    @property
+    def shape(self):
+        return self._view.shape
+
+    def view(self):
+        '''
+        Return the writable numpy view of the playing area
+        '''
+        return self._view
+
+    def fill(self, stone):
+        '''
+        Fill the playing area with the specified stone, leaving the border intact
+        '''
+        self._view.fill(stone)
+
+    def copy(self):
+        '''
+        Return a copy of the playing area as a numpy array
+        '''
+        return self._view.copy()
+
+    def __repr__(self):
+        return f'PaddedBoard({self._view!r})'
+
+
+# board implementations selectable with the `board_backend` config option
+BOARD_BACKENDS = {
+    'numpy': Board,
+    'padded': PaddedBoard
+}
+
+def make_board(config):
+    '''
+    Create the board backend selected by the config, defaulting to numpy
+    '''
+    backend = config.get('board_backend', 'numpy')
+    if backend not in BOARD_BACKENDS:
+        raise ValueError(f'Unknown board backend: {backend}')
+    return BOARD_BACKENDS[backend](config)
@@ -0,0 +1,180 @@
+import sys
+from collections import OrderedDict
+import numpy as np
+from src.zobrist import get_zobrist_table
+
+# symmetry permutations shared by all boards of the same size
+_SYMMETRIES = {}
+
+# approximate bytes of bookkeeping per cache entry besides the result arrays
+ENTRY_OVERHEAD = 200
+
+def get_symmetries(board_size):
+    '''
+    Return the 8 symmetries of the square board (the D4 group) as an (8, S * S)
+    array of flat index permutations. The transformed flat board is board.ravel()[perm]
+    '''
+    perms = _SYMMETRIES.get(board_size)
+    if perms is None:
+        index = np.arange(board_size * board_size).reshape(board_size, board_size)
+        perms = np.array([np.rot90(grid, k).ravel()
+                          for grid in (index, index.T) for k in range(4)])
+        perms.flags.writeable = False
+        _SYMMETRIES[board_size] = perms
+    return perms
+
+def _nbytes(result):
+    '''
+    Return the approximate size in bytes of an evaluation result
+    '''
+    if isinstance(result, tuple):
+        return sum(_nbytes(part) for part in result)
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    return sys.getsizeof(result)
+
+def _freeze(result):
+    '''
+    Make the arrays of a cached result read-only, since every hit shares them
+    '''
+    if isinstance(result, tuple):
+        for part in result:
+            _freeze(part)
+    elif isinstance(result, np.ndarray):
+        result.flags.writeable = False
+    return result
+
+
+class EvaluationCache(object):
+    '''
+    Bounded LRU cache in front of an evaluation function, keyed by the position hash,
+    the stone to move and the ko. `evaluate(board, stone)` is called on misses with an
+    (S, S) board and returns a policy of S * S, or S * S + 1 with passing last, moves,
+    or a (policy, value) tuple.
+
+    With `symmetry`, positions are folded under the 8 board symmetries: the board is
+    rotated or reflected into a canonical orientation before it is evaluated, and the
+    policy is mapped back, so symmetric positions share one entry.
+    Entries are evicted least recently used first once there are more than
+    `max_entries`, or their results take more than about `max_bytes`
+    '''
+    def __init__(self, evaluate, max_entries=None, max_bytes=None, symmetry=False):
+
+        # evaluation function of the cached results
+        self.evaluate_board = evaluate
+
+        # largest number of entries, or None for no limit
+        self.max_entries = max_entries
+
+        # largest approximate size of the entries in bytes, or None for no limit
+        self.max_bytes = max_bytes
+
+        # fold positions under the board symmetries
+        self.symmetry = symmetry
+
+        # results by key, least recently used first
+        self._entries = OrderedDict()
+
+        # approximate size of the entries in bytes
+        self.nbytes = 0
+
+        # number of lookups found in the cache, computed, and entries evicted
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        '''
+        Remove every entry. The counters are kept
+        '''
+        self._entries.clear()
+        self.nbytes = 0
+
+    @property
+    def stats(self):
+        '''
+        Return the counters, hit rate, number of entries and approximate size
+        '''
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.nbytes}
+
+    def _canonical(self, board, stone, ko):
+        '''
+        Return the key of the canonical orientation of the board, and the permutation
+        turning the board into it
+        '''
+        board_size = board.shape[0]
+        perms = get_symmetries(board_size)
+        keys = get_zobrist_table(board_size).array.reshape(3, -1)
+        flat = board.ravel()
+        boards = flat[perms]
+        hashes = np.bitwise_xor.reduce(keys[boards, np.arange(flat.size)], axis=1)
+
+        # the ko is identified by its flat index in each orientation
+        kos = np.full(len(perms), -1)
+        if ko is not None:
+            kos = np.argmax(perms == ko[0] * board_size + ko[1], axis=1)
+        best = min(range(len(perms)), key=lambda t: (int(hashes[t]), int(kos[t])))
+        return (int(hashes[best]), int(stone), int(kos[best])), perms[best]
+
+    def _store(self, key, result):
+        '''
+        Insert a result and evict the least recently used entries over the limits
+        '''
+        self._entries[key] = _freeze(result)
+        self.nbytes += _nbytes(result) + ENTRY_OVERHEAD
+        while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries) or
+                (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= _nbytes(evicted) + ENTRY_OVERHEAD
+            self.evictions += 1
+
+    def _unfold(self, result, perm):
+        '''
+        Map a result of the canonical orientation back to the original one
+        '''
+        if isinstance(result, tuple):
+            return (self._unfold(result[0], perm),) + result[1:]
+        policy = np.empty_like(result)
+        policy[perm] = result[:perm.size]
+        policy[perm.size:] = result[perm.size:]
+        return policy
+
+    def evaluate(self, game, stone):
+        '''
+        Return the evaluation of the position of `game` with `stone` to move,
+        from the cache when possible
+        '''
+        board = np.asarray(game.board)
+        ko = game.gm._ko
+        if self.symmetry:
+            key, perm = self._canonical(board, stone, ko)
+        else:
+            key = (game.position_hash, int(stone),
+                   -1 if ko is None else ko[0] * game.board_size + ko[1])
+            perm = None
+
+        result = self._entries.get(key)
+        if result is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            self.misses += 1
+            if perm is None:
+                result = self.evaluate_board(board, stone)
+            else:
+                result = self.evaluate_board(board.ravel()[perm].reshape(board.shape), stone)
+            self._store(key, result)
+
+        if perm is None:
+            return result
+        return self._unfold(result, perm)
@@ -8,4 +8,7 @@ class InvalidInputException(Exception):
     pass
 
 class NewException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class SGFException(Exception):
+    pass
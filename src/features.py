@@ -0,0 +1,187 @@
+import numpy as np
+from src.utils import Stone, iter_bits
+
+# plane indices of the stones of the player to move, the opponent and the empty points
+OWN, OPPONENT, EMPTY = 0, 1, 2
+
+# plane indices of the stones whose group has 1, 2, or 3 or more liberties
+LIBERTIES_1, LIBERTIES_2, LIBERTIES_3 = 3, 4, 5
+
+# plane index of the point the player to move may not play because of ko
+KO = 6
+
+# index of the first history plane. History plane k marks the stone placed k + 1 placements ago
+HISTORY = 7
+
+def num_planes(history=4):
+    '''
+    Return the number of planes written by a FeatureExtractor keeping `history` placements
+    '''
+    return HISTORY + history
+
+
+class FeatureExtractor(object):
+    '''
+    Input planes of a game for learned players, maintained incrementally as moves
+    are made, unmade and restored. The planes are relative to the stone to move:
+        own stones, opponent stones, empty points, stones whose group has 1, 2
+        and 3+ liberties, the ko point, and the last `history` stone placements
+    Only the liberty counts of the groups around the points a move changed are
+    recomputed. Passes are not placements and leave the history unchanged.
+    History is not part of game snapshots, so it restarts after a restore
+    '''
+    def __init__(self, game, history=4):
+
+        # the game whose planes are extracted
+        self.game = game
+
+        # the group manager notifying the extractor of every change
+        self.gm = game.gm
+
+        # dimension of the board
+        self.board_size = game.board_size
+
+        # number of history planes
+        self.history = history
+
+        # number of planes written by write
+        self.num_planes = num_planes(history)
+
+        table = game.board.neighbor_table
+
+        # (y, x) coordinate of each flat index
+        self._coords = table.coords
+
+        # bitboard of the neighbors of each flat index
+        self._neighbor_bits = table.neighbor_bits
+
+        # bitboard of every point of the board
+        self._all_bits = table.all_bits
+
+        # the board as a numpy array sharing memory with the engine
+        self.board = np.asarray(game.board)
+
+        # liberties of the group of every stone, 0 for empty points, as a flat array.
+        # The (board_size, board_size) `liberties` view is read-only
+        self._liberties = np.zeros(self.board_size * self.board_size, dtype=np.int16)
+        self.liberties = self._liberties.reshape(self.board_size, self.board_size)
+        self.liberties.flags.writeable = False
+
+        # flat indices of the stones placed so far, most recent last
+        self._placements = []
+
+        self._update(self._all_bits)
+        self.gm.add_listener(self)
+
+    def close(self):
+        '''
+        Stop following the game
+        '''
+        self.gm.remove_listener(self)
+
+    def _update(self, dirty):
+        '''
+        Recompute the liberties of the stones on and around the dirty points.
+        Every group whose liberties changed touches one of them
+        '''
+        gm = self.gm
+        coords = self._coords
+        liberties = self._liberties
+        area = dirty
+        for i in iter_bits(dirty):
+            area |= self._neighbor_bits[i]
+
+        seen = set()
+        for i in iter_bits(area):
+            y, x = coords[i]
+            g = gm._get_group(y, x)
+            if g is None:
+                liberties[i] = 0
+            elif g not in seen:
+                seen.add(g)
+                liberties[list(iter_bits(g.coord_bits))] = g.num_liberties
+
+    def on_move(self, move, dirty):
+        '''
+        Update the planes after a stone is placed at `move`
+        '''
+        y, x = move
+        self._placements.append(y * self.board_size + x)
+        self._update(dirty)
+
+    def on_unmake(self, move, dirty):
+        '''
+        Update the planes after the stone placed at `move` is taken back
+        '''
+        if self._placements:
+            self._placements.pop()
+        self._update(dirty)
+
+    def on_restore(self):
+        '''
+        Recompute the planes after the game is restored from a snapshot
+        '''
+        self._placements = []
+        self._update(self._all_bits)
+
+    def _ko_point(self, stone):
+        '''
+        Return the flat index of the point `stone` may not play because of ko, or None
+        '''
+        ko = self.gm._ko
+        if ko is None:
+            return None
+        ky, kx = ko
+        if self.board[ky, kx] == stone:
+            return None
+        g = self.gm._get_group(ky, kx)
+        if g is None or g.num_coords != 1 or g.num_liberties != 1:
+            return None
+        return g.liberty_bits.bit_length() - 1
+
+    def write(self, out, stone):
+        '''
+        Write the planes seen by `stone` into `out`, a (num_planes, board_size, board_size)
+        array such as one entry of a batch buffer. Return `out`
+        '''
+        if not out.flags.c_contiguous:
+            raise ValueError('The planes must be written into a contiguous array')
+        board = self.board
+        liberties = self.liberties
+        np.equal(board, stone, out=out[OWN])
+        np.equal(board, Stone.BLACK + Stone.WHITE - stone, out=out[OPPONENT])
+        np.equal(board, Stone.EMPTY, out=out[EMPTY])
+        np.equal(liberties, 1, out=out[LIBERTIES_1])
+        np.equal(liberties, 2, out=out[LIBERTIES_2])
+        np.greater_equal(liberties, 3, out=out[LIBERTIES_3])
+
+        flat = out.reshape(self.num_planes, -1)
+        flat[KO:] = 0
+        ko = self._ko_point(stone)
+        if ko is not None:
+            flat[KO, ko] = 1
+        placements = self._placements
+        for k in range(min(self.history, len(placements))):
+            flat[HISTORY + k, placements[-1 - k]] = 1
+        return out
+
+    def planes(self, stone, dtype=np.float32):
+        '''
+        Return the planes seen by `stone` as a new (num_planes, board_size, board_size) array
+        '''
+        return self.write(np.empty((self.num_planes, self.board_size, self.board_size),
+                                   dtype=dtype), stone)
+
+
+def write_batch(extractors, stones, out=None, dtype=np.float32):
+    '''
+    Write the planes of every extractor, seen by the matching stone, into `out`,
+    a preallocated (N, C, S, S) buffer, or a new one. Return the buffer
+    '''
+    if out is None:
+        extractor = extractors[0]
+        out = np.empty((len(extractors), extractor.num_planes,
+                        extractor.board_size, extractor.board_size), dtype=dtype)
+    for i, (extractor, stone) in enumerate(zip(extractors, stones)):
+        extractor.write(out[i], stone)
+    return out
@@ -1,12 +1,25 @@
+import random
+import time
 from src.AI1.AI1 import ImageInfillAI
 from src.AI2.AI2 import RandomAI
 from src.AI3.AI3 import ImageCNNAI
-from src.board import Board
-from src.utils import Stone, make_2d_array
+from src.AI4.AI4 import MCTSAI
+from src.board import make_board
+from src.utils import Stone, MoveStatus, make_2d_array
 from src.group import Group, GroupManager
+from src.telemetry import LatencyHistogram
+from src.sgf import GameRecord, result_string
 from src.exceptions import (
     NewException, SelfDestructException, KoException, InvalidInputException)
 
+# AI players by the name they are selected with. Any other name is a human player
+AI_PLAYERS = {
+    'AI 1': ImageInfillAI,
+    'AI 2': RandomAI,
+    'AI 3': ImageCNNAI,
+    'AI 4': MCTSAI,
+}
+
 class Game(object):
     '''
     Manage the high level gameplay of Go
@@ -15,19 +28,30 @@ class Game(object):
 
     def __init__(self, config):
 
-        # 2D board
-        self.board = Board(config)
+        # configuration the game was created with, reused by clone
+        self.config = config
+
+        # 2D board, using the backend selected by the config
+        self.board = make_board(config)
 
         # dimension of the square board
         self.board_size = config['board_size']
 
         # group manager instance
         self.gm = GroupManager(self.board, #True)
-                               enable_self_destruct=config['enable_self_destruct'])
+                               enable_self_destruct=config['enable_self_destruct'],
+                               enable_superko=config.get('enable_superko', False))
         
         # count the number of consecutive passes
         self.count_pass = 0
 
+        # (consecutive passes, whether it was a pass) before each move made with make_move
+        self._move_stack = []
+
+        # (stone, (y, x) or None for a pass) of every move played since the game
+        # started or was last restored
+        self.moves = []
+
     def place_black(self, y, x):
         '''
         Place a black stone at coordinate (y, x)
@@ -40,11 +64,21 @@ class Game(object):
         '''
         self._place_stone(Stone.WHITE, y, x)
 
-    def pass_turn(self):
+    def pass_turn(self, stone=None):
         '''
-        Pass this turn
+        Pass this turn. The pass is recorded in the moves as a pass of `stone`
         '''
         self.count_pass += 1
+        self.moves.append((stone, None))
+
+    def reset(self):
+        '''
+        Return to the empty board, reusing the board and group structures
+        '''
+        self.gm.reset()
+        self.count_pass = 0
+        self._move_stack = []
+        self.moves = []
 
     def is_over(self):
         '''
@@ -58,6 +92,122 @@ class Game(object):
         '''
         return self.board.is_within_bounds(y, x)
 
+    def make_move(self, stone, move):
+        '''
+        Play `move` for the given stone, either a (y, x) coordinate or None to pass,
+        so that it can be taken back with unmake_move.
+        Illegal moves raise the exceptions of GroupManager.make_move and change nothing
+        '''
+        if move is None:
+            self._move_stack.append((self.count_pass, True))
+            self.count_pass += 1
+            self.moves.append((stone, None))
+            return
+        y, x = move
+        self.gm.make_move(stone, y, x)
+        self._move_stack.append((self.count_pass, False))
+        self.count_pass = 0
+        self.moves.append((stone, move))
+
+    def unmake_move(self):
+        '''
+        Take back the last move made with make_move
+        '''
+        count_pass, is_pass = self._move_stack.pop()
+        self.moves.pop()
+        if not is_pass:
+            self.gm.unmake_move()
+        self.count_pass = count_pass
+
+    def snapshot(self):
+        '''
+        Return the game state as a compact picklable tuple, to be restored with restore.
+        Moves made with make_move cannot be unmade across a snapshot
+        '''
+        return (self.board_size, self.count_pass, self.gm.snapshot())
+
+    def restore(self, snapshot):
+        '''
+        Restore the game state given by snapshot. The moves start over from the restored position
+        '''
+        board_size, count_pass, gm_state = snapshot
+        if board_size != self.board_size:
+            raise ValueError(f'Cannot restore a {board_size}x{board_size} game '
+                             f'on a {self.board_size}x{self.board_size} board')
+        self.gm.restore(gm_state)
+        self.count_pass = count_pass
+        self._move_stack = []
+        self.moves = []
+
+    def clone(self):
+        '''
+        Return an independent copy of the game
+        '''
+        game = Game(self.config)
+        game.restore(self.snapshot())
+        return game
+
+    def get_legal_actions(self, stone):
+        '''
+        Return the legal moves of the given stone as (y, x) coordinates,
+        excluding suicide and ko points
+        '''
+        return self.gm.legal_moves.get_legal_actions(stone)
+
+    def legal_mask(self, stone):
+        '''
+        Return a boolean (board_size, board_size) mask of the legal moves of the given stone
+        '''
+        return self.gm.legal_moves.legal_mask(stone)
+
+    def sample_legal_move(self, stone, rng=random, reject=None):
+        '''
+        Return a random legal move of the given stone, or None if there is none.
+        Moves for which `reject(y, x)` is true are skipped
+        '''
+        return self.gm.legal_moves.sample(stone, rng, reject)
+
+    def try_play(self, stone, y, x):
+        '''
+        Place a stone at (y, x) if it is legal, and resolve interactions due to the move.
+        Illegal moves change nothing. Return the MoveStatus of the move, without raising
+        '''
+        status = self.gm.check_move(stone, y, x)
+        if status == MoveStatus.OK:
+            self.board[y, x] = stone
+            self.gm.resolve_board(y, x)
+            self.gm.update_state()
+            self.count_pass = 0
+            self.moves.append((stone, (y, x)))
+        return status
+
+    def replay(self, moves):
+        '''
+        Play (stone, (y, x) or None for a pass) moves from the current position.
+        Return the number of moves played, stopping before the first illegal one.
+        Moves are checked while they are resolved, without the legal move tracker,
+        which catches up on the next query of the legal moves
+        '''
+        board = self.board
+        gm = self.gm
+        size = self.board_size
+        for i, (stone, move) in enumerate(moves):
+            if move is None:
+                self.pass_turn(stone)
+                continue
+            y, x = move
+            if not (0 <= y < size and 0 <= x < size) or board[y, x] != Stone.EMPTY:
+                return i
+            board[y, x] = stone
+            try:
+                gm.resolve_board(y, x)
+            except (KoException, SelfDestructException):
+                return i
+            gm.update_state()
+            self.count_pass = 0
+            self.moves.append((stone, move))
+        return len(moves)
+
     def _place_stone(self, stone, y, x):
         '''
         Place a stone at (y, x), then resolve interactions due to the move.
@@ -65,20 +215,27 @@ class Game(object):
         '''
         if stone == Stone.EMPTY:
             return
-        self.board.place_stone(stone, y, x)
-        self.count_pass = 0
-
-        try:
-            self.gm.resolve_board(y, x)
-        except SelfDestructException as e:
-            self.board.remove_stone(y, x)
+        status = self.try_play(stone, y, x)
+        if status == MoveStatus.OK:
+            return
+        if status == MoveStatus.OUT_OF_BOUNDS:
+            raise Exception("Invalid position")
+        if status == MoveStatus.OCCUPIED:
+            raise Exception("Position already occupied")
+        if status == MoveStatus.SUICIDE:
             self.count_pass = 4
             raise NewException
-        except KoException as e:
-            self.board.remove_stone(y, x)
-            raise e
-            
-        self.gm.update_state()
+        self.count_pass = 0
+        if self.gm.legal_moves.is_legal(stone, y, x):
+            raise KoException('You may not repeat a previous board state. Please choose a different move')
+        raise KoException('You may not repeat the last board state. Please choose a different move')
+
+    @property
+    def position_hash(self):
+        '''
+        Return the zobrist hash of the current board position
+        '''
+        return self.gm.position_hash
 
     @property
     def num_black_captured(self):
@@ -112,6 +269,7 @@ class Game(object):
                  }
         traversed = make_2d_array(self.board_size, self.board_size,
                                   default=lambda: False)
+        liberty_coords = self.board.neighbor_table.liberty_coords
 
         def traverse(y, x):
             traversed[y][x] = True
@@ -122,7 +280,7 @@ class Game(object):
 
             while search:
                 y, x = search.pop()
-                for ly, lx in self.board.get_liberty_coords(y, x):
+                for ly, lx in liberty_coords[y][x]:
                     this_stone = self.board[ly, lx]
                     if this_stone != Stone.EMPTY:
                         stone = stone or this_stone
@@ -154,7 +312,7 @@ class GameUI(object):
     '''
     Main interface between the game and the players
     '''
-    def __init__(self, config, player1, player2):
+    def __init__(self, config, player1, player2, render=True):
 
         # the game object
         self.game = Game(config)
@@ -166,70 +324,165 @@ class GameUI(object):
 
         self.playerWHITE = player2
 
-    def play(self):
+        # AI instance of each stone, or None for a human player. Created once per game
+        self.players = {Stone.BLACK: self._make_player(config, player1, Stone.BLACK),
+                        Stone.WHITE: self._make_player(config, player2, Stone.WHITE)}
+
+        # render the board every turn and print messages and the result
+        self.render = render
+
+        # end the game after this many moves (including passes), or never if None
+        self.max_moves = config.get('max_moves')
+
+        # number of moves played so far, including passes
+        self.num_moves = 0
+
+        # seconds an AI may think per move, after which its move is replaced by a pass
+        self.move_deadline = config.get('move_deadline')
+
+        # latencies of each player: its nextMove calls, and applying its moves to the game
+        self.think_times = {Stone.BLACK: LatencyHistogram(), Stone.WHITE: LatencyHistogram()}
+        self.apply_times = {Stone.BLACK: LatencyHistogram(), Stone.WHITE: LatencyHistogram()}
+
+        # latencies of rendering the board
+        self.render_times = LatencyHistogram()
+
+        # number of moves of each player replaced by a pass for missing the deadline
+        self.num_timeouts = {Stone.BLACK: 0, Stone.WHITE: 0}
+
+        # time the current turn started, or None outside of a turn
+        self.turn_start = None
+
+        # scores of the game once play has ended, or None before
+        self.scores = None
+
+    def _make_player(self, config, name, stone):
         '''
-        Start the game of Go. Two players alternate turns placing stones on the board
-        until the game is over.
+        Create the AI registered under `name`, or return None for a human player.
+        With a 'seed' in the config, each color gets its own derived seed
         '''
-        while not self.game.is_over():
-            is_turn_over = False
-            self.game.render_board()
+        ai_class = AI_PLAYERS.get(name)
+        if ai_class is None:
+            return None
+        if config.get('seed') is not None:
+            config = dict(config, seed=f'{config["seed"]}-{int(stone)}')
+        return ai_class(config)
 
-            while not is_turn_over:
-
-                if (self.turn == Stone.BLACK):
-                    if(self.playerBLACK == "AI 1"):
-                        imageInfillAI = ImageInfillAI()
-                        move = imageInfillAI.nextMove(self)
+    def _log(self, message):
+        '''
+        Print a message unless rendering is disabled
+        '''
+        if self.render:
+            print(message)
 
-                    elif(self.playerBLACK == "AI 2"):
-                        randomAI = RandomAI()
-                        move = randomAI.nextMove(self)
-                    
-                    elif(self.playerBLACK == "AI 3"):
-                        imageCNNAI = ImageCNNAI()
-                        move = imageCNNAI.nextMove(self)
+    def play(self):
+        '''
+        Start the game of Go. Two players alternate turns placing stones on the board
+        until the game is over. The players are closed at the end of the game.
+        Return the final scores
+        '''
+        try:
+            self._play_moves()
+        finally:
+            self.close()
 
+        self.scores = self.game.get_scores()
+        if self.render:
+            self._display_result(self.scores)
+        return self.scores
 
-                    else:
-                        move = self._prompt_move()
-                
-                elif (self.turn == Stone.WHITE):
-                    if(self.playerBLACK == "AI 1"):
-                        imageInfillAI = ImageInfillAI()
-                        move = imageInfillAI.nextMove(self)
+    def close(self):
+        '''
+        Release the resources held by the AI players, such as worker processes
+        '''
+        for player in self.players.values():
+            close = getattr(player, 'close', None)
+            if close is not None:
+                close()
 
-                    elif(self.playerBLACK == "AI 2"):
-                        randomAI = RandomAI()
-                        move = randomAI.nextMove(self)
-                    
-                    elif(self.playerBLACK == "AI 3"):
-                        imageCNNAI = ImageCNNAI()
-                        move = imageCNNAI.nextMove(self)
+    def _play_moves(self):
+        '''
+        Alternate the turns of the players until the game is over or the move limit is reached
+        '''
+        while not self.game.is_over():
+            if self.max_moves is not None and self.num_moves >= self.max_moves:
+                break
+            is_turn_over = False
+            if self.render:
+                start = time.perf_counter()
+                self.game.render_board()
+                self.render_times.add(time.perf_counter() - start)
 
+            turn_start = self.turn_start = time.perf_counter()
+            while not is_turn_over:
 
-                    else:
-                        move = self._prompt_move()
+                player = self.players[self.turn]
+                start = time.perf_counter()
+                if player is not None:
+                    move = player.nextMove(self)
+                else:
+                    move = self._prompt_move()
+                end = time.perf_counter()
+                self.think_times[self.turn].add(end - start)
 
+                if player is not None and self.move_deadline is not None and \
+                        end - turn_start > self.move_deadline:
+                    self._log(f'{self._get_player_name(self.turn)} missed the move deadline and passes')
+                    self.num_timeouts[self.turn] += 1
+                    move = 'pass'
 
+                start = time.perf_counter()
                 if move == 'pass':
-                    self.game.pass_turn()
+                    self.game.pass_turn(self.turn)
                     is_turn_over = True
                 elif move == 'quit':
                     self.game.count_pass = 4
                     is_turn_over = True
                 else:
                     is_turn_over = self._place_stone(move)
+                self.apply_times[self.turn].add(time.perf_counter() - start)
 
+            self.turn_start = None
+            self.num_moves += 1
             self._switch_turns()
 
-        self._display_result()
+    def time_left(self):
+        '''
+        Return the seconds left before the move deadline of the current turn,
+        or None without a deadline or outside of a turn
+        '''
+        if self.move_deadline is None or self.turn_start is None:
+            return None
+        return max(0.0, self.move_deadline - (time.perf_counter() - self.turn_start))
+
+    def record(self):
+        '''
+        Return the GameRecord of the moves played so far, with the result once the game is over
+        '''
+        result = None
+        if self.game.is_over() or (self.max_moves is not None and self.num_moves >= self.max_moves):
+            scores = self.scores if self.scores is not None else self.game.get_scores()
+            result = result_string(scores)
+        return GameRecord.from_game(self.game, result, self.playerBLACK, self.playerWHITE)
+
+    def telemetry(self):
+        '''
+        Return the latency histograms and deadline misses of the game as a
+        JSON-serializable dictionary, with the histograms in LatencyHistogram.to_dict form
+        '''
+        players = {}
+        for stone, color, name in [(Stone.BLACK, 'black', self.playerBLACK),
+                                   (Stone.WHITE, 'white', self.playerWHITE)]:
+            players[color] = {'player': name,
+                              'think': self.think_times[stone].to_dict(),
+                              'apply': self.apply_times[stone].to_dict(),
+                              'timeouts': self.num_timeouts[stone]}
+        return dict(players, render=self.render_times.to_dict())
 
-    def _display_result(self):
+    def _display_result(self, scores):
         '''
-        Show the result of the game including the scores and winner
+        Show the result of the game including the scores and winner, given the final scores
         '''
-        scores = self.game.get_scores()
         black_score = scores[Stone.BLACK]
         white_score = scores[Stone.WHITE]
 
@@ -255,10 +508,10 @@ class GameUI(object):
                 self.game.place_white(y, x)
             is_turn_over = True
         except NewException as f:
-            print(f)
+            self._log(f)
             is_turn_over = True
         except Exception as e:
-            print(e)
+            self._log(e)
             is_turn_over = False
         return is_turn_over
 
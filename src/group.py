@@ -1,33 +1,79 @@
-from src.utils import Stone, make_2d_array, get_opposite_stone
+import numpy as np
+from itertools import chain
+from src.utils import Stone, MoveStatus, make_2d_array, get_opposite_stone, iter_bits
 from src.exceptions import SelfDestructException, KoException
+from src.zobrist import get_zobrist_table
+from src.legal import LegalMoveTracker
 
 class Group(object):
     '''
     Representation of a group on the board.
+    Stones and liberties are stored as bitboards: integers with the bit
+    y * board_size + x set for every coordinate (y, x) in the set
     '''
-    def __init__(self, stone, liberties=None, removed_liberties=None, coords=None):
+    __slots__ = ('stone', 'board_size', 'liberty_bits', 'removed_liberty_bits',
+                 'coord_bits', '_group')
+
+    def __init__(self, stone, board_size, liberties=0, removed_liberties=0, coords=0):
 
         # the stone color of this group
         self.stone = stone
 
+        # dimension of the board, to translate between coordinates and bits
+        self.board_size = board_size
+
         # uncaptured liberties of the group
-        self.liberties = liberties or set()
+        self.liberty_bits = liberties
 
         # captured liberties of the group
-        self.removed_liberties = removed_liberties or set()
+        self.removed_liberty_bits = removed_liberties
 
         # coordinates of stones constituting the group
-        self.coords = coords or set()
+        self.coord_bits = coords
 
         # the parent group (in the case of merging)
         self._group = self
 
+    def _bit(self, coord):
+        '''
+        Return the bit of the specified coordinate
+        '''
+        y, x = coord
+        return 1 << (y * self.board_size + x)
+
+    def _to_coords(self, bits):
+        '''
+        Return the set of coordinates of the specified bits
+        '''
+        return frozenset(divmod(i, self.board_size) for i in iter_bits(bits))
+
+    @property
+    def liberties(self):
+        '''
+        Return the uncaptured liberties as a set of coordinates
+        '''
+        return self._to_coords(self.liberty_bits)
+
+    @property
+    def removed_liberties(self):
+        '''
+        Return the captured liberties as a set of coordinates
+        '''
+        return self._to_coords(self.removed_liberty_bits)
+
+    @property
+    def coords(self):
+        '''
+        Return the coordinates of the stones of the group
+        '''
+        return self._to_coords(self.coord_bits)
+
     @property
     def num_liberties(self):
         '''
         Return the number of liberties. The group is captured if there are 0
         '''
-        return len(self.liberties)
+        return self.liberty_bits.bit_count()
 
     @property
     def num_removed_liberties(self):
@@ -35,7 +81,7 @@ class Group(object):
         Return the number of "removed" liberties".
         These are the liberties that have been captured from the group
         '''
-        return len(self.removed_liberties)
+        return self.removed_liberty_bits.bit_count()
 
     @property
     def num_coords(self):
@@ -43,7 +89,7 @@ class Group(object):
         Return the number of stones in the group,
         which are stored in terms of their coordinates
         '''
-        return len(self.coords)
+        return self.coord_bits.bit_count()
 
     @property
     def group(self):
@@ -63,26 +109,27 @@ class Group(object):
         return new_group
 
     @staticmethod
-    def merge(stone, groups, merge_coord, liberties=None, removed_liberties=None):
+    def merge(groups):
         '''
         Merge the specified groups into one.
-        The `merge_coord` is the coordinate that was placed in to merge the given groups.
-        The liberties and stones of the groups are combined to form a new group
+        The smaller groups are folded into the largest one in place (union by size),
+        and liberties now occupied by stones of the merged group are dropped
         '''
-        liberties = liberties or set()
-        coords = set()
-        removed_liberties = removed_liberties or set()
+        new_group = max(groups, key=lambda g: g.num_coords)
+        liberties = new_group.liberty_bits
+        removed_liberties = new_group.removed_liberty_bits
+        coords = new_group.coord_bits
         for g in groups:
+            if g is new_group:
+                continue
+            liberties |= g.liberty_bits
+            removed_liberties |= g.removed_liberty_bits
+            coords |= g.coord_bits
+            g.assign_group(new_group)
 
-            liberties |= g.liberties
-            coords |= g.coords
-            removed_liberties |= g.removed_liberties
-
-        new_group = Group(stone, liberties=liberties,
-                                 removed_liberties=removed_liberties,
-                                 coords=coords)
-        new_group.liberties.discard(merge_coord)
-        new_group.coords.add(merge_coord)
+        new_group.liberty_bits = liberties & ~coords
+        new_group.removed_liberty_bits = removed_liberties
+        new_group.coord_bits = coords
         return new_group
 
     def assign_group(self, g):
@@ -91,42 +138,107 @@ class Group(object):
         '''
         self._group = g
 
+    def remove_liberties(self, bits):
+        '''
+        Capture the liberties of the specified bits
+        '''
+        self.liberty_bits &= ~bits
+        self.removed_liberty_bits |= bits
+
+    def restore_liberties(self, bits):
+        '''
+        Restore the liberties of the specified bits
+        '''
+        self.liberty_bits |= bits
+        self.removed_liberty_bits &= ~bits
+
     def remove_liberty(self, coord):
         '''
         Capture the liberty at the specified coordinate
         '''
-        self.liberties.discard(coord)
-        self.removed_liberties.add(coord)
+        self.remove_liberties(self._bit(coord))
 
     def restore_liberty(self, coord):
         '''
         Restore the liberty at the specified coordinate
         '''
-        self.liberties.add(coord)
-        self.removed_liberties.discard(coord)
+        self.restore_liberties(self._bit(coord))
 
     def has_liberty(self, coord):
         '''
         Return true if this group has the specified liberty open
         '''
-        return coord in self.liberties
+        return bool(self.liberty_bits & self._bit(coord))
     
     def has_removed_liberty(self, coord):
         '''
         Return true if this group has the specified liberty captured
         '''
-        return coord in self.removed_liberties
+        return bool(self.removed_liberty_bits & self._bit(coord))
+
+
+class MoveRecord(object):
+    '''
+    Journal of the changes made by one move, used to unmake it.
+    Only state that the move changed is recorded
+    '''
+    __slots__ = ('move', 'ko', 'position_hash', 'num_captured_stones',
+                 'history_added', 'groups', 'captured_bits', 'dirty')
+
+    def __init__(self, move, ko, position_hash, num_captured_stones):
+
+        # the (y, x) coordinate of the stone placed by the move
+        self.move = move
+
+        # ko before the move
+        self.ko = ko
+
+        # zobrist hash before the move
+        self.position_hash = position_hash
+
+        # number of captured black and white stones before the move
+        self.num_captured_stones = num_captured_stones
+
+        # whether the move reached a position that was not in the history yet
+        self.history_added = False
+
+        # (liberties, removed liberties, coords, parent) of every existing group
+        # before the move first changed it
+        self.groups = {}
+
+        # bitboard of the stones of each color captured by the move
+        self.captured_bits = {Stone.BLACK: 0, Stone.WHITE: 0}
+
+        # bitboard of the points whose legality the move may have changed
+        self.dirty = 0
 
 
 class GroupManager(object):
     '''
     Manages the underlying game logic of Go, mostly to do with groups.
     '''
-    def __init__(self, board, enable_self_destruct):
+    def __init__(self, board, enable_self_destruct, enable_superko=False):
 
         # the 2D board instance
         self.board = board
 
+        # dimension of the board
+        self.board_size = board.board_size
+
+        table = board.neighbor_table
+
+        # precomputed neighbor coordinates, indexed as [y][x]
+        self._liberty_coords = table.liberty_coords
+
+        # (y, x) coordinate of each flat index
+        self._coords = table.coords
+
+        # bit of each coordinate, indexed as [y][x]
+        self._bits = table.bits
+
+        # bitboard of the neighbors of each flat index
+        self._neighbor_bits = table.neighbor_bits
+
         # allow self-destruction
         self.enable_self_destruct = enable_self_destruct
 
@@ -145,6 +257,56 @@ class GroupManager(object):
         # ko resulting from the previous move only to check for violation of Ko rule
         self._ko = None
 
+        # ko before the move being resolved, restored if the move is undone
+        self._last_ko = None
+
+        # forbid any move that repeats an earlier board position
+        self.enable_superko = enable_superko
+
+        zobrist_table = get_zobrist_table(board.board_size)
+
+        # zobrist keys of the board, indexed as [stone][y][x]
+        self._zobrist_keys = zobrist_table.keys
+
+        # zobrist keys of the board, indexed as [stone][flat index]
+        self._flat_zobrist_keys = zobrist_table.flat_keys
+
+        # incremental zobrist hash of the current board position
+        self.position_hash = 0
+
+        # hashes of every position reached after a finalized move
+        self._position_history = {self.position_hash}
+
+        # coordinate of the stone being resolved
+        self._last_move = None
+
+        # incrementally maintained legal moves of both players
+        self.legal_moves = LegalMoveTracker(self)
+
+        # journal of the move being made with make_move, or None
+        self._journal = None
+
+        # journals of the moves made with make_move, most recent last
+        self._undo_stack = []
+
+        # objects notified of every change of the board, such as feature extractors
+        self._listeners = []
+
+    def add_listener(self, listener):
+        '''
+        Notify `listener` of every change of the board. After a stone is placed at
+        (y, x) it is called as listener.on_move((y, x), dirty), after a move is unmade
+        as listener.on_unmake((y, x), dirty), and after a restore as listener.on_restore().
+        `dirty` is the bitboard of the points whose legality may have changed
+        '''
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        '''
+        Stop notifying `listener`
+        '''
+        self._listeners.remove(listener)
+
     def _get_group(self, y, x):
         '''
         Get the group that the stone at the specified coordinate belongs to.
@@ -158,6 +320,15 @@ class GroupManager(object):
             self._group_map[y][x] = new_g
         return new_g
 
+    def _save_group(self, g):
+        '''
+        Record the state of the specified group in the journal of the move being made,
+        unless it was already recorded
+        '''
+        journal = self._journal
+        if journal is not None and g not in journal.groups:
+            journal.groups[g] = (g.liberty_bits, g.removed_liberty_bits, g.coord_bits, g._group)
+
     def _is_captured(self, group):
         '''
         Check if the specified group is captured
@@ -183,18 +354,97 @@ class GroupManager(object):
         else:
             self._ko = None
 
-    def _check_self_destruct(self, y, x, new_group):
+    def _check_self_destruct(self, y, x, groups, liberties):
         '''
-        Check for self-destruction, and throw an exception if it is not a legal move.
+        Check for self-destruction before the groups are merged, and throw an exception
+        if it is not a legal move. The new stone has no liberties of its own and every
+        friendly group it joins has (y, x) as its last liberty.
         '''
-        self_destruct = self._is_captured(new_group)
+        self_destruct = not liberties and all(g.num_liberties == 1 for g in groups)
+        if self_destruct and not self.enable_self_destruct:
+            self.undo_stone(y, x)
+            raise SelfDestructException('Self destruction is not permitted. Please choose a different move.')
+        return self_destruct
+
+    def _check_superko(self, y, x, groups, self_destruct):
+        '''
+        Throw an exception if the move would repeat an earlier board position.
+        The resulting hash is the current hash with the captured stones removed
+        '''
+        position_hash = self.position_hash
+        captured_groups = list(self._captured_groups)
         if self_destruct:
-            new_group.assign_group(None)
-            if not self.enable_self_destruct:
-                self.undo_stone(y, x)
-                
-                raise SelfDestructException('Self destruction is not permitted. Please choose a different move.')
-        
+            captured_groups.extend(groups)
+            position_hash ^= self._zobrist_keys[self.board[y, x]][y][x]
+        for g in captured_groups:
+            keys = self._flat_zobrist_keys[g.stone]
+            for i in iter_bits(g.coord_bits):
+                position_hash ^= keys[i]
+
+        if position_hash in self._position_history:
+            self.undo_stone(y, x)
+            raise KoException('You may not repeat a previous board state. Please choose a different move')
+
+    def check_move(self, stone, y, x):
+        '''
+        Return the MoveStatus of placing `stone` at (y, x) without changing anything.
+        Legal moves are looked up in the legal move tracker, so only illegal moves
+        and positional superko need a look at the neighboring groups
+        '''
+        if not (0 <= y < self.board_size and 0 <= x < self.board_size):
+            return MoveStatus.OUT_OF_BOUNDS
+        if self.board[y, x] != Stone.EMPTY:
+            return MoveStatus.OCCUPIED
+        if not self.legal_moves.is_legal(stone, y, x):
+            return MoveStatus.KO if self._is_ko_recapture(stone, y, x) else MoveStatus.SUICIDE
+        if self.enable_superko and self._repeats_position(stone, y, x):
+            return MoveStatus.KO
+        return MoveStatus.OK
+
+    def _is_ko_recapture(self, stone, y, x):
+        '''
+        Check if placing `stone` at the empty point (y, x) would capture exactly the ko stone
+        '''
+        num_captures = 0
+        capture_coord = None
+        for ly, lx in self._liberty_coords[y][x]:
+            this_stone = self.board[ly, lx]
+            if this_stone != Stone.EMPTY and this_stone != stone and \
+                    self._get_group(ly, lx).num_liberties == 1:
+                num_captures += 1
+                capture_coord = (ly, lx)
+        return num_captures == 1 and capture_coord == self._ko
+
+    def _repeats_position(self, stone, y, x):
+        '''
+        Check if placing `stone` at the empty point (y, x), which is otherwise legal,
+        would repeat an earlier board position, as _check_superko does after the fact
+        '''
+        position_hash = self.position_hash ^ self._zobrist_keys[stone][y][x]
+        removed = set()
+        joined = set()
+        has_liberty = False
+        for ly, lx in self._liberty_coords[y][x]:
+            this_stone = self.board[ly, lx]
+            if this_stone == Stone.EMPTY:
+                has_liberty = True
+            elif this_stone != stone:
+                g = self._get_group(ly, lx)
+                if g.num_liberties == 1:
+                    removed.add(g)
+            else:
+                joined.add(self._get_group(ly, lx))
+
+        # a self-destructing stone is removed with the groups it joins
+        if not removed and not has_liberty and all(g.num_liberties == 1 for g in joined):
+            position_hash ^= self._zobrist_keys[stone][y][x]
+            removed |= joined
+        for g in removed:
+            keys = self._flat_zobrist_keys[g.stone]
+            for i in iter_bits(g.coord_bits):
+                position_hash ^= keys[i]
+        return position_hash in self._position_history
+
     def is_same_group(self, y1, x1, y2, x2):
         '''
         Check if the two specified coordinates share the same group.
@@ -210,16 +460,19 @@ class GroupManager(object):
         '''
         stone = self.board[y, x]
         opposite_stone = get_opposite_stone(stone)
-        for ly, lx in self.board.get_liberty_coords(y, x):
+        bit = self._bits[y][x]
+        for ly, lx in self._liberty_coords[y][x]:
             if self.board[ly, lx] == opposite_stone:
                 group = self._get_group(ly, lx)
-                group.restore_liberty((y, x))
+                group.restore_liberties(bit)
                 group.assign_group(group)
                 self._captured_groups.discard(group)
 
         this_group = self._get_group(y, x)
         self._captured_groups.discard(this_group)
         self.board.remove_stone(y, x)
+        self.position_hash ^= self._zobrist_keys[stone][y][x]
+        self._ko = self._last_ko
 
     def resolve_board(self, y, x):
         '''
@@ -230,38 +483,53 @@ class GroupManager(object):
         groups = set()
         stone = self.board[y, x]
         opposite_stone = get_opposite_stone(stone)
-        new_group_liberties = set()
-        new_group_removed_liberties = set()
+        bit = self._bits[y][x]
+        new_group_liberties = 0
+        new_group_removed_liberties = 0
         captured = []
+        self._last_ko = self._ko
+        self._last_move = (y, x)
+        self.position_hash ^= self._zobrist_keys[stone][y][x]
 
-        for ly, lx in self.board.get_liberty_coords(y, x):
-            g = self._get_group(ly, lx)
+        for ly, lx in self._liberty_coords[y][x]:
+            this_stone = self.board[ly, lx]
 
-            if self.board[ly, lx] == Stone.EMPTY:
-                new_group_liberties.add((ly, lx))
+            if this_stone == Stone.EMPTY:
+                new_group_liberties |= self._bits[ly][lx]
 
-            elif self.board[ly, lx] == opposite_stone:
-                g.remove_liberty((y, x))
+            elif this_stone == opposite_stone:
+                g = self._get_group(ly, lx)
+                self._save_group(g)
+                g.remove_liberties(bit)
                 if self._is_captured(g):
                     captured.append((ly, lx))
-                    new_group_liberties.add((ly, lx))
+                    new_group_liberties |= self._bits[ly][lx]
                 else:
-                    new_group_removed_liberties.add((ly, lx))
+                    new_group_removed_liberties |= self._bits[ly][lx]
 
             else:
-                groups.add(g)
+                groups.add(self._get_group(ly, lx))
 
         self._check_ko(y, x, captured)
 
-        new_group = Group.merge(stone, groups, (y, x),  
-                                liberties=new_group_liberties,
-                                removed_liberties=new_group_removed_liberties
-                               )
-
-        self._check_self_destruct(y, x, new_group)
-
-        for g in groups:
-            g.assign_group(new_group)
+        # every check happens before merging, since merging modifies the largest group in place
+        self_destruct = self._check_self_destruct(y, x, groups, new_group_liberties)
+
+        if self.enable_superko:
+            self._check_superko(y, x, groups, self_destruct)
+
+        new_group = Group(stone, self.board_size,
+                          liberties=new_group_liberties,
+                          removed_liberties=new_group_removed_liberties,
+                          coords=bit)
+        if groups:
+            for g in groups:
+                self._save_group(g)
+            groups.add(new_group)
+            new_group = Group.merge(groups)
+        if self_destruct:
+            new_group.assign_group(None)
+            self._captured_groups.add(new_group)
         self._group_map[y][x] = new_group
 
     def update_state(self):
@@ -270,27 +538,204 @@ class GroupManager(object):
         At this point, the move prior is considered valid, and 
         all post-processing of captures occurs here
         '''
+        # bitboard of points whose legality may have changed, and groups whose liberties changed
+        dirty = 0
+        changed_groups = set()
+
         for g in self._captured_groups:
 
             # nullify group
             g.assign_group(None)
 
             # restore liberties to those who had liberties removed by a group that was captured
-            for y, x in g.removed_liberties:
+            coord_bits = g.coord_bits
+            for i in iter_bits(g.removed_liberty_bits):
+                y, x = self._coords[i]
                 group_to_change = self._get_group(y, x)
                 if group_to_change is None:
                     continue
-                liberty_coords = self.board.get_liberty_coords(y, x)
-                for lcoord in liberty_coords:
-                    if lcoord in g.coords:
-                        group_to_change.restore_liberty(lcoord)
+                self._save_group(group_to_change)
+                group_to_change.restore_liberties(self._neighbor_bits[i] & coord_bits)
+                changed_groups.add(group_to_change)
 
             # clear captured regions on board
-            for y, x in g.coords:
+            keys = self._flat_zobrist_keys[g.stone]
+            for i in iter_bits(coord_bits):
+                y, x = self._coords[i]
                 self.board.remove_stone(y, x)
                 self._group_map[y][x] = None
+                self.position_hash ^= keys[i]
+                dirty |= self._neighbor_bits[i]
+            dirty |= coord_bits
 
             # record the captured groups
             self._num_captured_stones[g.stone] += g.num_coords
+            if self._journal is not None:
+                self._journal.captured_bits[g.stone] |= coord_bits
 
         self._captured_groups.clear()
+        if self._journal is not None:
+            self._journal.history_added = self.position_hash not in self._position_history
+        self._position_history.add(self.position_hash)
+
+        move = self._last_move
+        if move is not None:
+            y, x = move
+            dirty |= self._bits[y][x]
+            changed_groups.add(self._get_group(y, x))
+            for ly, lx in self._liberty_coords[y][x]:
+                changed_groups.add(self._get_group(ly, lx))
+            if self._last_ko is not None:
+                ky, kx = self._last_ko
+                dirty |= self._neighbor_bits[ky * self.board_size + kx]
+            self._last_move = None
+
+        changed_groups.discard(None)
+        for g in changed_groups:
+            dirty |= g.liberty_bits
+        self.legal_moves.mark_dirty(dirty)
+        if self._journal is not None:
+            self._journal.dirty = dirty
+        if move is not None:
+            for listener in self._listeners:
+                listener.on_move(move, dirty)
+
+    def snapshot(self):
+        '''
+        Return the state of the board and its groups as a compact picklable tuple of
+        the flat board bytes, the group id of every point (-1 if empty), the
+        (stone, liberties, removed liberties, coords) bitboards of every group,
+        the ko, the hash, the position history, the captures and the legal moves.
+        Moves made with make_move before the snapshot cannot be unmade after restoring it
+        '''
+        # every distinct map entry, including parents not yet compressed away,
+        # is numbered by the id of its root group
+        ids = {None: -1}
+        roots = {}
+        groups = []
+        for g in set(chain.from_iterable(self._group_map)):
+            if g is None:
+                continue
+            root = g.group
+            group_id = roots.get(root)
+            if group_id is None:
+                group_id = roots[root] = len(groups)
+                groups.append((int(root.stone), root.liberty_bits,
+                               root.removed_liberty_bits, root.coord_bits))
+            ids[g] = group_id
+        group_ids = tuple([ids[g] for g in chain.from_iterable(self._group_map)])
+
+        board = np.asarray(self.board)
+        if board.dtype != np.int8:
+            board = board.astype(np.int8)
+        return (board.tobytes(), group_ids, tuple(groups), self._ko,
+                self.position_hash, frozenset(self._position_history),
+                (self._num_captured_stones[Stone.BLACK], self._num_captured_stones[Stone.WHITE]),
+                self.legal_moves.snapshot())
+
+    def restore(self, state):
+        '''
+        Restore the state given by snapshot. The board must have the same size
+        '''
+        (board, group_ids, groups, self._ko, self.position_hash, history,
+         num_captured_stones, legal_moves) = state
+
+        size = self.board_size
+        self.board[:, :] = np.frombuffer(board, dtype=np.int8).reshape(size, size)
+
+        # group id -1 maps to the trailing None
+        groups = [Group(stone, size, liberties, removed_liberties, coords)
+                  for stone, liberties, removed_liberties, coords in groups]
+        groups.append(None)
+        self._group_map = [[groups[i] for i in group_ids[y * size:(y + 1) * size]]
+                           for y in range(size)]
+
+        self._position_history = set(history)
+        self._num_captured_stones[Stone.BLACK], self._num_captured_stones[Stone.WHITE] = \
+            num_captured_stones
+        self._captured_groups.clear()
+        self._last_ko = None
+        self._last_move = None
+        self._undo_stack = []
+        self.legal_moves.restore(legal_moves)
+        for listener in self._listeners:
+            listener.on_restore()
+
+    def reset(self):
+        '''
+        Clear the board and every group, reusing the existing structures
+        '''
+        self.board.fill(Stone.EMPTY)
+        for row in self._group_map:
+            row[:] = [None] * self.board_size
+        self._captured_groups.clear()
+        self._num_captured_stones[Stone.BLACK] = 0
+        self._num_captured_stones[Stone.WHITE] = 0
+        self._ko = None
+        self._last_ko = None
+        self._last_move = None
+        self.position_hash = 0
+        self._position_history.clear()
+        self._position_history.add(self.position_hash)
+        self._journal = None
+        self._undo_stack.clear()
+        self.legal_moves.reset()
+        for listener in self._listeners:
+            listener.on_restore()
+
+    def make_move(self, stone, y, x):
+        '''
+        Place a stone at (y, x) and resolve the move, journaling every change so
+        that it can be taken back with unmake_move. Illegal moves raise the same
+        exceptions as resolve_board and leave no journal
+        '''
+        self.board.place_stone(stone, y, x)
+        self._journal = MoveRecord((y, x), self._ko, self.position_hash,
+                                   (self._num_captured_stones[Stone.BLACK],
+                                    self._num_captured_stones[Stone.WHITE]))
+        try:
+            self.resolve_board(y, x)
+            self.update_state()
+            self._undo_stack.append(self._journal)
+        finally:
+            self._journal = None
+
+    def unmake_move(self):
+        '''
+        Take back the last move made with make_move, restoring the exact prior state.
+        The cost is proportional to the stones and groups that the move changed
+        '''
+        record = self._undo_stack.pop()
+        y, x = record.move
+
+        # put the captured stones back on the board
+        for stone, captured_bits in record.captured_bits.items():
+            for i in iter_bits(captured_bits):
+                cy, cx = self._coords[i]
+                self.board[cy, cx] = stone
+
+        # restore every changed group. Groups that were merged away or captured are
+        # roots again, so their stones are pointed back at them
+        for g, (liberties, removed_liberties, coords, parent) in record.groups.items():
+            relink = g._group is not parent
+            g.liberty_bits = liberties
+            g.removed_liberty_bits = removed_liberties
+            g.coord_bits = coords
+            g._group = parent
+            if relink:
+                for i in iter_bits(coords):
+                    cy, cx = self._coords[i]
+                    self._group_map[cy][cx] = g
+
+        self.board.remove_stone(y, x)
+        self._group_map[y][x] = None
+
+        if record.history_added:
+            self._position_history.discard(self.position_hash)
+        self.position_hash = record.position_hash
+        self._ko = record.ko
+        self._num_captured_stones[Stone.BLACK], self._num_captured_stones[Stone.WHITE] = \
+            record.num_captured_stones
+        self.legal_moves.mark_dirty(record.dirty)
+        for listener in self._listeners:
+            listener.on_unmake(record.move, record.dirty)
@@ -0,0 +1,175 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+class BatchingEvaluator(object):
+    '''
+    In-process evaluation service batching requests from many threads or coroutines.
+    Requests wait in a queue and a worker thread evaluates them in one call once
+    `max_batch_size` of them are waiting, or `max_wait` seconds after the first one
+    arrived. Each request gets its share of the result through a future.
+
+    `evaluate` is called with the stacked inputs of a batch and returns an array,
+    or a tuple of arrays, whose first axis follows the batch, such as
+    PolicyValueNetwork.predict_planes
+    '''
+    def __init__(self, evaluate, max_batch_size=32, max_wait=0.002):
+
+        # function evaluating a stacked batch of inputs
+        self.evaluate_batch = evaluate
+
+        # largest number of requests evaluated in one call
+        self.max_batch_size = max_batch_size
+
+        # seconds to wait for a batch to fill after its first request
+        self.max_wait = max_wait
+
+        # pending (input, future, submit time) requests, and None to stop the worker
+        self._queue = queue.Queue()
+
+        # guards the metrics
+        self._lock = threading.Lock()
+
+        # counters of the requests and batches evaluated so far
+        self._num_requests = 0
+        self._num_batches = 0
+
+        # total and largest seconds requests waited in the queue before their batch ran
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+        # total seconds spent in `evaluate`
+        self._evaluate_time = 0.0
+
+        # whether close was called, after which no request is accepted
+        self._closed = False
+
+        # held while checking `_closed` and queueing, so no request follows the stop of the worker
+        self._submit_lock = threading.Lock()
+
+        # worker thread collecting and evaluating batches
+        self._worker = threading.Thread(target=self._run, name='BatchingEvaluator', daemon=True)
+        self._worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, x):
+        '''
+        Queue one input for evaluation. Return a future of its result
+        '''
+        future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError('The evaluator is closed')
+            self._queue.put((x, future, time.perf_counter()))
+        return future
+
+    def evaluate(self, x):
+        '''
+        Evaluate one input, blocking until its batch is done
+        '''
+        return self.submit(x).result()
+
+    async def evaluate_async(self, x):
+        '''
+        Evaluate one input from a coroutine without blocking the event loop
+        '''
+        return await asyncio.wrap_future(self.submit(x))
+
+    def close(self):
+        '''
+        Evaluate the requests still queued, then stop the worker thread
+        '''
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        '''
+        Wait for the next batch of requests. Return it, and whether the worker should stop
+        '''
+        request = self._queue.get()
+        if request is None:
+            return [], True
+        batch = [request]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self):
+        '''
+        Evaluate batches until closed. Requests queued before close are still evaluated
+        '''
+        stop = False
+        while not stop or not self._queue.empty():
+            batch, stopped = self._collect()
+            stop = stop or stopped
+            if batch:
+                self._evaluate(batch)
+
+    def _evaluate(self, batch):
+        '''
+        Evaluate a batch of requests and resolve their futures
+        '''
+        start = time.perf_counter()
+        latencies = [start - submitted for _, _, submitted in batch]
+        futures = [future for _, future, _ in batch]
+        try:
+            result = self.evaluate_batch(np.stack([x for x, _, _ in batch]))
+            error = None
+        except Exception as e:
+            result = None
+            error = e
+
+        with self._lock:
+            self._num_requests += len(batch)
+            self._num_batches += 1
+            self._total_latency += sum(latencies)
+            self._max_latency = max(self._max_latency, max(latencies))
+            self._evaluate_time += time.perf_counter() - start
+
+        if error is not None:
+            for future in futures:
+                future.set_exception(error)
+            return
+        for i, future in enumerate(futures):
+            if isinstance(result, tuple):
+                future.set_result(tuple(part[i] for part in result))
+            else:
+                future.set_result(result[i])
+
+    @property
+    def stats(self):
+        '''
+        Return the metrics of the batches evaluated so far: numbers of requests and
+        batches, mean batch size, fill rate of the batches against max_batch_size,
+        mean and largest queue latency in seconds, and time spent evaluating
+        '''
+        with self._lock:
+            num_batches = self._num_batches or 1
+            num_requests = self._num_requests or 1
+            return {'requests': self._num_requests,
+                    'batches': self._num_batches,
+                    'mean_batch_size': self._num_requests / num_batches,
+                    'fill_rate': self._num_requests / (num_batches * self.max_batch_size),
+                    'mean_latency': self._total_latency / num_requests,
+                    'max_latency': self._max_latency,
+                    'evaluate_time': self._evaluate_time}
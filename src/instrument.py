@@ -0,0 +1,202 @@
+'''
+Opt-in instrumentation of the engine hot paths.
+
+While enabled, the instrumented methods of Group, GroupManager and Game are
+replaced by wrappers counting their calls and cumulative time, along with
+per-operation totals such as the stones captured or the groups merged.
+disable puts the original methods back, so the engine runs exactly as
+uninstrumented code when instrumentation is off.
+
+Counters are per process and not locked; counts from several threads of the
+same process may be slightly off. Times are inclusive, so the time of
+resolve_board includes the time of the merges it made.
+
+Usage:
+    from src import instrument
+    instrument.enable()
+    ...
+    print(instrument.to_json())
+    instrument.reset()
+'''
+import contextlib
+import functools
+import json
+import time
+from src.utils import MoveStatus, iter_bits
+from src.exceptions import SelfDestructException, KoException
+from src.group import Group, GroupManager
+from src.game import Game
+
+# counters by operation name. Every operation has 'calls' and 'time', in seconds
+_counters = {}
+
+# original methods replaced while enabled, as (class, attribute, original)
+_patched = []
+
+def _new_counters():
+    return {
+        'resolve_board': {'calls': 0, 'time': 0.0},
+        'merge': {'calls': 0, 'time': 0.0, 'groups': 0, 'stones': 0,
+                  'max_stones': 0, 'arity': {},
+                  'set_sizes': {'stones': {}, 'liberties': {}}},
+        'update_state': {'calls': 0, 'time': 0.0, 'captured_groups': 0,
+                         'captured_stones': 0, 'liberties_restored': 0},
+        'undo_stone': {'calls': 0, 'time': 0.0},
+        'get_scores': {'calls': 0, 'time': 0.0},
+        'rejections': {'ko': 0, 'suicide': 0},
+    }
+
+def _timed(name):
+    '''
+    Return a decorator of a method counting its calls and time under `name`
+    '''
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            counter = _counters[name]
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                counter['calls'] += 1
+                counter['time'] += time.perf_counter() - start
+        return wrapper
+    return decorate
+
+def _count(histogram, value):
+    histogram[str(value)] = histogram.get(str(value), 0) + 1
+
+def _instrument_merge(merge):
+    '''
+    Count the merges by their number of groups ('arity'), and the merged groups by
+    their number of stones and of liberties as they enter the merge ('set_sizes').
+    Histogram keys are strings, as in JSON
+    '''
+    @_timed('merge')
+    def wrapper(groups):
+        counter = _counters['merge']
+        num_stones = sum(g.num_coords for g in groups)
+        counter['groups'] += len(groups)
+        counter['stones'] += num_stones
+        counter['max_stones'] = max(counter['max_stones'], num_stones)
+        _count(counter['arity'], len(groups))
+        sizes = counter['set_sizes']
+        for g in groups:
+            _count(sizes['stones'], g.num_coords)
+            _count(sizes['liberties'], g.num_liberties)
+        return merge(groups)
+    return staticmethod(wrapper)
+
+def _instrument_update_state(update_state):
+    @_timed('update_state')
+    def wrapper(self):
+        counter = _counters['update_state']
+        neighbor_bits = self._neighbor_bits
+        for g in self._captured_groups:
+            counter['captured_groups'] += 1
+            counter['captured_stones'] += g.num_coords
+            # every captured stone gives a liberty back to each neighboring enemy stone
+            for i in iter_bits(g.removed_liberty_bits):
+                counter['liberties_restored'] += (neighbor_bits[i] & g.coord_bits).bit_count()
+        return update_state(self)
+    return wrapper
+
+def _instrument_resolve_board(resolve_board):
+    @_timed('resolve_board')
+    def wrapper(self, y, x):
+        try:
+            return resolve_board(self, y, x)
+        except KoException:
+            _counters['rejections']['ko'] += 1
+            raise
+        except SelfDestructException:
+            _counters['rejections']['suicide'] += 1
+            raise
+    return wrapper
+
+def _instrument_check_move(check_move):
+    @functools.wraps(check_move)
+    def wrapper(self, stone, y, x):
+        status = check_move(self, stone, y, x)
+        if status == MoveStatus.KO:
+            _counters['rejections']['ko'] += 1
+        elif status == MoveStatus.SUICIDE:
+            _counters['rejections']['suicide'] += 1
+        return status
+    return wrapper
+
+# (class, attribute, wrapper factory) of every instrumented method
+_INSTRUMENTED = [
+    (Group, 'merge', _instrument_merge),
+    (GroupManager, 'resolve_board', _instrument_resolve_board),
+    (GroupManager, 'update_state', _instrument_update_state),
+    (GroupManager, 'undo_stone', _timed('undo_stone')),
+    (GroupManager, 'check_move', _instrument_check_move),
+    (Game, 'get_scores', _timed('get_scores')),
+]
+
+def is_enabled():
+    '''
+    Return true if instrumentation is enabled
+    '''
+    return bool(_patched)
+
+def enable():
+    '''
+    Start counting. The counters keep their values from earlier runs until reset
+    '''
+    if _patched:
+        return
+    if not _counters:
+        _counters.update(_new_counters())
+    for cls, attribute, instrument in _INSTRUMENTED:
+        original = cls.__dict__[attribute]
+        method = original.__func__ if isinstance(original, staticmethod) else original
+        _patched.append((cls, attribute, original))
+        setattr(cls, attribute, instrument(method))
+
+def disable():
+    '''
+    Stop counting and put the original methods back. The counters are kept
+    '''
+    while _patched:
+        cls, attribute, original = _patched.pop()
+        setattr(cls, attribute, original)
+
+def reset():
+    '''
+    Zero every counter
+    '''
+    _counters.clear()
+    _counters.update(_new_counters())
+
+def snapshot():
+    '''
+    Return a JSON-serializable copy of the counters, with the mean time per call
+    of every timed operation
+    '''
+    result = json.loads(json.dumps(_counters or _new_counters()))
+    for counter in result.values():
+        if 'calls' in counter:
+            counter['mean_time'] = counter['time'] / counter['calls'] if counter['calls'] else 0.0
+    return result
+
+def to_json(**kwargs):
+    '''
+    Return the snapshot as a JSON string. Keyword arguments are passed to json.dumps
+    '''
+    return json.dumps(snapshot(), **kwargs)
+
+
+@contextlib.contextmanager
+def instrumented():
+    '''
+    Enable instrumentation for the block of a with statement, with fresh counters.
+    The counters are left as they were at the end of the block
+    '''
+    reset()
+    enable()
+    try:
+        yield
+    finally:
+        disable()
@@ -0,0 +1,213 @@
+import random
+import numpy as np
+from src.utils import Stone, iter_bits
+
+class LegalMoveTracker(object):
+    '''
+    Incrementally maintained legal moves of both players.
+    The group manager marks the points whose legality may have changed after
+    every move, and they are re-evaluated lazily the next time legal moves are
+    queried. Suicide (unless self-destruction is enabled) and simple ko are
+    excluded. Positional superko is only checked when a move is played.
+    '''
+    def __init__(self, gm):
+
+        # the group manager whose board is tracked
+        self.gm = gm
+
+        table = gm.board.neighbor_table
+
+        # dimension of the board
+        self.board_size = table.board_size
+
+        # (y, x) coordinate of each flat index
+        self._coords = table.coords
+
+        # flat index of each coordinate, indexed as [y][x]
+        self._index = table.index
+
+        # neighbor coordinates, indexed as [y][x]
+        self._liberty_coords = table.liberty_coords
+
+        # legal-move mask of each stone over flat indices, indexed as masks[stone]
+        self.masks = np.zeros((3, table.num_points), dtype=bool)
+
+        # legal flat indices of each stone in no particular order, for O(1) sampling
+        self._moves = {Stone.BLACK: [], Stone.WHITE: []}
+
+        # position of each flat index within `_moves`, or -1 if it is not legal
+        self._positions = {Stone.BLACK: [-1] * table.num_points,
+                           Stone.WHITE: [-1] * table.num_points}
+
+        # bitboard of the points whose legality must be re-evaluated
+        self._dirty = table.all_bits
+
+    def mark_dirty(self, bits):
+        '''
+        Mark the points of a bitboard whose legality may have changed
+        '''
+        self._dirty |= bits
+
+    def _flush(self):
+        '''
+        Re-evaluate the legality of all dirty coordinates
+        '''
+        if not self._dirty:
+            return
+        for i in iter_bits(self._dirty):
+            y, x = self._coords[i]
+            black_legal, white_legal = self._evaluate(y, x)
+            self._set(Stone.BLACK, i, black_legal)
+            self._set(Stone.WHITE, i, white_legal)
+        self._dirty = 0
+
+    def _set(self, stone, i, legal):
+        '''
+        Add or remove the flat index `i` from the legal moves of `stone`.
+        Removal swaps the last move into the freed slot
+        '''
+        positions = self._positions[stone]
+        pos = positions[i]
+        if legal == (pos >= 0):
+            return
+        moves = self._moves[stone]
+        if legal:
+            positions[i] = len(moves)
+            moves.append(i)
+        else:
+            last = moves.pop()
+            if last != i:
+                moves[pos] = last
+                positions[last] = pos
+            positions[i] = -1
+        self.masks[stone, i] = legal
+
+    def _evaluate(self, y, x):
+        '''
+        Check if placing a black or a white stone at the empty or occupied point (y, x)
+        is legal, looking only once at the neighboring points and groups.
+        Return whether each is legal as (black, white)
+        '''
+        gm = self.gm
+        board = gm.board
+        if board[y, x] != Stone.EMPTY:
+            return False, False
+
+        # whether each stone would have a liberty, the number of neighboring stones it
+        # would capture and the last such neighbor, indexed by stone
+        has_liberty = [False, False, False]
+        num_captures = [0, 0, 0]
+        capture_coord = [None, None, None]
+        for ly, lx in self._liberty_coords[y][x]:
+            this_stone = board[ly, lx]
+            if this_stone == Stone.EMPTY:
+                has_liberty[Stone.BLACK] = has_liberty[Stone.WHITE] = True
+            elif gm._get_group(ly, lx).num_liberties > 1:
+                has_liberty[this_stone] = True
+            else:
+                opposite_stone = Stone.BLACK + Stone.WHITE - this_stone
+                num_captures[opposite_stone] += 1
+                capture_coord[opposite_stone] = (ly, lx)
+
+        ko = gm._ko
+        legal = [False, False, False]
+        for stone in (Stone.BLACK, Stone.WHITE):
+            if num_captures[stone] == 1 and capture_coord[stone] == ko:
+                continue
+            legal[stone] = has_liberty[stone] or num_captures[stone] > 0 or gm.enable_self_destruct
+        return legal[Stone.BLACK], legal[Stone.WHITE]
+
+    def snapshot(self):
+        '''
+        Return the tracked legal moves as a compact picklable tuple
+        '''
+        return (tuple(self._moves[Stone.BLACK]), tuple(self._moves[Stone.WHITE]),
+                tuple(self._positions[Stone.BLACK]), tuple(self._positions[Stone.WHITE]),
+                self._dirty)
+
+    def restore(self, state):
+        '''
+        Restore the legal moves from a tuple given by snapshot
+        '''
+        black_moves, white_moves, black_positions, white_positions, self._dirty = state
+        self._moves = {Stone.BLACK: list(black_moves), Stone.WHITE: list(white_moves)}
+        self._positions = {Stone.BLACK: list(black_positions),
+                           Stone.WHITE: list(white_positions)}
+        self.masks[:] = False
+        self.masks[Stone.BLACK, self._moves[Stone.BLACK]] = True
+        self.masks[Stone.WHITE, self._moves[Stone.WHITE]] = True
+
+    def reset(self):
+        '''
+        Track the empty board again, where every point is legal for both stones
+        '''
+        num_points = self.board_size * self.board_size
+        for stone in (Stone.BLACK, Stone.WHITE):
+            self._moves[stone][:] = range(num_points)
+            self._positions[stone][:] = range(num_points)
+        self.masks[:] = False
+        self.masks[Stone.BLACK:] = True
+
+        # a lone point has no liberty, so it is evaluated like any other
+        self._dirty = 1 if num_points == 1 else 0
+
+    def is_legal(self, stone, y, x):
+        '''
+        Check if placing `stone` at (y, x) is legal
+        '''
+        self._flush()
+        return self._positions[stone][self._index[y][x]] >= 0
+
+    def legal_mask(self, stone):
+        '''
+        Return the legal-move mask of `stone` as a read-only (board_size, board_size) view
+        '''
+        self._flush()
+        mask = self.masks[stone].reshape(self.board_size, self.board_size)
+        mask.flags.writeable = False
+        return mask
+
+    def num_legal(self, stone):
+        '''
+        Return the number of legal moves of `stone`
+        '''
+        self._flush()
+        return len(self._moves[stone])
+
+    def get_legal_actions(self, stone):
+        '''
+        Return the legal moves of `stone` as (y, x) coordinates
+        '''
+        self._flush()
+        coords = self._coords
+        return [coords[i] for i in self._moves[stone]]
+
+    def sample(self, stone, rng=random, reject=None):
+        '''
+        Return a uniformly random legal move of `stone` as (y, x), or None if there is none.
+        Moves for which `reject(y, x)` is true are swapped behind the candidates still
+        drawn from, so the result stays uniform among the moves that are not rejected,
+        and is None if every legal move is rejected
+        '''
+        self._flush()
+        moves = self._moves[stone]
+        num_moves = len(moves)
+        if not num_moves:
+            return None
+        coords = self._coords
+        if reject is None:
+            return coords[moves[rng.randrange(num_moves)]]
+        positions = self._positions[stone]
+        while num_moves:
+            pos = rng.randrange(num_moves)
+            i = moves[pos]
+            coord = coords[i]
+            if not reject(*coord):
+                return coord
+            # the order of the legal moves is arbitrary, so the rejected move is kept
+            # at the end of the candidates by swapping it with the last one
+            num_moves -= 1
+            last = moves[num_moves]
+            moves[pos], moves[num_moves] = last, i
+            positions[last], positions[i] = pos, num_moves
+        return None
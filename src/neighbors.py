@@ -0,0 +1,98 @@
+import numpy as np
+
+# neighbor tables shared by all boards of the same size
+_NEIGHBOR_TABLES = {}
+
+class NeighborTable(object):
+    '''
+    Precomputed neighbor structure of a square board.
+    Every point has a flat index y * board_size + x. The tables are built once
+    per board size and shared, so they must never be modified.
+    '''
+    def __init__(self, board_size):
+
+        # dimension of the board
+        self.board_size = board_size
+
+        # number of points on the board
+        self.num_points = board_size * board_size
+
+        # (y, x) coordinate of each flat index
+        self.coords = tuple(divmod(i, board_size) for i in range(self.num_points))
+
+        # flat index of each coordinate, indexed as index[y][x]
+        self.index = tuple(tuple(y * board_size + x for x in range(board_size))
+                           for y in range(board_size))
+
+        # index of each coordinate in a buffer padded with a one point border,
+        # indexed as padded_index[y][x]
+        self.padded_index = tuple(tuple((y + 1) * (board_size + 2) + x + 1
+                                        for x in range(board_size))
+                                  for y in range(board_size))
+
+        # neighbor coordinates of each point, indexed as liberty_coords[y][x].
+        # The order is "up", "down", "left", "right"
+        self.liberty_coords = tuple(tuple(self._get_liberty_coords(y, x)
+                                          for x in range(board_size))
+                                    for y in range(board_size))
+
+        # diagonal neighbor coordinates of each point, indexed as diagonal_coords[y][x]
+        self.diagonal_coords = tuple(tuple(tuple((y + dy, x + dx)
+                                                 for dy in (-1, 1) for dx in (-1, 1)
+                                                 if 0 <= y + dy < board_size and
+                                                 0 <= x + dx < board_size)
+                                           for x in range(board_size))
+                                     for y in range(board_size))
+
+        # neighbor flat indices of each point
+        self.neighbor_indices = tuple(tuple(ly * board_size + lx for ly, lx in coords)
+                                      for row in self.liberty_coords
+                                      for coords in row)
+
+        # bitboard of each coordinate, indexed as bits[y][x]
+        self.bits = tuple(tuple(1 << i for i in row) for row in self.index)
+
+        # bitboard of the neighbors of each point, indexed by flat index
+        self.neighbor_bits = tuple(sum(1 << j for j in indices)
+                                   for indices in self.neighbor_indices)
+
+        # bitboard of the whole board
+        self.all_bits = (1 << self.num_points) - 1
+
+        # padded neighbor array of shape (num_points, 4), where -1 marks off-board
+        self.neighbors = np.full((self.num_points, 4), -1, dtype=np.intp)
+        for i, indices in enumerate(self.neighbor_indices):
+            self.neighbors[i, :len(indices)] = indices
+        self.neighbors.flags.writeable = False
+
+        # number of on-board neighbors of each point
+        self.num_neighbors = np.array([len(indices) for indices in self.neighbor_indices],
+                                      dtype=np.intp)
+        self.num_neighbors.flags.writeable = False
+
+    def _get_liberty_coords(self, y, x):
+        '''
+        Return the neighbor coordinates of (y, x) that lie on the board
+        '''
+        coords = []
+        if y > 0:
+            coords.append((y-1, x))
+        if y < self.board_size-1:
+            coords.append((y+1, x))
+        if x > 0:
+            coords.append((y, x-1))
+        if x < self.board_size-1:
+            coords.append((y, x+1))
+        return tuple(coords)
+
+
+def get_neighbor_table(board_size):
+    '''
+    Return the shared neighbor table for the given board size,
+    building it on first use
+    '''
+    table = _NEIGHBOR_TABLES.get(board_size)
+    if table is None:
+        table = NeighborTable(board_size)
+        _NEIGHBOR_TABLES[board_size] = table
+    return table
@@ -0,0 +1,44 @@
+import random
+from src.utils import Stone
+
+class PlayoutPolicy(object):
+    '''
+    Light playout policy: a random legal move that does not fill one of the
+    player's own eyes, or a pass when no such move remains.
+    Moves are drawn from the incrementally maintained legal moves of the game,
+    so a move costs O(1) plus the cheap local eye checks of the rejected points
+    '''
+    def __init__(self, rng=None):
+
+        # random number generator
+        self.rng = rng if rng is not None else random.Random()
+
+    @staticmethod
+    def is_eye(game, stone, y, x):
+        '''
+        Check if the empty point (y, x) is an eye of `stone`: every neighbor is
+        a stone of the same color, and the opponent holds at most one diagonal
+        point in the interior and none on the edge or in a corner
+        '''
+        board = game.board
+        table = board.neighbor_table
+        for ly, lx in table.liberty_coords[y][x]:
+            if board[ly, lx] != stone:
+                return False
+
+        diagonals = table.diagonal_coords[y][x]
+        opposite_stone = Stone.BLACK + Stone.WHITE - stone
+        num_opposite = 0
+        for dy, dx in diagonals:
+            if board[dy, dx] == opposite_stone:
+                num_opposite += 1
+        return num_opposite < (2 if len(diagonals) == 4 else 1)
+
+    def select_move(self, game, stone):
+        '''
+        Return a random legal move of `stone` that does not fill its own eye
+        as (y, x), or None to pass
+        '''
+        is_eye = self.is_eye
+        return game.sample_legal_move(stone, self.rng,
+                                      lambda y, x: is_eye(game, stone, y, x))
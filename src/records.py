@@ -0,0 +1,366 @@
+'''
+Compact binary store of game records with random access.
+
+A store is a directory of three files:
+    moves.bin    every move of every game as a little-endian uint16 code
+    index.bin    a 16-byte header, then one fixed-size entry per game with the
+                 offset and length of its moves, board size, result and player ids
+    players.txt  the player names, the id of a name being its line number
+
+Both binary files are read through numpy.memmap, so the N-th game or the k-th
+position of a game is found from its index entry without reading any other game.
+Records are appended by writing their moves before their index entry, so readers
+never see an entry whose moves are missing.
+
+Usage:
+    python -m src.records from-sgf games/ --output store
+    python -m src.records from-tournament results.jsonl --output store
+    python -m src.records info store
+'''
+import argparse
+import json
+import math
+import os
+import re
+import numpy as np
+from src.utils import Stone
+from src.sgf import GameRecord, iter_records, result_string
+
+# identifies the index file of a store
+MAGIC = b'GORECIDX'
+
+# bytes before the first index entry
+HEADER_SIZE = 16
+
+# codes of a move that is not a stone. A white move has the WHITE_BIT set
+PASS = 0x7FFF
+RESIGN = 0x7FFE
+WHITE_BIT = 0x8000
+
+# player id of an unknown player
+NO_PLAYER = 0xFFFFFFFF
+
+# winner of a game in the index
+UNKNOWN, BLACK_WINS, WHITE_WINS, DRAW = 0, 1, 2, 3
+
+# how a game was won: by points, resignation, time, forfeit or unspecified
+POINTS, RESIGNATION, TIME, FORFEIT, UNSPECIFIED = 0, 1, 2, 3, 4
+
+# index entry of a game. The first `num_setup` moves are setup stones
+INDEX_DTYPE = np.dtype([('offset', '<u8'),
+                        ('length', '<u4'),
+                        ('num_setup', '<u2'),
+                        ('board_size', 'u1'),
+                        ('winner', 'u1'),
+                        ('reason', 'u1'),
+                        ('margin', '<f4'),
+                        ('komi', '<f4'),
+                        ('black', '<u4'),
+                        ('white', '<u4')])
+
+_REASONS = {'R': RESIGNATION, 'RESIGN': RESIGNATION, 'T': TIME, 'TIME': TIME,
+            'F': FORFEIT, 'FORFEIT': FORFEIT, '': UNSPECIFIED}
+
+_REASON_LETTERS = {RESIGNATION: 'R', TIME: 'T', FORFEIT: 'F', UNSPECIFIED: ''}
+
+_RESULT = re.compile(r'([BW])\+(.*)')
+
+def encode_moves(moves, board_size, setup=(), resigned=None):
+    '''
+    Return the uint16 codes of the setup stones followed by the moves, and a
+    resignation of the stone `resigned` if given
+    '''
+    codes = np.empty(len(setup) + len(moves) + (resigned is not None), dtype='<u2')
+    for i, (stone, move) in enumerate(list(setup) + list(moves)):
+        code = PASS if move is None else move[0] * board_size + move[1]
+        codes[i] = code | WHITE_BIT if stone == Stone.WHITE else code
+    if resigned is not None:
+        codes[-1] = RESIGN | WHITE_BIT if resigned == Stone.WHITE else RESIGN
+    return codes
+
+def decode_moves(codes, board_size):
+    '''
+    Return the (stone, (y, x) or None) moves of uint16 codes, up to a resignation
+    '''
+    codes = np.asarray(codes)
+    points = codes & ~np.uint16(WHITE_BIT)
+    resigned = np.flatnonzero(points == RESIGN)
+    if resigned.size:
+        codes = codes[:resigned[0]]
+        points = points[:resigned[0]]
+    stones = np.where(codes & WHITE_BIT, Stone.WHITE, Stone.BLACK).tolist()
+    ys, xs = np.divmod(points, board_size)
+    return [(stone, None if point == PASS else (y, x))
+            for stone, point, y, x in zip(stones, points.tolist(), ys.tolist(), xs.tolist())]
+
+def encode_result(result):
+    '''
+    Return the (winner, reason, margin) of an SGF result. Results that are not a
+    win or a draw, such as 'Void', are unknown
+    '''
+    if result is None:
+        return UNKNOWN, UNSPECIFIED, math.nan
+    result = result.strip().upper()
+    if result in ('0', 'DRAW', 'JIGO'):
+        return DRAW, POINTS, 0.0
+    match = _RESULT.fullmatch(result)
+    if match is None:
+        return UNKNOWN, UNSPECIFIED, math.nan
+    winner = BLACK_WINS if match.group(1) == 'B' else WHITE_WINS
+    how = match.group(2)
+    if how in _REASONS:
+        return winner, _REASONS[how], math.nan
+    try:
+        return winner, POINTS, float(how)
+    except ValueError:
+        return winner, UNSPECIFIED, math.nan
+
+def decode_result(winner, reason, margin):
+    '''
+    Return the SGF result of an index entry, or None if unknown
+    '''
+    if winner == UNKNOWN:
+        return None
+    if winner == DRAW:
+        return '0'
+    letter = 'B' if winner == BLACK_WINS else 'W'
+    if reason == POINTS:
+        return f'{letter}+{margin:g}'
+    return f'{letter}+{_REASON_LETTERS[reason]}'
+
+
+class RecordStore(object):
+    '''
+    Store of game records in a directory, opened for reading with mode 'r', or for
+    reading and appending with mode 'a', which creates the store if needed.
+    Games are numbered in the order they were appended
+    '''
+    def __init__(self, path, mode='r'):
+        if mode not in ('r', 'a'):
+            raise ValueError(f'Invalid mode: {mode!r}')
+
+        # directory of the store
+        self.path = path
+
+        # 'r' to read only, 'a' to also append
+        self.mode = mode
+
+        index_path = os.path.join(path, 'index.bin')
+        if mode == 'a' and not os.path.exists(index_path):
+            os.makedirs(path, exist_ok=True)
+            with open(index_path, 'wb') as f:
+                f.write(MAGIC.ljust(HEADER_SIZE, b'\0'))
+            open(os.path.join(path, 'moves.bin'), 'wb').close()
+            open(os.path.join(path, 'players.txt'), 'w', encoding='utf-8').close()
+        with open(index_path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not a game record store')
+
+        # player names by id, and ids by name
+        with open(os.path.join(path, 'players.txt'), encoding='utf-8') as f:
+            self.players = f.read().splitlines()
+        self._player_ids = {name: i for i, name in enumerate(self.players)}
+
+        # memory maps of the index entries and move codes, remapped after appends
+        self._index = None
+        self._moves = None
+
+        # files appended to in mode 'a'
+        self._files = None
+        if mode == 'a':
+            self._files = {name: open(os.path.join(path, name), 'ab')
+                           for name in ('moves.bin', 'index.bin', 'players.txt')}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        '''
+        Close the files appended to and drop the memory maps
+        '''
+        if self._files is not None:
+            for f in self._files.values():
+                f.close()
+            self._files = None
+        self._index = None
+        self._moves = None
+
+    def _map(self, name, dtype, offset=0):
+        '''
+        Return a read-only memory map of a file of the store, or an empty array
+        '''
+        path = os.path.join(self.path, name)
+        count = (os.path.getsize(path) - offset) // dtype.itemsize
+        if count <= 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+
+    @property
+    def index(self):
+        '''
+        Return the index entries of the games as a structured array of INDEX_DTYPE
+        '''
+        if self._index is None:
+            self._index = self._map('index.bin', INDEX_DTYPE, HEADER_SIZE)
+        return self._index
+
+    @property
+    def codes(self):
+        '''
+        Return the move codes of every game, one after the other
+        '''
+        if self._moves is None:
+            self._moves = self._map('moves.bin', np.dtype('<u2'))
+        return self._moves
+
+    def __len__(self):
+        return len(self.index)
+
+    def game_codes(self, n):
+        '''
+        Return the codes of the setup stones and moves of game `n` without copying them
+        '''
+        entry = self.index[n]
+        offset = int(entry['offset'])
+        return self.codes[offset:offset + int(entry['length'])]
+
+    def __getitem__(self, n):
+        '''
+        Return the GameRecord of game `n`
+        '''
+        entry = self.index[n]
+        board_size = int(entry['board_size'])
+        moves = decode_moves(self.game_codes(n), board_size)
+        num_setup = int(entry['num_setup'])
+        komi = float(entry['komi'])
+        player = lambda i: None if i == NO_PLAYER else self.players[i]
+        return GameRecord(board_size, moves[num_setup:],
+                          decode_result(int(entry['winner']), int(entry['reason']),
+                                        float(entry['margin'])),
+                          player(int(entry['black'])), player(int(entry['white'])),
+                          None if math.isnan(komi) else komi, moves[:num_setup])
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self[n]
+
+    def position(self, n, k, game):
+        '''
+        Replay the setup stones and the first `k` moves of game `n` on `game`, which
+        must have the board size of the game. Return the number of moves played
+        '''
+        entry = self.index[n]
+        board_size = int(entry['board_size'])
+        num_setup = int(entry['num_setup'])
+        codes = self.game_codes(n)[:num_setup + k]
+        record = GameRecord(board_size, setup=decode_moves(codes[:num_setup], board_size))
+        record.moves = decode_moves(codes[num_setup:], board_size)
+        return record.replay(game)
+
+    def _player_id(self, name):
+        if name is None:
+            return NO_PLAYER
+        name = ' '.join(str(name).splitlines())
+        player_id = self._player_ids.get(name)
+        if player_id is None:
+            player_id = self._player_ids[name] = len(self.players)
+            self.players.append(name)
+            self._files['players.txt'].write((name + '\n').encode('utf-8'))
+        return player_id
+
+    def append(self, record):
+        '''
+        Append a GameRecord. Return its game number
+        '''
+        if self._files is None:
+            raise ValueError('The store is not open for appending')
+        winner, reason, margin = encode_result(record.result)
+        resigned = None
+        if reason == RESIGNATION:
+            resigned = Stone.WHITE if winner == BLACK_WINS else Stone.BLACK
+        codes = encode_moves(record.moves, record.board_size, record.setup, resigned)
+
+        moves_file = self._files['moves.bin']
+        index_file = self._files['index.bin']
+        moves_file.seek(0, os.SEEK_END)
+        offset = moves_file.tell() // 2
+        entry = np.zeros(1, dtype=INDEX_DTYPE)
+        entry[0] = (offset, len(codes), len(record.setup), record.board_size, winner, reason,
+                    margin, math.nan if record.komi is None else record.komi,
+                    self._player_id(record.black), self._player_id(record.white))
+        self._files['players.txt'].flush()
+        moves_file.write(codes.tobytes())
+        moves_file.flush()
+        index_file.seek(0, os.SEEK_END)
+        n = (index_file.tell() - HEADER_SIZE) // INDEX_DTYPE.itemsize
+        index_file.write(entry.tobytes())
+        index_file.flush()
+
+        self._index = None
+        self._moves = None
+        return n
+
+    def extend(self, records):
+        '''
+        Append every GameRecord. Return the number appended
+        '''
+        count = 0
+        for record in records:
+            self.append(record)
+            count += 1
+        return count
+
+
+def tournament_record(result):
+    '''
+    Return the GameRecord of a result written by the tournament runner
+    '''
+    board_size = result['board_size']
+    scores = {Stone.BLACK: result['scores']['black'], Stone.WHITE: result['scores']['white']}
+    return GameRecord(board_size, decode_moves(np.array(result['sequence'], dtype='<u2'),
+                                               board_size),
+                      result_string(scores), result['black'], result['white'])
+
+def iter_tournament(path):
+    '''
+    Yield the GameRecords of a JSONL file of tournament results
+    '''
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield tournament_record(json.loads(line))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert game records to a binary store')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    from_sgf = subparsers.add_parser('from-sgf', help='append SGF files or directories')
+    from_sgf.add_argument('paths', nargs='+')
+    from_sgf.add_argument('--output', required=True, help='store directory')
+    from_tournament = subparsers.add_parser('from-tournament',
+                                            help='append JSONL tournament results')
+    from_tournament.add_argument('paths', nargs='+')
+    from_tournament.add_argument('--output', required=True, help='store directory')
+    info = subparsers.add_parser('info', help='describe a store')
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        with RecordStore(args.path) as store:
+            index = store.index
+            print(f'{len(store)} games, {len(store.codes)} moves, {len(store.players)} players')
+            for board_size, count in zip(*np.unique(index['board_size'], return_counts=True)):
+                print(f'{board_size}x{board_size}: {count} games')
+        return
+
+    with RecordStore(args.output, 'a') as store:
+        if args.command == 'from-sgf':
+            count = store.extend(iter_records(args.paths))
+        else:
+            count = sum(store.extend(iter_tournament(path)) for path in args.paths)
+    print(f'Appended {count} games to {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import numpy as np
+from src.utils import Stone
+
+def _neighbor_views(padded):
+    '''
+    Return the "up", "down", "left", "right" neighbor views of a stack of boards
+    padded by one point on each side of the last two axes
+    '''
+    return (padded[:, :-2, 1:-1], padded[:, 2:, 1:-1],
+            padded[:, 1:-1, :-2], padded[:, 1:-1, 2:])
+
+def touches(region, mask):
+    '''
+    Return where points of `region` have at least one neighbor in `mask`.
+    Both are boolean stacks of shape (N, S, S)
+    '''
+    padded = np.pad(mask, ((0, 0), (1, 1), (1, 1)))
+    up, down, left, right = _neighbor_views(padded)
+    return region & (up | down | left | right)
+
+def label_components(mask):
+    '''
+    Label the connected components of a boolean stack of shape (N, S, S).
+    Every point of a component is labelled with the smallest flat index of
+    that component over the whole stack, and points outside the mask with -1.
+    Components are found by hooking the roots of adjacent points onto the
+    smaller root and then pointer jumping, until no adjacent points differ
+    '''
+    mask = np.asarray(mask, dtype=bool)
+    index = np.arange(mask.size).reshape(mask.shape)
+
+    # pairs of adjacent points that are both in the mask
+    horizontal = mask[:, :, :-1] & mask[:, :, 1:]
+    vertical = mask[:, :-1, :] & mask[:, 1:, :]
+    a = np.concatenate((index[:, :, :-1][horizontal], index[:, :-1, :][vertical]))
+    b = np.concatenate((index[:, :, 1:][horizontal], index[:, 1:, :][vertical]))
+
+    index = index.ravel()
+    parent = index.copy()
+    while True:
+        root_a = parent[a]
+        root_b = parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            break
+
+        # only pairs whose roots differ can still merge components
+        a, b = a[differ], b[differ]
+        root_a, root_b = root_a[differ], root_b[differ]
+        parent[np.maximum(root_a, root_b)] = np.minimum(root_a, root_b)
+
+        # point every hooked index directly at its root
+        nodes = np.flatnonzero(parent != index)
+        while True:
+            grandparent = parent[parent[nodes]]
+            changed = grandparent != parent[nodes]
+            if not changed.any():
+                break
+            parent[nodes] = grandparent
+            nodes = nodes[changed]
+
+    return np.where(mask, parent.reshape(mask.shape), -1)
+
+def score_boards(boards, num_black_captured=0, num_white_captured=0):
+    '''
+    Return the black and white scores of a stack of boards of shape (N, S, S),
+    as two integer arrays of length N. A single (S, S) board is also accepted.
+    Scoring is counted based on territorial rules, with no interpolation of dead/alive groups.
+    An empty region is a territory for a player if it only reaches stones of that player.
+    The number of captured stones of each color, per board or for all boards,
+    is subtracted from that color's score
+    '''
+    boards = np.asarray(boards)
+    if boards.ndim == 2:
+        boards = boards[None]
+    num_boards, board_size = boards.shape[:2]
+
+    empty = boards == Stone.EMPTY
+    labels = label_components(empty)
+    region_labels = labels[empty]
+    touches_black = touches(empty, boards == Stone.BLACK)[empty]
+    touches_white = touches(empty, boards == Stone.WHITE)[empty]
+
+    # each region is identified by its label, which lies within the board of the region
+    num_points = boards.size
+    region_size = np.bincount(region_labels, minlength=num_points)
+    region_black = np.bincount(region_labels, weights=touches_black, minlength=num_points) > 0
+    region_white = np.bincount(region_labels, weights=touches_white, minlength=num_points) > 0
+    region_board = np.arange(num_points) // (board_size * board_size)
+
+    black_territory = np.where(region_black & ~region_white, region_size, 0)
+    white_territory = np.where(region_white & ~region_black, region_size, 0)
+    black_scores = np.bincount(region_board, weights=black_territory, minlength=num_boards)
+    white_scores = np.bincount(region_board, weights=white_territory, minlength=num_boards)
+
+    black_scores = black_scores.astype(np.int64) - num_black_captured
+    white_scores = white_scores.astype(np.int64) - num_white_captured
+    return black_scores, white_scores
+
+def score_games(games):
+    '''
+    Score a list of games of the same board size in one call.
+    Return a list of score dictionaries as given by Game.get_scores
+    '''
+    if not games:
+        return []
+    boards = np.stack([np.asarray(game.board) for game in games])
+    num_black_captured = np.array([game.num_black_captured for game in games])
+    num_white_captured = np.array([game.num_white_captured for game in games])
+    black_scores, white_scores = score_boards(boards, num_black_captured, num_white_captured)
+    return [{Stone.BLACK: int(black), Stone.WHITE: int(white)}
+            for black, white in zip(black_scores, white_scores)]
@@ -0,0 +1,415 @@
+'''
+Reading and writing games in the Smart Game Format (SGF), and bulk replay of
+game collections.
+
+Only the main line of a record is read: variations after the first one are
+skipped. Board size (SZ), setup stones (AB, AW), moves and passes (B, W),
+the result (RE), komi (KM) and the player names (PB, PW) are kept.
+
+Replaying streams the records of files, directories of .sgf files or files of
+concatenated records through one Game per board size, which is reset between
+records instead of allocated again. Files are read in chunks and split into game
+trees as they are read, so only the tree being parsed is held in memory.
+
+Usage:
+    python -m src.sgf games/ more_games.sgf --config config.yaml
+'''
+import argparse
+import os
+import re
+import time
+import yaml
+from src.utils import Stone, MoveStatus, get_opposite_stone
+from src.exceptions import SGFException
+
+# property name followed by one or more bracketed values
+_PROPERTY = re.compile(r'([A-Za-z]+)\s*((?:\[(?:[^\]\\]|\\.)*\]\s*)+)', re.S)
+
+# one bracketed value
+_VALUE = re.compile(r'\[((?:[^\]\\]|\\.)*)\]', re.S)
+
+# escaped character or soft line break of a text value
+_ESCAPE = re.compile(r'\\(\r\n|\n\r|\n|\r|.)', re.S)
+
+# text up to the next parenthesis opening or closing a game tree, skipping whole property values
+_TREE_TEXT = re.compile(r'(?:[^()\[]+|\[(?:[^\]\\]|\\.)*\])*', re.S)
+
+# text up to the next parenthesis between game trees, where brackets have no meaning
+_BETWEEN_TREES = re.compile(r'[^()]*')
+
+# characters read at a time when streaming the records of a file
+CHUNK_SIZE = 1 << 20
+
+# letters of the coordinates 0 to 51
+_LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+_LETTER_INDEX = {letter: i for i, letter in enumerate(_LETTERS)}
+
+def result_string(scores):
+    '''
+    Return the SGF result of final scores, such as 'B+3', 'W+0.5' or '0' for a tie
+    '''
+    margin = scores[Stone.BLACK] - scores[Stone.WHITE]
+    if margin == 0:
+        return '0'
+    return f'{"B" if margin > 0 else "W"}+{abs(margin):g}'
+
+def _unescape(value):
+    return _ESCAPE.sub(lambda m: '' if m.group(1) in ('\n', '\r', '\r\n', '\n\r') else m.group(1),
+                       value)
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace(']', '\\]')
+
+def _point(value, board_size):
+    '''
+    Return the (y, x) coordinate of an SGF point, or None for a pass
+    '''
+    if value == '' or (value == 'tt' and board_size <= 19):
+        return None
+    if len(value) != 2 or value[0] not in _LETTER_INDEX or value[1] not in _LETTER_INDEX:
+        raise SGFException(f'Invalid point: {value!r}')
+    x, y = _LETTER_INDEX[value[0]], _LETTER_INDEX[value[1]]
+    if x >= board_size or y >= board_size:
+        raise SGFException(f'Point {value!r} is outside the {board_size}x{board_size} board')
+    return y, x
+
+def _points(values, board_size):
+    '''
+    Return the coordinates of a list of points, expanding compressed 'aa:cc' rectangles
+    '''
+    coords = []
+    for value in values:
+        if ':' in value:
+            (y1, x1), (y2, x2) = (_point(corner, board_size) for corner in value.split(':'))
+            coords.extend((y, x) for y in range(min(y1, y2), max(y1, y2) + 1)
+                          for x in range(min(x1, x2), max(x1, x2) + 1))
+        else:
+            coords.append(_point(value, board_size))
+    return coords
+
+def _sgf_point(move):
+    y, x = move
+    return _LETTERS[x] + _LETTERS[y]
+
+
+class GameRecord(object):
+    '''
+    Record of one game: the board size, the setup stones, every move and the result.
+    Moves are (stone, (y, x)) pairs, with None instead of (y, x) for a pass
+    '''
+    def __init__(self, board_size, moves=None, result=None, black=None, white=None,
+                 komi=None, setup=None):
+
+        # dimension of the board
+        self.board_size = board_size
+
+        # (stone, (y, x) or None) of every move in order
+        self.moves = moves if moves is not None else []
+
+        # SGF result such as 'B+3', 'W+R' or '0', or None if unknown
+        self.result = result
+
+        # names of the players
+        self.black = black
+        self.white = white
+
+        # komi, or None if not given
+        self.komi = komi
+
+        # (stone, (y, x)) of the stones placed before the first move, such as handicap stones
+        self.setup = setup if setup is not None else []
+
+    def __eq__(self, other):
+        return isinstance(other, GameRecord) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return (f'GameRecord(board_size={self.board_size}, moves={len(self.moves)}, '
+                f'result={self.result!r})')
+
+    @classmethod
+    def from_game(cls, game, result=None, black=None, white=None):
+        '''
+        Return the record of the moves of a game. Passes recorded without a
+        stone are attributed to the player whose turn it was
+        '''
+        moves = []
+        stone = Stone.WHITE
+        for move_stone, move in game.moves:
+            stone = move_stone if move_stone is not None else get_opposite_stone(stone)
+            moves.append((stone, move))
+        return cls(game.board_size, moves, result, black, white)
+
+    def to_sgf(self):
+        '''
+        Return the record as SGF text
+        '''
+        root = [f'GM[1]FF[4]CA[UTF-8]SZ[{self.board_size}]']
+        if self.komi is not None:
+            root.append(f'KM[{self.komi:g}]')
+        for name, value in (('PB', self.black), ('PW', self.white), ('RE', self.result)):
+            if value is not None:
+                root.append(f'{name}[{_escape(str(value))}]')
+        for stone, name in ((Stone.BLACK, 'AB'), (Stone.WHITE, 'AW')):
+            points = [_sgf_point(move) for setup_stone, move in self.setup if setup_stone == stone]
+            if points:
+                root.append(name + ''.join(f'[{point}]' for point in points))
+
+        nodes = [''.join(root)]
+        for stone, move in self.moves:
+            color = 'B' if stone == Stone.BLACK else 'W'
+            nodes.append(f'{color}[{"" if move is None else _sgf_point(move)}]')
+        return '(;' + ';'.join(nodes) + ')\n'
+
+    def replay(self, game):
+        '''
+        Reset `game`, which must have the board size of the record, and play the
+        record on it. Return the number of moves played, which is less than the
+        number of moves of the record if one of them is illegal
+        '''
+        if game.board_size != self.board_size:
+            raise ValueError(f'Cannot replay a {self.board_size}x{self.board_size} record '
+                             f'on a {game.board_size}x{game.board_size} board')
+        game.reset()
+        for stone, (y, x) in self.setup:
+            if game.try_play(stone, y, x) != MoveStatus.OK:
+                raise SGFException(f'Setup stone at {(y, x)} cannot be placed')
+        game.moves = []
+        return game.replay(self.moves)
+
+
+def _skip_tree(text, pos):
+    '''
+    Return the position after the game tree starting with the '(' at `pos`
+    '''
+    depth = 0
+    n = len(text)
+    while pos < n:
+        c = text[pos]
+        if c == '[':
+            match = _VALUE.match(text, pos)
+            if match is None:
+                raise SGFException('Unterminated property value')
+            pos = match.end()
+            continue
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    raise SGFException('Unterminated game tree')
+
+def _make_record(nodes):
+    '''
+    Return the record of the properties of the main line nodes of a game tree
+    '''
+    root = nodes[0] if nodes else {}
+    size = root.get('SZ', ['19'])[0]
+    try:
+        board_size = int(size.split(':')[0])
+    except ValueError:
+        raise SGFException(f'Invalid board size: {size!r}')
+
+    komi = root.get('KM')
+    try:
+        komi = float(komi[0]) if komi and komi[0].strip() else None
+    except ValueError:
+        komi = None
+    text = lambda name: _unescape(root[name][0]) if name in root else None
+    record = GameRecord(board_size, result=text('RE'), black=text('PB'), white=text('PW'),
+                        komi=komi)
+
+    for node in nodes:
+        for name, stone in (('AB', Stone.BLACK), ('AW', Stone.WHITE)):
+            if name in node:
+                if record.moves:
+                    raise SGFException('Setup stones after the first move are not supported')
+                record.setup.extend((stone, coord) for coord in _points(node[name], board_size))
+        for name, stone in (('B', Stone.BLACK), ('W', Stone.WHITE)):
+            if name in node:
+                record.moves.append((stone, _point(node[name][0], board_size)))
+    return record
+
+def iter_sgf(text):
+    '''
+    Yield the GameRecord of every game tree of SGF text, in order
+    '''
+    pos = 0
+    n = len(text)
+
+    # whether each open game tree already had its first variation, outermost first
+    variations = []
+    nodes = []
+    while pos < n:
+        c = text[pos]
+        if c == '(':
+            if variations and variations[-1]:
+                pos = _skip_tree(text, pos)
+                continue
+            if not variations:
+                nodes = []
+            variations.append(False)
+            pos += 1
+        elif c == ')':
+            if not variations:
+                raise SGFException('Unbalanced parenthesis')
+            variations.pop()
+            if variations:
+                variations[-1] = True
+            else:
+                yield _make_record(nodes)
+            pos += 1
+        elif c == ';' and variations:
+            pos += 1
+            node = {}
+            while True:
+                match = _PROPERTY.match(text, pos)
+                if match is None:
+                    break
+                node[match.group(1)] = _VALUE.findall(match.group(2))
+                pos = match.end()
+                while pos < n and text[pos].isspace():
+                    pos += 1
+            nodes.append(node)
+        elif c.isspace() or not variations:
+            pos += 1
+        else:
+            raise SGFException(f'Unexpected {c!r} at position {pos}')
+    if variations:
+        raise SGFException('Unterminated game tree')
+
+def iter_trees(chunks):
+    '''
+    Yield the text of every top-level game tree of SGF text given as an iterable of
+    chunks, which may split the text anywhere. Only the text of the tree being read
+    is kept, and text between trees is skipped
+    '''
+    buffer = ''
+    # position scanned up to, and start of the open game tree
+    pos = 0
+    start = 0
+    depth = 0
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            i = (_TREE_TEXT if depth else _BETWEEN_TREES).match(buffer, pos).end()
+            if i == len(buffer) or buffer[i] == '[':
+                # the text, or a property value, continues in a later chunk
+                pos = i
+                break
+            pos = i + 1
+            if buffer[i] == '(':
+                if depth == 0:
+                    start = i
+                depth += 1
+            else:
+                if depth == 0:
+                    raise SGFException('Unbalanced parenthesis')
+                depth -= 1
+                if depth == 0:
+                    yield buffer[start:pos]
+        # drop the text of the trees already yielded
+        cut = start if depth else pos
+        buffer = buffer[cut:]
+        pos -= cut
+        start = 0
+    if depth:
+        raise SGFException('Unterminated game tree')
+
+def parse_sgf(text):
+    '''
+    Return the GameRecords of every game tree of SGF text
+    '''
+    return list(iter_sgf(text))
+
+def read_sgf(path):
+    '''
+    Return the GameRecords of an SGF file
+    '''
+    with open(path, 'rb') as f:
+        return parse_sgf(f.read().decode('utf-8', errors='replace'))
+
+def write_sgf(path, records, append=False):
+    '''
+    Write GameRecords to an SGF file, one game tree after another
+    '''
+    with open(path, 'a' if append else 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(record.to_sgf())
+
+def iter_paths(paths):
+    '''
+    Yield the files of the given paths, with the .sgf files of directories in sorted order
+    '''
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, files in os.walk(path):
+                subdirectories.sort()
+                for name in sorted(files):
+                    if name.lower().endswith('.sgf'):
+                        yield os.path.join(directory, name)
+        else:
+            yield path
+
+def iter_records(paths, chunk_size=CHUNK_SIZE):
+    '''
+    Yield the GameRecords of files, directories of .sgf files and files of concatenated
+    records. Files are read `chunk_size` characters at a time, one game tree after another
+    '''
+    for path in iter_paths(paths):
+        with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            for tree in iter_trees(iter(lambda: f.read(chunk_size), '')):
+                yield from iter_sgf(tree)
+
+def replay_records(records, config):
+    '''
+    Replay every record on one reused Game per board size, created from `config`.
+    Return the numbers of games, of invalid games, which stop at an illegal move or
+    cannot be set up, and of positions reached, the seconds taken and the rates.
+    Records given lazily, as by iter_records, are read within the measured time
+    '''
+    from src.game import Game
+    games = {}
+    num_games = 0
+    num_invalid = 0
+    num_positions = 0
+    start = time.perf_counter()
+    for record in records:
+        num_games += 1
+        game = games.get(record.board_size)
+        if game is None:
+            game = games[record.board_size] = Game(dict(config, board_size=record.board_size))
+        try:
+            num_moves = record.replay(game)
+        except SGFException:
+            num_invalid += 1
+            continue
+        num_positions += num_moves
+        if num_moves < len(record.moves):
+            num_invalid += 1
+    seconds = time.perf_counter() - start
+    return {'games': num_games,
+            'invalid': num_invalid,
+            'positions': num_positions,
+            'seconds': seconds,
+            'games_per_second': num_games / seconds if seconds > 0 else 0.0,
+            'positions_per_second': num_positions / seconds if seconds > 0 else 0.0}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay SGF game records and check their moves')
+    parser.add_argument('paths', nargs='+', help='SGF files or directories of .sgf files')
+    parser.add_argument('--config', default='config.yaml', help='game configuration file')
+    args = parser.parse_args(argv)
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    stats = replay_records(iter_records(args.paths), config)
+    print(f'Replayed {stats["games"]} games ({stats["invalid"]} invalid) and '
+          f'{stats["positions"]} positions in {stats["seconds"]:.2f}s')
+    print(f'{stats["games_per_second"]:.1f} games/s, '
+          f'{stats["positions_per_second"]:.1f} positions/s')
+
+if __name__ == '__main__':
+    main()
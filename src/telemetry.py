@@ -0,0 +1,97 @@
+import math
+
+# smallest latency told apart, in seconds. Shorter ones fall in the first bucket
+MIN_LATENCY = 1e-6
+
+# ratio between the bounds of consecutive buckets, so quantiles are within about 9%
+BUCKET_RATIO = 2 ** (1 / 8)
+
+_LOG_RATIO = math.log(BUCKET_RATIO)
+
+class LatencyHistogram(object):
+    '''
+    Streaming histogram of latencies in seconds, with logarithmic buckets.
+    Adding a sample is O(1) and the memory only grows with the range of the samples.
+    Histograms of several games or processes are combined with merge, and turned
+    to and from JSON-serializable dictionaries with to_dict and from_dict
+    '''
+    def __init__(self):
+
+        # number of samples by bucket index
+        self.buckets = {}
+
+        # number of samples, their sum and the largest one
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        '''
+        Record one latency
+        '''
+        index = 0
+        if seconds > MIN_LATENCY:
+            index = int(math.log(seconds / MIN_LATENCY) / _LOG_RATIO) + 1
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        '''
+        Add the samples of another histogram to this one. Return this histogram
+        '''
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        '''
+        Return the latency under which a fraction `q` of the samples fall, as the
+        upper bound of its bucket, or 0 without samples
+        '''
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(MIN_LATENCY * BUCKET_RATIO ** index, self.max)
+        return self.max
+
+    def summary(self):
+        '''
+        Return the count, mean, median, 95th and 99th percentiles and maximum in seconds
+        '''
+        return {'count': self.count,
+                'mean': self.total / self.count if self.count else 0.0,
+                'p50': self.quantile(0.5),
+                'p95': self.quantile(0.95),
+                'p99': self.quantile(0.99),
+                'max': self.max}
+
+    def to_dict(self):
+        '''
+        Return the histogram as a JSON-serializable dictionary
+        '''
+        return {'count': self.count,
+                'total': self.total,
+                'max': self.max,
+                'buckets': {str(index): count for index, count in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        '''
+        Return the histogram of a dictionary made by to_dict
+        '''
+        histogram = cls()
+        histogram.buckets = {int(index): count for index, count in data['buckets'].items()}
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.max = data['max']
+        return histogram
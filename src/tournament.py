@@ -0,0 +1,189 @@
+'''
+Headless self-play tournament between registered players.
+
+Games are spread over a process pool and every result is appended to a JSONL
+file as soon as the game finishes. Each game gets a seed derived from the
+tournament seed and the game index, so a tournament replays identically
+regardless of the number of workers.
+
+Usage:
+    python -m src.tournament "AI 2" "AI 2" --games 1000 --workers 8 --output results.jsonl
+'''
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import yaml
+from src.game import GameUI, AI_PLAYERS
+from src.utils import Stone
+from src import instrument
+from src.telemetry import LatencyHistogram
+from src.records import RecordStore, encode_moves, tournament_record
+
+def game_seed(seed, index):
+    '''
+    Return the seed of the game with the given index in a tournament
+    '''
+    return random.Random(f'{seed}-{index}').getrandbits(63)
+
+def play_game(config, black, white, index, seed, instrumented=False):
+    '''
+    Play one headless game and return its result as a JSON-serializable dictionary,
+    with its moves as the codes of src.records in 'sequence'.
+    With `instrumented`, the result includes the engine counters of the game
+    '''
+    # players stay quiet in headless games
+    config = dict(config, seed=seed, mcts_verbose=False)
+    start = time.perf_counter()
+    if instrumented:
+        with instrument.instrumented():
+            ui = GameUI(config, black, white, render=False)
+            scores = ui.play()
+    else:
+        ui = GameUI(config, black, white, render=False)
+        scores = ui.play()
+    wall_time = time.perf_counter() - start
+
+    black_score = scores[Stone.BLACK]
+    white_score = scores[Stone.WHITE]
+    if black_score == white_score:
+        result = 'tie'
+    else:
+        result = 'black' if black_score > white_score else 'white'
+    result = {'game': index,
+              'seed': seed,
+              'black': black,
+              'white': white,
+              'result': result,
+              'scores': {'black': black_score, 'white': white_score},
+              'moves': ui.num_moves,
+              'board_size': ui.game.board_size,
+              'sequence': encode_moves(ui.record().moves, ui.game.board_size).tolist(),
+              'wall_time': wall_time,
+              'telemetry': ui.telemetry()}
+    if instrumented:
+        result['instrumentation'] = instrument.snapshot()
+    return result
+
+def aggregate_telemetry(results, players=None):
+    '''
+    Combine the per-move latencies of the players over the results of many games.
+    Return the think and apply histograms and the number of deadline misses by player name,
+    added to those of `players` if given
+    '''
+    players = {} if players is None else players
+    for result in results:
+        for color in ('black', 'white'):
+            telemetry = result['telemetry'][color]
+            player = players.setdefault(telemetry['player'], {'think': LatencyHistogram(),
+                                                              'apply': LatencyHistogram(),
+                                                              'timeouts': 0})
+            player['think'].merge(LatencyHistogram.from_dict(telemetry['think']))
+            player['apply'].merge(LatencyHistogram.from_dict(telemetry['apply']))
+            player['timeouts'] += telemetry['timeouts']
+    return players
+
+def run_tournament(config, player1, player2, num_games, output, workers=None, seed=0,
+                   alternate=True, instrumented=False, telemetry=None, records=None):
+    '''
+    Play `num_games` games between two players and append their results to `output`.
+    With `alternate`, the players swap colors every other game. With `instrumented`,
+    every result includes the engine counters of its game. The latencies of the
+    players are aggregated into the `telemetry` dictionary if given, as by aggregate_telemetry.
+    With `records`, the directory of a RecordStore, every game is also appended to it.
+    A single worker plays in this process. Return the number of wins of each player
+    and of ties
+    '''
+    wins = {player1: 0, player2: 0, 'tie': 0}
+    if player1 == player2:
+        wins = {player1: 0, 'tie': 0}
+
+    def games():
+        for index in range(num_games):
+            black, white = player1, player2
+            if alternate and index % 2 == 1:
+                black, white = white, black
+            yield config, black, white, index, game_seed(seed, index), instrumented
+
+    store = None if records is None else RecordStore(records, 'a')
+
+    def record(f, result):
+        f.write(json.dumps(result) + '\n')
+        f.flush()
+        if store is not None:
+            store.append(tournament_record(result))
+        winner = 'tie' if result['result'] == 'tie' else result[result['result']]
+        wins[winner] += 1
+        if telemetry is not None:
+            aggregate_telemetry([result], telemetry)
+
+    try:
+        with open(output, 'a') as f:
+            if workers == 1:
+                for args in games():
+                    record(f, play_game(*args))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(play_game, *args) for args in games()]
+                    for future in as_completed(futures):
+                        record(f, future.result())
+    finally:
+        if store is not None:
+            store.close()
+    return wins
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play a headless tournament between two players')
+    parser.add_argument('player1', choices=list(AI_PLAYERS))
+    parser.add_argument('player2', choices=list(AI_PLAYERS))
+    parser.add_argument('--games', type=int, default=100, help='number of games to play')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='number of worker processes')
+    parser.add_argument('--seed', type=int, default=0, help='tournament seed')
+    parser.add_argument('--output', default='tournament.jsonl',
+                        help='JSONL file the results are appended to')
+    parser.add_argument('--config', default='config.yaml', help='game configuration file')
+    parser.add_argument('--board-size', type=int, help='override the board size of the config')
+    parser.add_argument('--max-moves', type=int,
+                        help='end games after this many moves (default: 3 per point)')
+    parser.add_argument('--no-alternate', action='store_true',
+                        help='keep player1 as black in every game')
+    parser.add_argument('--move-deadline', type=float,
+                        help='seconds an AI may take per move before it passes instead')
+    parser.add_argument('--records', help='game record store directory the games are appended to')
+    parser.add_argument('--instrument', action='store_true',
+                        help='record engine call counts and times of every game')
+    args = parser.parse_args(argv)
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    if args.board_size is not None:
+        config['board_size'] = args.board_size
+    max_moves = args.max_moves or config.get('max_moves') or 3 * config['board_size'] ** 2
+    config['max_moves'] = max_moves
+    if args.move_deadline is not None:
+        config['move_deadline'] = args.move_deadline
+
+    start = time.perf_counter()
+    telemetry = {}
+    wins = run_tournament(config, args.player1, args.player2, args.games, args.output,
+                          workers=args.workers, seed=args.seed,
+                          alternate=not args.no_alternate, instrumented=args.instrument,
+                          telemetry=telemetry, records=args.records)
+    elapsed = time.perf_counter() - start
+    print(f'Played {args.games} games in {elapsed:.1f}s')
+    for player, count in wins.items():
+        print(f'{player}: {count}')
+
+    print(f'\n{"player":>8} {"moves":>7} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+          f'{"max ms":>8} {"timeouts":>8}')
+    for player, latencies in telemetry.items():
+        think = latencies['think'].summary()
+        print(f'{player:>8} {think["count"]:>7} {think["p50"] * 1e3:>8.2f} '
+              f'{think["p95"] * 1e3:>8.2f} {think["p99"] * 1e3:>8.2f} '
+              f'{think["max"] * 1e3:>8.2f} {latencies["timeouts"]:>8}')
+
+if __name__ == '__main__':
+    main()
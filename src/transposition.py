@@ -0,0 +1,168 @@
+import struct
+from multiprocessing import shared_memory
+import numpy as np
+from src.utils import Stone
+
+# identifies a shared memory segment holding a transposition table
+MAGIC = 0x54524E53504F5331
+
+# key mixed into the position hash when white is to move, so both sides get their own records
+WHITE_TO_MOVE = 0x9E3779B97F4A7C15
+
+# number of consecutive slots a key may occupy
+BUCKET_SIZE = 4
+
+# move of a record without a best move, and of passing
+NO_MOVE = -2
+PASS = -1
+
+# tables attached by each process, by segment name
+_ATTACHED = {}
+
+def table_key(position_hash, stone):
+    '''
+    Return the key of a position with `stone` to move
+    '''
+    return position_hash ^ WHITE_TO_MOVE if stone == Stone.WHITE else position_hash
+
+def _float_bits(value):
+    return struct.unpack('<Q', struct.pack('<d', value))[0]
+
+def _bits_float(bits):
+    return struct.unpack('<d', struct.pack('<Q', bits))[0]
+
+
+class TranspositionTable(object):
+    '''
+    Fixed-size table of (visits, value, best move) records by position key, stored
+    in a multiprocessing shared memory segment that worker processes attach to by name.
+
+    Records are open-addressed in buckets of BUCKET_SIZE slots. A store updates the
+    record of its key if it has at least as many visits, or else replaces the empty
+    or least visited slot of the bucket. There are no locks: every record holds the
+    XOR of its key and fields, written last, so a record torn by concurrent writers
+    reads as a miss. The records last as long as the segment, until it is unlinked
+    '''
+    def __init__(self, shm, owner):
+
+        # the shared memory segment
+        self.shm = shm
+
+        # whether this process created the segment and unlinks it on close
+        self.owner = owner
+
+        header = np.ndarray(2, dtype=np.uint64, buffer=shm.buf)
+        if int(header[0]) != MAGIC:
+            raise ValueError(f'{shm.name} is not a transposition table')
+
+        # number of slots
+        self.num_entries = int(header[1])
+
+        # slots as (check, visits, value bits, move) words. check is the XOR of the key and the others
+        self._words = np.ndarray((self.num_entries, 4), dtype=np.uint64, buffer=shm.buf, offset=16)
+
+        # lookups, lookups found and records written by this process
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    @classmethod
+    def create(cls, num_entries, name=None):
+        '''
+        Create a table of `num_entries` slots in a new shared memory segment
+        '''
+        shm = shared_memory.SharedMemory(name=name, create=True, size=16 + 32 * num_entries)
+        header = np.ndarray(2, dtype=np.uint64, buffer=shm.buf)
+        header[:] = (MAGIC, num_entries)
+        np.ndarray(4 * num_entries, dtype=np.uint64, buffer=shm.buf, offset=16)[:] = 0
+        del header
+        table = _ATTACHED[shm.name] = cls(shm, owner=True)
+        return table
+
+    @classmethod
+    def attach(cls, name):
+        '''
+        Attach to the table of an existing segment. Each process attaches once,
+        and the table stays attached for the life of the process.
+        Worker processes started by multiprocessing share the resource tracker
+        of their parent, so the segment is only unlinked by its creator
+        '''
+        table = _ATTACHED.get(name)
+        if table is None:
+            table = _ATTACHED[name] = cls(shared_memory.SharedMemory(name=name), owner=False)
+        return table
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        '''
+        Detach from the segment, and unlink it if this process created it
+        '''
+        self._words = None
+        _ATTACHED.pop(self.shm.name, None)
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def _bucket(self, key):
+        start = key % self.num_entries
+        return [(start + i) % self.num_entries for i in range(min(BUCKET_SIZE, self.num_entries))]
+
+    def probe(self, key):
+        '''
+        Return the (visits, value, best move) record of `key`, or None.
+        The best move is a flat index, PASS or NO_MOVE
+        '''
+        self.probes += 1
+        words = self._words
+        for i in self._bucket(key):
+            check, visits, value, move = words[i].tolist()
+            if visits and check ^ visits ^ value ^ move == key:
+                self.hits += 1
+                return visits, _bits_float(value), move - (1 << 63)
+        return None
+
+    def store(self, key, visits, value, move=NO_MOVE):
+        '''
+        Record the visits, mean value and best move of `key`
+        '''
+        if visits <= 0:
+            return
+        words = self._words
+        target = None
+        target_visits = None
+        for i in self._bucket(key):
+            check, slot_visits, slot_value, slot_move = words[i].tolist()
+            if slot_visits and check ^ slot_visits ^ slot_value ^ slot_move == key:
+                if slot_visits > visits:
+                    return
+                target = i
+                break
+            if target is None or slot_visits < target_visits:
+                target, target_visits = i, slot_visits
+
+        value = _float_bits(value)
+        # moves are offset so that PASS and NO_MOVE fit an unsigned word
+        move += 1 << 63
+        words[target, 0] = 0
+        words[target, 1:] = (visits, value, move)
+        words[target, 0] = key ^ visits ^ value ^ move
+        self.stores += 1
+
+    @property
+    def stats(self):
+        '''
+        Return the lookups, hits, hit rate and stores of this process
+        '''
+        return {'probes': self.probes,
+                'hits': self.hits,
+                'hit_rate': self.hits / self.probes if self.probes else 0.0,
+                'stores': self.stores}
@@ -2,6 +2,17 @@ class Stone:
     EMPTY = 0
     BLACK = 1
     WHITE = 2
+    BORDER = 3
+
+class MoveStatus:
+    '''
+    Outcome of Game.try_play
+    '''
+    OK = 0
+    OCCUPIED = 1
+    SUICIDE = 2
+    KO = 3
+    OUT_OF_BOUNDS = 4
 
 def get_opposite_stone(stone):
     assert(stone != Stone.EMPTY)
@@ -11,3 +22,12 @@ def get_opposite_stone(stone):
 
 def make_2d_array(h, w, default=lambda: None):
     return [[default() for i in range(w)] for j in range(h)]
+
+def iter_bits(bits):
+    '''
+    Yield the index of every set bit of a non-negative integer, lowest first
+    '''
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
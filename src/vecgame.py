@@ -0,0 +1,310 @@
+import numpy as np
+from src.utils import Stone
+from src.exceptions import SelfDestructException, KoException
+from src.scoring import score_boards
+
+# move index of a pass
+PASS = -1
+
+class VecGame(object):
+    '''
+    Batched Go engine stepping N games of the same size at once with array operations.
+    Boards are stored as an (N, S, S) int8 array and moves as flat indices y * S + x,
+    or PASS. The rules follow GroupManager: captures, simple ko and optional
+    self-destruction. Positional superko is not supported.
+
+    Every stone carries the label of its group, which is the index of one of the
+    group's stones over the whole batch. Each step merges and captures groups for
+    all games at once by relabelling through a single lookup table
+    '''
+    def __init__(self, config, num_games):
+
+        # dimension of the square boards
+        self.board_size = config['board_size']
+
+        # number of games in the batch
+        self.num_games = num_games
+
+        # allow self-destruction
+        self.enable_self_destruct = config['enable_self_destruct']
+
+        # row length of a board padded by one point on each side
+        self._stride = self.board_size + 2
+
+        # all padded boards laid out one after the other, bordered by Stone.BORDER.
+        # The neighbors of every point are then contiguous shifted slices
+        self._cells = np.full(num_games * self._stride ** 2, Stone.BORDER, dtype=np.int8)
+
+        # stones of every game, of shape (num_games, board_size, board_size). Read-only for users
+        self.boards = self._unpad(self._cells)
+        self.boards[...] = Stone.EMPTY
+
+        # group label of every padded point, -1 for empty points and the border.
+        # A label is the padded index of one of the group's stones
+        self._labels = np.full(self._cells.shape, -1, dtype=np.int32)
+
+        # padded index of every point of the boards, indexed as [game, y * board_size + x]
+        self._padded_index = self._unpad(np.arange(self._cells.size)).reshape(num_games, -1)
+
+        # stone to play next in every game
+        self.turn = np.full(num_games, Stone.BLACK, dtype=np.int8)
+
+        # flat index y * board_size + x of the ko of every game as GroupManager defines it, or -1
+        self.ko = np.full(num_games, -1, dtype=np.intp)
+
+        # number of consecutive passes of every game
+        self.count_pass = np.zeros(num_games, dtype=np.int64)
+
+        # number of captured stones of every game, indexed as [game, stone]
+        self.num_captured = np.zeros((num_games, 3), dtype=np.int64)
+
+        # liberty analysis of the current boards, computed on demand
+        self._analysis = None
+
+        # stones and result of the last move evaluation of the current boards
+        self._resolved = None
+
+    def _unpad(self, cells):
+        '''
+        Return the (num_games, board_size, board_size) view of the playing area
+        of an array laid out as the padded boards
+        '''
+        stride = self._stride
+        return cells.reshape(self.num_games, stride, stride)[:, 1:-1, 1:-1]
+
+    def _neighbors(self, cells):
+        '''
+        Return the "up", "down", "left", "right" neighbors of every padded point
+        but the first and last rows, as contiguous slices of an array laid out
+        as the padded boards
+        '''
+        stride = self._stride
+        end = cells.size
+        return (cells[:end - 2 * stride], cells[2 * stride:],
+                cells[stride - 1:end - stride - 1], cells[stride + 1:end - stride + 1])
+
+    def _pad(self, values):
+        '''
+        Lay out values of the padded points but the first and last rows, as given by
+        the slices of _neighbors, as the padded boards with False elsewhere
+        '''
+        cells = np.zeros(self._cells.shape, dtype=values.dtype)
+        cells[self._stride:-self._stride] = values
+        return cells
+
+    def is_over(self):
+        '''
+        Return a boolean array of the games that are over after two consecutive passes
+        '''
+        return self.count_pass >= 2
+
+    def _analyze(self):
+        '''
+        Count the liberties of every group.
+        Return the liberties of every label capped at 2, followed by the label, the
+        stone and the capped group liberties of the four neighbors of every point
+        '''
+        if self._analysis is not None:
+            return self._analysis
+
+        stride = self._stride
+        neighbor_labels = self._neighbors(self._labels)
+        neighbor_stones = self._neighbors(self._cells)
+
+        # every empty point is one liberty of each distinct group around it.
+        # np.compress is much faster than boolean indexing for masks this large
+        empty = self._cells[stride:-stride] == Stone.EMPTY
+        liberty_labels = []
+        for d, label in enumerate(neighbor_labels):
+            distinct = empty & (label >= 0)
+            for other in neighbor_labels[:d]:
+                distinct &= label != other
+            liberty_labels.append(np.compress(distinct, label))
+        liberties = np.bincount(np.concatenate(liberty_labels), minlength=self._cells.size + 1)
+
+        # only 0, 1 or more liberties matter. Label -1 reads the trailing zero count
+        liberties = np.minimum(liberties, 2).astype(np.int8)
+        neighbor_liberties = self._neighbors(liberties[self._labels])
+
+        self._analysis = (liberties, neighbor_labels, neighbor_stones, neighbor_liberties)
+        self._resolved = None
+        return self._analysis
+
+    def _resolve(self, stones):
+        '''
+        Evaluate a move of the given stone of every game at every padded point but the
+        first and last rows. Return boolean arrays of the empty points, the number of
+        neighboring stones whose group would be captured, and boolean arrays of the
+        points that would self-destruct and the points forbidden by ko
+        '''
+        liberties, neighbor_labels, neighbor_stones, neighbor_liberties = self._analyze()
+        stones = np.asarray(stones, dtype=np.int8)
+        if self._resolved is not None and np.array_equal(self._resolved[0], stones):
+            return self._resolved[1]
+
+        stride = self._stride
+        if stones.ndim == 0 or (stones == stones[0]).all():
+            point_stones = stones.reshape(-1)[0]
+        else:
+            point_stones = np.repeat(stones, stride * stride)[stride:-stride]
+        opposite = Stone.BLACK + Stone.WHITE - point_stones
+        empty = self._cells[stride:-stride] == Stone.EMPTY
+
+        # the ko point of every game, seen from each of its neighbors
+        ko = np.zeros(self._cells.shape, dtype=bool)
+        games = np.flatnonzero(self.ko >= 0)
+        ko[self._padded_index[games, self.ko[games]]] = True
+
+        has_liberty = np.zeros_like(empty)
+        num_captures = np.zeros(empty.shape, dtype=np.int8)
+        captures_ko = np.zeros_like(empty)
+        for stone, group_liberties, ko_neighbor in zip(neighbor_stones, neighbor_liberties,
+                                                       self._neighbors(ko)):
+            has_liberty |= stone == Stone.EMPTY
+            has_liberty |= (stone == point_stones) & (group_liberties == 2)
+            captures = (stone == opposite) & (group_liberties == 1)
+            num_captures += captures
+            captures_ko |= captures & ko_neighbor
+
+        ko_points = empty & captures_ko & (num_captures == 1)
+        self_destruct = empty & ~has_liberty & (num_captures == 0)
+        result = (empty, num_captures, self_destruct, ko_points)
+        self._resolved = (stones, result)
+        return result
+
+    def _legal(self, stones):
+        '''
+        Return the legal moves of the given stones as a boolean array laid out as the padded boards
+        '''
+        if stones is None:
+            stones = self.turn
+        empty, num_captures, self_destruct, ko = self._resolve(stones)
+        legal = empty & ~ko
+        if not self.enable_self_destruct:
+            legal &= ~self_destruct
+        return self._pad(legal)
+
+    def legal_masks(self, stones=None):
+        '''
+        Return a boolean (N, S, S) array of the legal moves of every game, for the
+        given stone of each game or the stone whose turn it is
+        '''
+        return self._unpad(self._legal(stones))
+
+    def sample_moves(self, rng=None, stones=None):
+        '''
+        Return a uniformly random legal move of every game as a flat index,
+        or PASS if the game has no legal move or is over
+        '''
+        if rng is None:
+            rng = np.random.default_rng()
+        legal = self._legal(stones).reshape(self.num_games, -1)
+
+        # legal points get keys in [1, 2), so the largest key is a uniform legal point
+        keys = rng.random(legal.shape, dtype=np.float32)
+        keys += legal
+        padded = np.argmax(keys, axis=1)
+        y, x = np.divmod(padded, self._stride)
+        moves = (y - 1) * self.board_size + x - 1
+        moves[~legal.any(axis=1) | self.is_over()] = PASS
+        return moves
+
+    def step(self, moves, stones=None):
+        '''
+        Play one move in every game: a flat index y * S + x, or PASS.
+        Games that are over are left unchanged. The stones default to the
+        stone whose turn it is, and the turn passes to the opposite stone.
+        If any move is illegal, no game is changed and the exception of the
+        first violation is raised as GroupManager would
+        '''
+        moves = np.asarray(moves, dtype=np.intp)
+        if stones is None:
+            stones = self.turn
+        stones = np.broadcast_to(np.asarray(stones, dtype=np.int8), (self.num_games,)).copy()
+        stride = self._stride
+        playing = ~self.is_over()
+        placing = playing & (moves != PASS)
+        games = np.flatnonzero(placing)
+        points = self._padded_index[games, moves[games]]
+
+        # the evaluated arrays start at the second row of the padded boards
+        empty, num_captures, self_destruct, ko_points = self._resolve(stones)
+        if not empty[points - stride].all():
+            raise Exception("Position already occupied")
+        if ko_points[points - stride].any():
+            raise KoException('You may not repeat the last board state. Please choose a different move')
+        suicide = self_destruct[points - stride]
+        if suicide.any() and not self.enable_self_destruct:
+            raise SelfDestructException('Self destruction is not permitted. Please choose a different move.')
+
+        liberties, neighbor_labels, neighbor_stones, neighbor_liberties = self._analyze()
+        placed = stones[games].reshape(-1, 1)
+        around = points[:, None] + np.array([-stride, stride, -1, 1])
+        around_labels = self._labels[around]
+        around_stones = self._cells[around]
+        captured = ((around_stones == Stone.BLACK + Stone.WHITE - placed) &
+                    (liberties[around_labels] == 1))
+        joined = around_stones == placed
+
+        # single stone captures set the ko, captures of larger groups keep the
+        # previous ko, and any other move clears it. A captured stone is alone
+        # if none of its neighbors has the same color
+        single_capture = np.flatnonzero(num_captures[points - stride] == 1)
+        captured_points = around[single_capture][captured[single_capture]]
+        captured_around = captured_points[:, None] + np.array([-stride, stride, -1, 1])
+        single_stone = ~(self._cells[captured_around] ==
+                         self._cells[captured_points][:, None]).any(axis=1)
+        ko = np.full(len(games), -1, dtype=np.intp)
+        ko[single_capture] = np.where(single_stone, moves[games[single_capture]],
+                                      self.ko[games[single_capture]])
+        self.ko[games] = ko
+
+        # relabel every stone at once: friendly groups join the new stone's group,
+        # and captured groups, or joined groups of a suicidal stone, are removed.
+        # Label -1 reads the trailing entry, which maps it to itself
+        relabel = np.arange(self._cells.size + 1, dtype=np.int32)
+        relabel[-1] = -1
+        relabel[around_labels[joined]] = np.broadcast_to(points[:, None], joined.shape)[joined]
+        relabel[around_labels[captured]] = -1
+        relabel[around_labels[joined & suicide[:, None]]] = -1
+        labels = relabel[self._labels]
+
+        # remove captured stones, counting them per game and color
+        removed = (labels < 0) & (self._labels >= 0)
+        if removed.any():
+            removed_stones = np.where(removed, self._cells, Stone.EMPTY).reshape(self.num_games, -1)
+            for stone in (Stone.BLACK, Stone.WHITE):
+                self.num_captured[:, stone] += (removed_stones == stone).sum(axis=1)
+            np.putmask(self._cells, removed, Stone.EMPTY)
+        self._labels = labels
+
+        # place the new stones, or count the suicidal ones as captured
+        kept = points[~suicide]
+        self._cells[kept] = stones[games[~suicide]]
+        self._labels[kept] = kept
+        np.add.at(self.num_captured, (games[suicide], stones[games[suicide]]), 1)
+
+        self.count_pass[placing] = 0
+        self.count_pass[playing & (moves == PASS)] += 1
+        self.turn[playing] = Stone.BLACK + Stone.WHITE - stones[playing]
+        self._analysis = None
+        self._resolved = None
+
+    def get_scores(self):
+        '''
+        Return the black and white scores of every game as two integer arrays,
+        as Game.get_scores would give them
+        '''
+        return score_boards(self.boards, self.num_captured[:, Stone.BLACK],
+                            self.num_captured[:, Stone.WHITE])
+
+    def play_random(self, max_moves, rng=None):
+        '''
+        Play uniformly random legal moves in every game until all games are over
+        or `max_moves` moves have been played. Return the number of steps played
+        '''
+        for num_steps in range(max_moves):
+            if self.is_over().all():
+                return num_steps
+            self.step(self.sample_moves(rng))
+        return max_moves
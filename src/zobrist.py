@@ -0,0 +1,53 @@
+import random
+import numpy as np
+from src.utils import Stone
+
+# zobrist tables shared by all boards of the same size
+_ZOBRIST_TABLES = {}
+
+class ZobristTable(object):
+    '''
+    Random 64-bit keys for every (stone, point) pair of a square board.
+    The keys are seeded by the board size, so hashes agree across processes
+    '''
+    def __init__(self, board_size):
+
+        # dimension of the board
+        self.board_size = board_size
+
+        rng = random.Random(board_size)
+
+        # keys of shape (3, board_size, board_size), indexed by stone. Empty points hash to 0
+        self.array = np.zeros((3, board_size, board_size), dtype=np.uint64)
+        for stone in (Stone.BLACK, Stone.WHITE):
+            for y in range(board_size):
+                for x in range(board_size):
+                    self.array[stone, y, x] = rng.getrandbits(64)
+        self.array.flags.writeable = False
+
+        # the same keys as Python ints for incremental updates, indexed as keys[stone][y][x]
+        self.keys = tuple(tuple(tuple(int(k) for k in row) for row in plane)
+                          for plane in self.array)
+
+        # the same keys indexed by flat index, as flat_keys[stone][y * board_size + x]
+        self.flat_keys = tuple(tuple(int(k) for k in plane.ravel()) for plane in self.array)
+
+    def hash_board(self, board):
+        '''
+        Compute the hash of a whole board from scratch
+        '''
+        board = np.asarray(board)
+        keys = self.array[board, np.arange(self.board_size)[:, None], np.arange(self.board_size)]
+        return int(np.bitwise_xor.reduce(keys, axis=None))
+
+
+def get_zobrist_table(board_size):
+    '''
+    Return the shared zobrist table for the given board size,
+    building it on first use
+    '''
+    table = _ZOBRIST_TABLES.get(board_size)
+    if table is None:
+        table = ZobristTable(board_size)
+        _ZOBRIST_TABLES[board_size] = table
+    return table
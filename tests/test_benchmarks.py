@@ -0,0 +1,67 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from benchmarks.suite import BENCHMARKS, NUM_POSITIONS, run_suite, compare, main
+
+class TestBenchmarkSuite(unittest.TestCase):
+    '''
+    Test case for the benchmark suite and its regression comparison
+    '''
+    def setUp(self):
+        self.results = run_suite(['place_stone', 'get_scores', 'playout'], sizes=[5],
+                                 repeat=2, warmup=0, log=lambda *args: None)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _save(self, results, name):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            json.dump(results, f)
+        return path
+
+    def test__results(self):
+        results = self.results['results']
+        self.assertEqual([(r['name'], r['board_size']) for r in results],
+                         [('place_stone', 5), ('get_scores', 5), ('playout', 5)])
+        for result in results:
+            self.assertEqual(len(result['samples']), 2)
+            self.assertTrue(0 < result['median'] <= result['p95'])
+        self.assertEqual(self.results['settings'], {'repeat': 2, 'warmup': 0, 'seed': 0})
+        json.dumps(self.results)
+
+    def test__setup_small_boards(self):
+        '''
+        Setups of single moves end on the smallest boards, where the moves are rare or impossible
+        '''
+        benchmarks = {b.name: b for b in BENCHMARKS}
+        for name in ('resolve_capture', 'resolve_merge', 'game_legal_actions'):
+            with self.assertRaises(ValueError):
+                benchmarks[name].setup(1, random.Random(0))
+        with self.assertRaises(ValueError):
+            benchmarks['resolve_merge'].setup(2, random.Random(0))
+        game, positions = benchmarks['resolve_capture'].setup(2, random.Random(0))
+        self.assertTrue(0 < len(positions) <= NUM_POSITIONS)
+        self.assertEqual(benchmarks['resolve_capture'].run((game, positions))[0], len(positions))
+
+    def test__compare(self):
+        faster = json.loads(json.dumps(self.results))
+        for result in faster['results']:
+            result['median'] /= 2
+        faster['results'].pop()
+
+        rows = compare(faster, self.results, threshold=0.1)
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(all(regressed for *_, regressed in rows))
+        self.assertFalse(any(regressed for *_, regressed in compare(self.results, self.results)))
+
+    def test__main_compare(self):
+        current = self._save(self.results, 'current.json')
+        self.assertEqual(main(['--current', current, '--compare', current]), 0)
+
+        slower = json.loads(json.dumps(self.results))
+        slower['results'][0]['median'] /= 2
+        baseline = self._save(slower, 'baseline.json')
+        self.assertEqual(main(['--current', current, '--compare', baseline]), 1)
@@ -0,0 +1,98 @@
+import unittest
+import numpy as np
+from src.board import Board, PaddedBoard, make_board
+from src.game import Game
+from src.neighbors import get_neighbor_table
+from src.utils import Stone
+from tests.utils import (
+    capture1, capture2, capture3,
+    self_destruct1, self_destruct2, self_destruct3)
+
+class TestNeighborTable(unittest.TestCase):
+    '''
+    Test case for the precomputed neighbor tables
+    '''
+    def setUp(self):
+        self.board_size = 7
+
+        configs = {'black_stone': 'b',
+                   'white_stone': 'w',
+                   'board_size': self.board_size,
+                   'enable_self_destruct': False
+        }
+
+        self.board = Board(configs)
+
+    def test__shared(self):
+        self.assertIs(self.board.neighbor_table, get_neighbor_table(self.board_size))
+        self.assertIs(self.board[1:].neighbor_table, self.board.neighbor_table)
+
+    def test__liberty_coords(self):
+        self.assertEqual(self.board.get_liberty_coords(3, 3), ((2, 3), (4, 3), (3, 2), (3, 4)))
+        self.assertEqual(self.board.get_liberty_coords(0, 3), ((1, 3), (0, 2), (0, 4)))
+        self.assertEqual(self.board.get_liberty_coords(6, 6), ((5, 6), (6, 5)))
+
+    def test__padded_neighbors(self):
+        table = self.board.neighbor_table
+        for y in range(self.board_size):
+            for x in range(self.board_size):
+                i = table.index[y][x]
+                self.assertEqual(table.coords[i], (y, x))
+                expected = [ly * self.board_size + lx
+                            for ly, lx in self.board.get_liberty_coords(y, x)]
+                self.assertEqual(list(table.neighbors[i, :table.num_neighbors[i]]), expected)
+                self.assertTrue((table.neighbors[i, table.num_neighbors[i]:] == -1).all())
+                self.assertEqual(table.neighbor_indices[i], tuple(expected))
+
+
+class TestPaddedBoard(unittest.TestCase):
+    '''
+    Test case for the compact padded board backend
+    '''
+    def setUp(self):
+        self.board_size = 7
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': True,
+                        'board_backend': 'padded'
+        }
+
+    def test__make_board(self):
+        self.assertEqual(type(make_board(self.configs)), PaddedBoard)
+        self.assertEqual(type(make_board(dict(self.configs, board_backend='numpy'))), Board)
+
+    def test__place_stone(self):
+        board = make_board(self.configs)
+        board.place_stone(Stone.BLACK, 4, 4)
+        board.place_stone(Stone.WHITE, 0, 6)
+        self.assertEqual(board[4, 4], Stone.BLACK)
+        self.assertEqual(board[0, 6], Stone.WHITE)
+        self.assertEqual(np.where(board == Stone.BLACK), (4, 4))
+        self.assertEqual(board.view()[0, 6], Stone.WHITE)
+        with self.assertRaises(Exception):
+            board.place_stone(Stone.WHITE, 4, 4)
+        with self.assertRaises(Exception):
+            board.place_stone(Stone.WHITE, 7, 0)
+        board.remove_stone(4, 4)
+        self.assertEqual(board[4, 4], Stone.EMPTY)
+
+    def test__border(self):
+        board = make_board(self.configs)
+        board.fill(Stone.BLACK)
+        cells = np.frombuffer(board._cells, dtype=np.int8).reshape(9, 9)
+        self.assertTrue((cells[0] == Stone.BORDER).all())
+        self.assertTrue((cells[:, -1] == Stone.BORDER).all())
+        self.assertTrue((cells[1:-1, 1:-1] == Stone.BLACK).all())
+
+    def test__matches_numpy_backend(self):
+        for scenario in [capture1, capture2, capture3,
+                         self_destruct1, self_destruct2, self_destruct3]:
+            padded_game = Game(self.configs)
+            numpy_game = Game(dict(self.configs, board_backend='numpy'))
+            scenario(padded_game)
+            scenario(numpy_game)
+            self.assertTrue(np.array_equal(np.asarray(padded_game.board), numpy_game.board))
+            self.assertEqual(padded_game.num_black_captured, numpy_game.num_black_captured)
+            self.assertEqual(padded_game.get_scores(), numpy_game.get_scores())
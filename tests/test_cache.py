@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+from src.game import Game
+from src.utils import Stone
+from src.cache import EvaluationCache, get_symmetries
+
+class TestEvaluationCache(unittest.TestCase):
+    '''
+    Test case for the LRU evaluation cache
+    '''
+    def setUp(self):
+        self.board_size = 5
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False
+        }
+
+        # boards passed to `evaluate`
+        self.evaluated = []
+
+    def evaluate(self, board, stone):
+        '''
+        Policy of the black stones of the board, followed by a pass, and the value of the stone
+        '''
+        self.evaluated.append(board.copy())
+        policy = np.append((board == Stone.BLACK).ravel().astype(np.float32), 0.5)
+        return policy, float(stone)
+
+    def _game(self, moves):
+        game = Game(self.configs)
+        for y, x in moves:
+            game.place_black(y, x)
+        return game
+
+    def test__symmetries(self):
+        perms = get_symmetries(3)
+        self.assertEqual(len({tuple(perm) for perm in perms}), 8)
+        board = np.arange(9).reshape(3, 3)
+        self.assertTrue(np.array_equal(board.ravel()[perms[1]], np.rot90(board).ravel()))
+        for perm in perms:
+            self.assertEqual(sorted(perm), list(range(9)))
+
+    def test__hits_and_misses(self):
+        cache = EvaluationCache(self.evaluate)
+        game = self._game([(1, 2)])
+        first = cache.evaluate(game, Stone.WHITE)
+        second = cache.evaluate(game, Stone.WHITE)
+        self.assertIs(first, second)
+        cache.evaluate(game, Stone.BLACK)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertFalse(first[0].flags.writeable)
+
+    def test__lru_eviction(self):
+        cache = EvaluationCache(self.evaluate, max_entries=2)
+        games = [self._game([(0, i)]) for i in range(3)]
+        cache.evaluate(games[0], Stone.WHITE)
+        cache.evaluate(games[1], Stone.WHITE)
+        cache.evaluate(games[0], Stone.WHITE)
+        cache.evaluate(games[2], Stone.WHITE)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        cache.evaluate(games[0], Stone.WHITE)
+        self.assertEqual(cache.hits, 2)
+        cache.evaluate(games[1], Stone.WHITE)
+        self.assertEqual(cache.misses, 4)
+
+    def test__byte_limit(self):
+        cache = EvaluationCache(self.evaluate, max_bytes=1000)
+        for i in range(5):
+            for j in range(5):
+                cache.evaluate(self._game([(i, j)]), Stone.WHITE)
+        self.assertLessEqual(cache.nbytes, 1000)
+        self.assertEqual(cache.evictions, 25 - len(cache))
+
+    def test__symmetry_folding(self):
+        cache = EvaluationCache(self.evaluate, symmetry=True)
+        corners = [(0, 1), (1, 0), (0, 3), (3, 0), (4, 1), (1, 4), (4, 3), (3, 4)]
+        for y, x in corners:
+            game = self._game([(y, x)])
+            policy, value = cache.evaluate(game, Stone.WHITE)
+            # the policy is mapped back onto the board it was asked for
+            expected = np.zeros((self.board_size, self.board_size))
+            expected[y, x] = 1
+            self.assertTrue(np.array_equal(policy[:-1].reshape(expected.shape), expected))
+            self.assertEqual(policy[-1], 0.5)
+        self.assertEqual((cache.hits, cache.misses), (7, 1))
+        self.assertEqual(len(self.evaluated), 1)
+
+    def test__ko_in_key(self):
+        cache = EvaluationCache(self.evaluate)
+        game = Game(self.configs)
+        game.place_black(0, 0)
+        game.place_black(1, 1)
+        game.place_black(0, 2)
+        game.place_white(1, 0)
+        game.place_white(0, 1)
+        cache.evaluate(game, Stone.BLACK)
+        game.gm._ko = None
+        cache.evaluate(game, Stone.BLACK)
+        self.assertEqual(cache.misses, 2)
@@ -0,0 +1,110 @@
+import random
+import unittest
+import numpy as np
+from src.game import Game
+from src.utils import Stone
+from src.features import (FeatureExtractor, write_batch, num_planes, OWN, OPPONENT, EMPTY,
+                          LIBERTIES_1, LIBERTIES_2, LIBERTIES_3, KO, HISTORY)
+from tests.utils import capture1
+
+def brute_force_liberties(game):
+    '''
+    Count the liberties of the group of every stone by flood fill
+    '''
+    board = np.asarray(game.board)
+    size = game.board_size
+    liberties = np.zeros((size, size), dtype=int)
+    for y in range(size):
+        for x in range(size):
+            if board[y, x] == Stone.EMPTY:
+                continue
+            stack, group, empty = [(y, x)], {(y, x)}, set()
+            while stack:
+                cy, cx = stack.pop()
+                for ny, nx in game.board.get_liberty_coords(cy, cx):
+                    if board[ny, nx] == Stone.EMPTY:
+                        empty.add((ny, nx))
+                    elif board[ny, nx] == board[y, x] and (ny, nx) not in group:
+                        group.add((ny, nx))
+                        stack.append((ny, nx))
+            liberties[y, x] = len(empty)
+    return liberties
+
+
+class TestFeatureExtractor(unittest.TestCase):
+    '''
+    Test case for the incremental feature planes
+    '''
+    def setUp(self):
+        self.board_size = 7
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False
+        }
+
+        self.game = Game(self.configs)
+        self.features = FeatureExtractor(self.game, history=2)
+
+    def test__stones_and_liberties(self):
+        capture1(self.game)
+        planes = self.features.planes(Stone.WHITE)
+        board = np.asarray(self.game.board)
+        self.assertTrue(np.array_equal(planes[OWN], board == Stone.WHITE))
+        self.assertTrue(np.array_equal(planes[OPPONENT], board == Stone.BLACK))
+        self.assertTrue(np.array_equal(planes[EMPTY], board == Stone.EMPTY))
+        liberties = brute_force_liberties(self.game)
+        self.assertTrue(np.array_equal(self.features.liberties, liberties))
+        self.assertTrue(np.array_equal(planes[LIBERTIES_1], liberties == 1))
+        self.assertTrue(np.array_equal(planes[LIBERTIES_2], liberties == 2))
+        self.assertTrue(np.array_equal(planes[LIBERTIES_3], liberties >= 3))
+
+    def test__ko(self):
+        self.game.place_black(0, 0)
+        self.game.place_black(1, 1)
+        self.game.place_black(0, 2)
+        self.game.place_white(1, 0)
+        self.game.place_white(0, 1)
+        self.assertEqual(list(zip(*self.features.planes(Stone.BLACK)[KO].nonzero())), [(0, 0)])
+        self.assertFalse(self.features.planes(Stone.WHITE)[KO].any())
+
+    def test__history(self):
+        self.game.place_black(3, 3)
+        self.game.place_white(2, 2)
+        self.game.place_black(4, 4)
+        planes = self.features.planes(Stone.WHITE)
+        self.assertEqual(list(zip(*planes[HISTORY].nonzero())), [(4, 4)])
+        self.assertEqual(list(zip(*planes[HISTORY + 1].nonzero())), [(2, 2)])
+
+    def test__make_unmake_restore(self):
+        rng = random.Random(0)
+        snapshot = self.game.snapshot()
+        stone = Stone.BLACK
+        for _ in range(100):
+            move = self.game.sample_legal_move(stone, rng)
+            if move is None:
+                break
+            self.game.make_move(stone, move)
+            stone = Stone.BLACK + Stone.WHITE - stone
+            self.assertTrue(np.array_equal(self.features.liberties, brute_force_liberties(self.game)))
+        history = self.features.planes(stone)[HISTORY:]
+        self.game.make_move(stone, self.game.sample_legal_move(stone, rng))
+        self.game.unmake_move()
+        self.assertTrue(np.array_equal(self.features.planes(stone)[HISTORY:], history))
+        for _ in range(30):
+            self.game.unmake_move()
+            self.assertTrue(np.array_equal(self.features.liberties, brute_force_liberties(self.game)))
+        self.game.restore(snapshot)
+        self.assertFalse(self.features.liberties.any())
+        self.assertFalse(self.features.planes(Stone.BLACK)[HISTORY:].any())
+
+    def test__write_batch(self):
+        games = [Game(self.configs) for _ in range(3)]
+        extractors = [FeatureExtractor(game) for game in games]
+        games[1].place_black(1, 2)
+        out = np.zeros((3, num_planes(), self.board_size, self.board_size), dtype=np.float32)
+        self.assertIs(write_batch(extractors, [Stone.BLACK, Stone.WHITE, Stone.BLACK], out), out)
+        self.assertEqual(out[1, OPPONENT, 1, 2], 1)
+        self.assertEqual(out[1, HISTORY, 1, 2], 1)
+        self.assertTrue(np.array_equal(out[0], extractors[0].planes(Stone.BLACK)))
@@ -218,3 +218,19 @@ class TestGameGroups(unittest.TestCase):
         self.assertTrue(white_group2.has_liberty((6, 5)))
         self.assertTrue(white_group2.has_liberty((5, 6)))
         self.assertTrue(white_group2.has_liberty((4, 6)))
+
+    def test__merge_union_by_size(self):
+
+        # joining a single stone onto a chain keeps the chain's group
+        for x in range(4):
+            self.game.place_black(2, x)
+        chain = self.game.gm._get_group(2, 0)
+        self.game.place_black(4, 4)
+        self.game.place_black(3, 4)
+        self.game.place_black(2, 4)
+        self.assertIs(self.game.gm._get_group(2, 4), chain)
+        self.assertIs(self.game.gm._get_group(4, 4), chain)
+        self.assertEqual(chain.num_coords, 7)
+        self.assertEqual(chain.num_liberties, 14)
+        self.assertFalse(chain.has_liberty((2, 4)))
+        self.assertIsNone(self.game.gm._get_group(0, 0))
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+import unittest
+import numpy as np
+from src.inference import BatchingEvaluator
+from src.AI3.network import PolicyValueNetwork, encode_boards
+
+class TestBatchingEvaluator(unittest.TestCase):
+    '''
+    Test case for the batching evaluation service
+    '''
+    def setUp(self):
+        # sizes of the batches evaluated by `double`
+        self.batch_sizes = []
+
+    def double(self, batch):
+        self.batch_sizes.append(len(batch))
+        return batch * 2
+
+    def test__single(self):
+        with BatchingEvaluator(self.double, max_batch_size=4, max_wait=0.001) as evaluator:
+            self.assertTrue(np.array_equal(evaluator.evaluate(np.arange(3)), [0, 2, 4]))
+        self.assertEqual(self.batch_sizes, [1])
+        self.assertEqual(evaluator.stats['requests'], 1)
+
+    def test__threads_fill_batches(self):
+        results = {}
+        with BatchingEvaluator(self.double, max_batch_size=8, max_wait=0.5) as evaluator:
+            def worker(i):
+                results[i] = evaluator.evaluate(np.array([i]))
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual({i: int(result[0]) for i, result in results.items()},
+                         {i: 2 * i for i in range(16)})
+        self.assertEqual(self.batch_sizes, [8, 8])
+        stats = evaluator.stats
+        self.assertEqual(stats['batches'], 2)
+        self.assertEqual(stats['fill_rate'], 1.0)
+        self.assertGreaterEqual(stats['max_latency'], stats['mean_latency'])
+
+    def test__max_wait(self):
+        with BatchingEvaluator(self.double, max_batch_size=64, max_wait=0.01) as evaluator:
+            start = time.perf_counter()
+            evaluator.evaluate(np.zeros(1))
+            self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(evaluator.stats['fill_rate'], 1 / 64)
+
+    def test__coroutines(self):
+        async def evaluate_all(evaluator):
+            return await asyncio.gather(*(evaluator.evaluate_async(np.array([i])) for i in range(5)))
+        with BatchingEvaluator(self.double, max_batch_size=5, max_wait=0.5) as evaluator:
+            results = asyncio.run(evaluate_all(evaluator))
+        self.assertEqual([int(result[0]) for result in results], [0, 2, 4, 6, 8])
+        self.assertEqual(self.batch_sizes, [5])
+
+    def test__network(self):
+        network = PolicyValueNetwork.initialize(num_channels=8, num_layers=2, seed=0)
+        planes = encode_boards(np.random.default_rng(0).integers(0, 3, (6, 5, 5)))
+        expected_policy, expected_value = network.predict_planes(planes)
+        with BatchingEvaluator(network.predict_planes, max_batch_size=3) as evaluator:
+            futures = [evaluator.submit(p) for p in planes]
+            for i, future in enumerate(futures):
+                policy, value = future.result()
+                self.assertTrue(np.allclose(policy, expected_policy[i], atol=1e-6))
+                self.assertAlmostEqual(value, expected_value[i], places=5)
+
+    def test__exception(self):
+        def fail(batch):
+            raise ValueError('bad batch')
+        with BatchingEvaluator(fail) as evaluator:
+            with self.assertRaises(ValueError):
+                evaluator.evaluate(np.zeros(1))
+
+    def test__closed(self):
+        evaluator = BatchingEvaluator(self.double)
+        future = evaluator.submit(np.ones(1))
+        evaluator.close()
+        self.assertEqual(future.result()[0], 2)
+        with self.assertRaises(RuntimeError):
+            evaluator.submit(np.ones(1))
+
+    def test__close_while_submitting(self):
+        '''
+        A request that passed the closed check before close is still evaluated
+        '''
+        evaluator = BatchingEvaluator(self.double)
+        put = evaluator._queue.put
+        closer = threading.Thread(target=evaluator.close)
+
+        def close_then_put(request):
+            # close from another thread between the check and the put of the request
+            if request is not None and closer.ident is None:
+                closer.start()
+                time.sleep(0.05)
+            put(request)
+
+        evaluator._queue.put = close_then_put
+        future = evaluator.submit(np.ones(1))
+        closer.join()
+        self.assertEqual(future.result(timeout=1)[0], 2)
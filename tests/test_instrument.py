@@ -0,0 +1,93 @@
+import contextlib
+import io
+import json
+import unittest
+from src import instrument
+from src.game import Game, GameUI
+from src.group import Group, GroupManager
+from src.utils import Stone, MoveStatus
+from src.exceptions import KoException
+from tests.utils import capture2
+
+class TestInstrumentation(unittest.TestCase):
+    '''
+    Test case for the opt-in instrumentation of the engine hot paths
+    '''
+    def setUp(self):
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': 7,
+                        'enable_self_destruct': False
+        }
+        self.game = Game(self.configs)
+
+    def tearDown(self):
+        instrument.disable()
+
+    def test__disabled_by_default(self):
+        self.assertFalse(instrument.is_enabled())
+        resolve_board = GroupManager.resolve_board
+        merge = Group.__dict__['merge']
+        with instrument.instrumented():
+            self.assertTrue(instrument.is_enabled())
+            self.assertIsNot(GroupManager.resolve_board, resolve_board)
+        self.assertFalse(instrument.is_enabled())
+        self.assertIs(GroupManager.resolve_board, resolve_board)
+        self.assertIs(Group.__dict__['merge'], merge)
+
+    def test__capture_counters(self):
+        with instrument.instrumented():
+            capture2(self.game)
+            self.game.get_scores()
+        counters = instrument.snapshot()
+
+        self.assertEqual(counters['resolve_board']['calls'], 10)
+        self.assertEqual(counters['update_state']['calls'], 10)
+        self.assertEqual(counters['update_state']['captured_groups'], 1)
+        self.assertEqual(counters['update_state']['captured_stones'], 3)
+        self.assertEqual(counters['update_state']['liberties_restored'], 8)
+        self.assertEqual(counters['merge']['calls'], 3)
+        self.assertEqual(counters['merge']['arity'], {'2': 2, '3': 1})
+        self.assertEqual(counters['merge']['set_sizes'],
+                         {'stones': {'1': 7}, 'liberties': {'2': 2, '3': 3, '4': 2}})
+        self.assertEqual(counters['merge']['max_stones'], 3)
+        self.assertEqual(counters['get_scores']['calls'], 1)
+        self.assertGreater(counters['resolve_board']['time'], 0)
+        self.assertEqual(json.loads(instrument.to_json()), counters)
+
+        # nothing is counted once disabled
+        self.game.place_black(0, 0)
+        self.assertEqual(instrument.snapshot()['resolve_board']['calls'], 10)
+        instrument.reset()
+        self.assertEqual(instrument.snapshot()['resolve_board']['calls'], 0)
+
+    def test__rejections(self):
+        '''
+        Ko recapture and suicide are counted, whether rejected by try_play or by make_move
+        '''
+        for y, x in [(0, 1), (1, 0), (2, 1)]:
+            self.game.place_black(y, x)
+        for y, x in [(0, 2), (1, 3), (2, 2), (1, 1)]:
+            self.game.place_white(y, x)
+        with instrument.instrumented():
+            self.game.place_black(1, 2)
+            self.assertEqual(self.game.try_play(Stone.WHITE, 1, 1), MoveStatus.KO)
+            self.assertEqual(self.game.try_play(Stone.WHITE, 0, 0), MoveStatus.SUICIDE)
+            with self.assertRaises(KoException):
+                self.game.gm.make_move(Stone.WHITE, 1, 1)
+        counters = instrument.snapshot()
+        self.assertEqual(counters['rejections'], {'ko': 2, 'suicide': 1})
+        self.assertEqual(counters['undo_stone']['calls'], 1)
+        self.assertEqual(counters['update_state']['captured_stones'], 1)
+
+    def test__game_scored_once(self):
+        '''
+        A rendered game is scored once, for its result, its display and its record
+        '''
+        ui = GameUI(dict(self.configs, seed=0, max_moves=20), 'AI 2', 'AI 2', render=True)
+        with instrument.instrumented(), contextlib.redirect_stdout(io.StringIO()) as output:
+            scores = ui.play()
+            record = ui.record()
+        self.assertEqual(instrument.snapshot()['get_scores']['calls'], 1)
+        self.assertIn(f'Black score: {scores[Stone.BLACK]}', output.getvalue())
+        self.assertIsNotNone(record.result)
@@ -0,0 +1,96 @@
+import copy
+import random
+import unittest
+from src.game import Game
+from src.utils import Stone
+
+def brute_force_legal_actions(game, stone):
+    '''
+    Find the legal moves by attempting every move on a copy of the game
+    '''
+    legal_actions = []
+    for y in range(game.board_size):
+        for x in range(game.board_size):
+            trial = copy.deepcopy(game)
+            try:
+                trial._place_stone(stone, y, x)
+            except Exception:
+                continue
+            legal_actions.append((y, x))
+    return legal_actions
+
+
+class TestLegalMoves(unittest.TestCase):
+    '''
+    Test case for the incrementally maintained legal moves
+    '''
+    def setUp(self):
+        self.board_size = 5
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False
+        }
+
+        self.game = Game(self.configs)
+
+    def assertLegalActions(self, game):
+        for stone in (Stone.BLACK, Stone.WHITE):
+            expected = brute_force_legal_actions(game, stone)
+            self.assertEqual(sorted(game.get_legal_actions(stone)), expected)
+            mask = game.legal_mask(stone)
+            self.assertEqual(sorted(zip(*mask.nonzero())), expected)
+
+    def test__empty_board(self):
+        self.assertEqual(len(self.game.get_legal_actions(Stone.BLACK)), 25)
+        self.assertTrue(self.game.legal_mask(Stone.WHITE).all())
+
+    def test__suicide(self):
+        for y, x in [(0, 1), (1, 0)]:
+            self.game.place_white(y, x)
+        self.assertFalse(self.game.legal_mask(Stone.BLACK)[0, 0])
+        self.assertTrue(self.game.legal_mask(Stone.WHITE)[0, 0])
+
+    def test__ko(self):
+        self.game.place_black(0, 0)
+        self.game.place_black(1, 1)
+        self.game.place_black(0, 2)
+        self.game.place_white(1, 0)
+        self.game.place_white(0, 1)
+        self.assertNotIn((0, 0), self.game.get_legal_actions(Stone.BLACK))
+        self.assertLegalActions(self.game)
+
+    def test__random_games(self):
+        for self_destruct in (False, True):
+            rng = random.Random(self_destruct)
+            for _ in range(2):
+                game = Game(dict(self.configs, enable_self_destruct=self_destruct))
+                stone = Stone.BLACK
+                for move in range(60):
+                    if move % 10 == 0:
+                        self.assertLegalActions(game)
+                    action = game.sample_legal_move(stone, rng)
+                    if action is None:
+                        break
+                    game._place_stone(stone, *action)
+                    stone = Stone.WHITE if stone == Stone.BLACK else Stone.BLACK
+                self.assertLegalActions(game)
+
+    def test__sample_reject(self):
+        '''
+        Moves not rejected are drawn uniformly, even when the rejected moves are clustered
+        '''
+        rng = random.Random(0)
+        reject = lambda y, x: y < 4 and (y, x) != (3, 4)
+        counts = {}
+        for _ in range(4000):
+            move = self.game.sample_legal_move(Stone.BLACK, rng, reject)
+            counts[move] = counts.get(move, 0) + 1
+        self.assertEqual(sorted(counts), [(3, 4)] + [(4, x) for x in range(5)])
+        for count in counts.values():
+            self.assertGreater(count, 4000 / 6 * 0.85)
+            self.assertLess(count, 4000 / 6 * 1.15)
+        self.assertIsNone(self.game.sample_legal_move(Stone.BLACK, rng, lambda y, x: True))
+        self.assertLegalActions(self.game)
+        self.assertEqual(len(set(self.game.gm.legal_moves._moves[Stone.BLACK])), 25)
@@ -0,0 +1,129 @@
+import multiprocessing
+import time
+import unittest
+from src.game import Game, GameUI
+from src.utils import Stone
+from src import transposition
+from src.AI4 import AI4
+from src.AI4.AI4 import MCTS, Node
+from tests.utils import get_state
+
+class TestMCTS(unittest.TestCase):
+    '''
+    Test case for the Monte Carlo tree search player
+    '''
+    def setUp(self):
+        self.board_size = 5
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False,
+                        'mcts_time': None,
+                        'mcts_playouts': 100,
+                        'seed': 0
+        }
+
+    def test__search(self):
+        game = Game(self.configs)
+        game.place_black(2, 2)
+        state = get_state(game)
+        root = Node(None, Stone.BLACK, None, game.position_hash)
+        num_playouts = MCTS().search(game, root, Stone.WHITE, max_playouts=50)
+        self.assertEqual(num_playouts, 50)
+        self.assertEqual(get_state(game), state)
+        self.assertEqual(root.visits, 50)
+        self.assertEqual(sum(child.visits for child in root.children.values()), 50)
+        self.assertTrue(all(child.stone == Stone.WHITE for child in root.children.values()))
+        self.assertNotIn((2, 2), root.children)
+
+    def test__legal_move(self):
+        ui = GameUI(self.configs, 'AI 4', 'AI 4', render=False)
+        for y, x in [(0, 1), (1, 0)]:
+            ui.game.place_white(y, x)
+        move = ui.players[Stone.BLACK].nextMove(ui)
+        self.assertTrue(move == 'pass' or move in ui.game.get_legal_actions(Stone.BLACK))
+        self.assertNotEqual(move, (0, 0))
+
+    def test__time_budget(self):
+        ui = GameUI(dict(self.configs, mcts_time=0.2, mcts_playouts=None), 'AI 4', 'AI 4',
+                    render=False)
+        start = time.perf_counter()
+        ui.players[Stone.BLACK].nextMove(ui)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertGreater(ui.players[Stone.BLACK].stats['playouts'], 0)
+
+    def test__no_budget(self):
+        with self.assertRaises(ValueError):
+            GameUI(dict(self.configs, mcts_time=None, mcts_playouts=None), 'AI 4', 'AI 4',
+                   render=False)
+
+    def test__tree_reuse(self):
+        ui = GameUI(self.configs, 'AI 4', 'AI 4', render=False)
+        ai = ui.players[Stone.BLACK]
+        move = ai.nextMove(ui)
+        ui.game.place_black(*move)
+        ui.turn = Stone.WHITE
+
+        # reply with the most searched answer, so that it is in the tree
+        reply = max(ai._root.children.values(), key=lambda child: child.visits)
+        ui.game.place_white(*reply.move)
+        ui.turn = Stone.BLACK
+        ai.nextMove(ui)
+        self.assertGreater(ai.stats['reused_visits'], 0)
+        self.assertEqual(ai.stats['playouts'], 100)
+        self.assertGreater(ai.stats['tree_size'], 100)
+
+    def test__tree_parallel(self):
+        game = Game(self.configs)
+        root = Node(None, Stone.WHITE, None, game.position_hash)
+        state = get_state(game)
+        num_playouts = MCTS().search_threads(game, root, Stone.BLACK, 4, max_playouts=60)
+        self.assertEqual(num_playouts, 60)
+        self.assertEqual(get_state(game), state)
+
+        # every virtual loss is taken back
+        self.assertEqual(root.visits, 60)
+        self.assertEqual(sum(child.visits for child in root.children.values()), 60)
+        nodes = list(root.children.values())
+        while nodes:
+            node = nodes.pop()
+            if node.children:
+                self.assertEqual(node.visits, 1 + sum(child.visits for child in node.children.values()))
+            self.assertLessEqual(node.wins, node.visits)
+            nodes.extend(node.children.values())
+
+    def test__root_parallel(self):
+        ui = GameUI(dict(self.configs, mcts_workers=2), 'AI 4', 'AI 4', render=False)
+        ai = ui.players[Stone.BLACK]
+        try:
+            move = ai.nextMove(ui)
+        finally:
+            ai.close()
+        self.assertIn(move, ui.game.get_legal_actions(Stone.BLACK))
+        self.assertEqual(ai.stats['playouts'], 100)
+
+    def test__root_parallel_game_shutdown(self):
+        '''
+        The worker processes of root-parallel players are shut down when the game ends
+        '''
+        config = dict(self.configs, mcts_workers=2, mcts_playouts=20, max_moves=4)
+        ui = GameUI(config, 'AI 4', 'AI 4', render=False)
+        ui.play()
+        self.assertEqual(multiprocessing.active_children(), [])
+        self.assertTrue(all(player._executor is None for player in ui.players.values()))
+
+    def test__shared_table_released(self):
+        '''
+        Both players share one transposition table, which is unlinked when the game ends
+        '''
+        config = dict(self.configs, mcts_playouts=20, max_moves=4, mcts_table_entries=256)
+        ui = GameUI(config, 'AI 4', 'AI 4', render=False)
+        black, white = ui.players[Stone.BLACK], ui.players[Stone.WHITE]
+        black.nextMove(ui)
+        white.nextMove(ui)
+        self.assertIs(black.table, white.table)
+        ui.play()
+        self.assertIsNone(black.table)
+        self.assertEqual(transposition._ATTACHED, {})
+        self.assertEqual(AI4._SHARED_TABLES, {})
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.game import Game, GameUI
+from src.utils import Stone
+from src.AI3.AI3 import ImageCNNAI
+from src.AI3.network import PolicyValueNetwork, encode_boards
+
+def reference_conv(x, kernel, bias):
+    '''
+    Convolve (N, C, H, W) planes with an (O, C, 3, 3) kernel one point at a time
+    '''
+    num_games, channels, height, width = x.shape
+    padded = np.pad(x, ((0, 0), (0, 0), (1, 1), (1, 1)))
+    out = np.zeros((num_games, kernel.shape[0], height, width))
+    for y in range(height):
+        for x_ in range(width):
+            patch = padded[:, :, y:y + 3, x_:x_ + 3]
+            out[:, :, y, x_] = np.einsum('ncij,ocij->no', patch, kernel) + bias
+    return np.maximum(out, 0)
+
+
+class TestPolicyValueNetwork(unittest.TestCase):
+    '''
+    Test case for the NumPy policy/value network
+    '''
+    def setUp(self):
+        self.board_size = 5
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False
+        }
+
+        self.network = PolicyValueNetwork.initialize(num_channels=8, num_layers=2, seed=0)
+
+    def _random_boards(self, num_games):
+        rng = np.random.default_rng(1)
+        return rng.integers(0, 3, (num_games, self.board_size, self.board_size), dtype=np.int8)
+
+    def test__encode_boards(self):
+        boards = np.array([[[Stone.BLACK, Stone.WHITE], [Stone.EMPTY, Stone.EMPTY]]])
+        planes = encode_boards(boards, Stone.WHITE)
+        self.assertEqual(planes[0, 0].tolist(), [[0, 1], [0, 0]])
+        self.assertEqual(planes[0, 1].tolist(), [[1, 0], [0, 0]])
+        self.assertEqual(planes[0, 2].tolist(), [[0, 0], [1, 1]])
+
+    def test__matches_reference(self):
+        boards = self._random_boards(3)
+        planes = encode_boards(boards)
+        weights = self.network.weights
+        x = planes
+        for i in range(self.network.num_layers):
+            x = reference_conv(x, weights[f'conv_w_{i}'], weights[f'conv_b_{i}'])
+        logits = np.concatenate([
+            np.einsum('nchw,c->nhw', x, weights['policy_w']).reshape(3, -1) + weights['policy_b'],
+            x.mean(axis=(2, 3)) @ weights['pass_w'][:, None] + weights['pass_b']], axis=1)
+        expected_policy = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+        expected_value = np.tanh(x.mean(axis=(2, 3)) @ weights['value_w'] + weights['value_b'])
+
+        policy, value = self.network.predict_batch(boards)
+        self.assertTrue(np.allclose(policy, expected_policy, atol=1e-5))
+        self.assertTrue(np.allclose(value, expected_value, atol=1e-5))
+
+    def test__batch_matches_single(self):
+        boards = self._random_boards(4)
+        stones = np.array([Stone.BLACK, Stone.WHITE, Stone.BLACK, Stone.WHITE])
+        policy, value = self.network.predict_batch(boards, stones)
+        self.assertEqual(policy.shape, (4, self.board_size ** 2 + 1))
+        for i in range(4):
+            single_policy, single_value = self.network.predict_batch(boards[i:i + 1], stones[i])
+            self.assertTrue(np.allclose(policy[i], single_policy[0], atol=1e-6))
+            self.assertTrue(np.allclose(value[i], single_value[0], atol=1e-6))
+
+    def test__save_load(self):
+        boards = self._random_boards(2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights.npz')
+            self.network.save(path)
+            loaded = PolicyValueNetwork.load(path)
+        for expected, actual in zip(self.network.predict_batch(boards), loaded.predict_batch(boards)):
+            self.assertTrue(np.array_equal(expected, actual))
+
+    def test__shared_by_cache_settings(self):
+        '''
+        Players loading the same weights share a cache only if their cache settings match
+        '''
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'weights.npz')
+        self.network.save(path)
+        config = dict(self.configs, cnn_weights=path, cnn_cache_entries=10)
+        first, second = ImageCNNAI(config), ImageCNNAI(config)
+        self.assertIs(first.cache, second.cache)
+        for changes in ({'cnn_cache_entries': 20}, {'cnn_cache_symmetry': False}):
+            other = ImageCNNAI(dict(config, **changes))
+            self.assertIsNot(other.cache, first.cache)
+            self.assertEqual(other.cache.max_entries, changes.get('cnn_cache_entries', 10))
+            self.assertEqual(other.cache.symmetry, changes.get('cnn_cache_symmetry', True))
+
+    def test__wrong_planes(self):
+        with self.assertRaises(ValueError):
+            self.network.predict_planes(np.zeros((1, 4, 5, 5)))
+
+    def test__plays_legal_game(self):
+        ui = GameUI(dict(self.configs, seed=0, max_moves=60), 'AI 3', 'AI 3', render=False)
+        ui.game.place_black(2, 2)
+        ui.turn = Stone.WHITE
+        move = ui.players[Stone.WHITE].nextMove(ui)
+        self.assertTrue(move == 'pass' or move in ui.game.get_legal_actions(Stone.WHITE))
+        ui.play()
@@ -0,0 +1,70 @@
+import random
+import unittest
+from src.game import Game
+from src.utils import Stone
+from src.playout import PlayoutPolicy
+
+class TestPlayoutPolicy(unittest.TestCase):
+    '''
+    Test case for the eye-aware light playout policy
+    '''
+    def setUp(self):
+        self.board_size = 5
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False
+        }
+
+        self.game = Game(self.configs)
+        self.policy = PlayoutPolicy(random.Random(0))
+
+    def test__corner_eye(self):
+        self.game.place_black(0, 1)
+        self.assertFalse(PlayoutPolicy.is_eye(self.game, Stone.BLACK, 0, 0))
+        self.game.place_black(1, 0)
+        self.assertTrue(PlayoutPolicy.is_eye(self.game, Stone.BLACK, 0, 0))
+        self.assertFalse(PlayoutPolicy.is_eye(self.game, Stone.WHITE, 0, 0))
+        self.game.place_white(1, 1)
+        self.assertFalse(PlayoutPolicy.is_eye(self.game, Stone.BLACK, 0, 0))
+
+    def test__false_eye(self):
+        for y, x in [(1, 2), (2, 1), (2, 3), (3, 2)]:
+            self.game.place_black(y, x)
+        self.assertTrue(PlayoutPolicy.is_eye(self.game, Stone.BLACK, 2, 2))
+        self.game.place_white(1, 1)
+        self.assertTrue(PlayoutPolicy.is_eye(self.game, Stone.BLACK, 2, 2))
+        self.game.place_white(3, 3)
+        self.assertFalse(PlayoutPolicy.is_eye(self.game, Stone.BLACK, 2, 2))
+
+    def test__never_fills_own_eye(self):
+        for y, x in [(0, 1), (1, 0), (1, 1)]:
+            self.game.place_black(y, x)
+        for _ in range(50):
+            move = self.policy.select_move(self.game, Stone.BLACK)
+            self.assertNotEqual(move, (0, 0))
+            self.assertIn(move, self.game.get_legal_actions(Stone.BLACK))
+
+    def test__passes_when_only_eyes_remain(self):
+        game = Game(dict(self.configs, board_size=3))
+        for y, x in [(0, 1), (1, 0), (1, 1), (1, 2), (2, 1)]:
+            game.place_black(y, x)
+        self.assertEqual(len(game.get_legal_actions(Stone.BLACK)), 4)
+        self.assertIsNone(self.policy.select_move(game, Stone.BLACK))
+
+    def test__random_games(self):
+        game = Game(dict(self.configs, board_size=9))
+        stone = Stone.BLACK
+        for _ in range(300):
+            if game.is_over():
+                break
+            move = self.policy.select_move(game, stone)
+            if move is None:
+                game.pass_turn()
+            else:
+                self.assertFalse(PlayoutPolicy.is_eye(game, stone, *move))
+                game._place_stone(stone, *move)
+                game.count_pass = 0
+            stone = Stone.WHITE if stone == Stone.BLACK else Stone.BLACK
+        self.assertTrue(game.is_over())
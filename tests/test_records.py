@@ -0,0 +1,121 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from src.game import Game
+from src.records import (RecordStore, encode_moves, decode_moves, encode_result,
+                         decode_result, iter_tournament, PASS, RESIGN, WHITE_BIT, main)
+from src.sgf import GameRecord, write_sgf
+from src.tournament import run_tournament
+from src.utils import Stone
+
+class TestRecordStore(unittest.TestCase):
+    '''
+    Test case for the binary game record store
+    '''
+    def setUp(self):
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': 7,
+                        'enable_self_destruct': False
+        }
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'store')
+
+    def _random_record(self, seed, board_size=7, result=None):
+        game = Game(dict(self.configs, board_size=board_size))
+        rng = random.Random(seed)
+        stone = Stone.BLACK
+        for _ in range(40):
+            move = game.sample_legal_move(stone, rng)
+            if move is None:
+                game.pass_turn(stone)
+            else:
+                game.try_play(stone, *move)
+            stone = Stone.WHITE if stone == Stone.BLACK else Stone.BLACK
+        return GameRecord.from_game(game, result, f'player {seed}', 'AI 2')
+
+    def test__codes(self):
+        moves = [(Stone.BLACK, (0, 0)), (Stone.WHITE, None), (Stone.WHITE, (2, 3))]
+        codes = encode_moves(moves, 5, resigned=Stone.BLACK)
+        self.assertEqual(codes.dtype, np.dtype('<u2'))
+        self.assertEqual(codes.tolist(), [0, PASS | WHITE_BIT, 13 | WHITE_BIT, RESIGN])
+        self.assertEqual(decode_moves(codes, 5), moves)
+
+    def test__results(self):
+        for result in [None, '0', 'B+3.5', 'W+12', 'B+R', 'W+T', 'B+F', 'W+']:
+            self.assertEqual(decode_result(*encode_result(result)), result)
+        self.assertEqual(decode_result(*encode_result('W+Resign')), 'W+R')
+        self.assertIsNone(decode_result(*encode_result('Void')))
+
+    def test__append_and_read(self):
+        records = [self._random_record(0, result='B+3'),
+                   self._random_record(1, board_size=9, result='W+R'),
+                   GameRecord(5, [(Stone.WHITE, (1, 1))], None, None, 'AI 2', 6.5,
+                              [(Stone.BLACK, (0, 0)), (Stone.BLACK, (4, 4))])]
+        with RecordStore(self.path, 'a') as store:
+            self.assertEqual(len(store), 0)
+            self.assertEqual(store.append(records[0]), 0)
+            self.assertEqual(store[0], records[0])
+            self.assertEqual(store.extend(records[1:]), 2)
+            self.assertEqual(len(store), 3)
+
+        with RecordStore(self.path) as store:
+            self.assertEqual(list(store), records)
+            self.assertEqual(store.players, ['player 0', 'AI 2', 'player 1'])
+            self.assertEqual(store.index['board_size'].tolist(), [7, 9, 5])
+            self.assertEqual(len(store.game_codes(1)), len(records[1].moves) + 1)
+            self.assertEqual(store.game_codes(1)[-1], RESIGN)
+            with self.assertRaises(ValueError):
+                store.append(records[0])
+
+        # appending to an existing store keeps the games and players
+        with RecordStore(self.path, 'a') as store:
+            store.append(records[0])
+            self.assertEqual(store[3], records[0])
+            self.assertEqual(len(store.players), 3)
+
+    def test__position(self):
+        record = self._random_record(2)
+        with RecordStore(self.path, 'a') as store:
+            store.append(self._random_record(3))
+            store.append(record)
+            for k in (0, 10, len(record.moves)):
+                game = Game(self.configs)
+                self.assertEqual(store.position(1, k, game), k)
+                expected = Game(self.configs)
+                expected.replay(record.moves[:k])
+                self.assertEqual(game.board[:, :].tolist(), expected.board[:, :].tolist())
+                self.assertEqual(game.position_hash, expected.position_hash)
+
+    def test__not_a_store(self):
+        os.makedirs(self.path)
+        with open(os.path.join(self.path, 'index.bin'), 'wb') as f:
+            f.write(b'something else')
+        with self.assertRaises(ValueError):
+            RecordStore(self.path)
+
+    def test__converters(self):
+        records = [self._random_record(seed, result='B+1') for seed in range(3)]
+        write_sgf(os.path.join(self.directory, 'games.sgf'), records)
+        main(['from-sgf', os.path.join(self.directory, 'games.sgf'), '--output', self.path])
+        with RecordStore(self.path) as store:
+            self.assertEqual(list(store), records)
+
+        output = os.path.join(self.directory, 'results.jsonl')
+        tournament_store = os.path.join(self.directory, 'tournament')
+        config = dict(self.configs, board_size=5, max_moves=40)
+        run_tournament(config, 'AI 2', 'AI 2', 3, output, workers=1, records=tournament_store)
+        converted = os.path.join(self.directory, 'converted')
+        main(['from-tournament', output, '--output', converted])
+        with RecordStore(tournament_store) as written, RecordStore(converted) as store:
+            self.assertEqual(list(store), list(iter_tournament(output)))
+            self.assertEqual(list(written), list(store))
+            with open(output) as f:
+                results = [json.loads(line) for line in f]
+            self.assertEqual([len(record.moves) for record in store],
+                             [result['moves'] for result in results])
@@ -0,0 +1,73 @@
+import random
+import unittest
+import numpy as np
+from src.game import Game
+from src.utils import Stone
+from src.scoring import label_components, score_boards, score_games
+from tests.utils import capture1, capture2, capture3
+
+class TestBatchedScoring(unittest.TestCase):
+    '''
+    Test case for the vectorized territory scoring
+    '''
+    def setUp(self):
+        self.board_size = 7
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False
+        }
+
+    def _make_game(self, scenario=None):
+        game = Game(self.configs)
+        if scenario is not None:
+            scenario(game)
+        return game
+
+    def test__label_components(self):
+        mask = np.array([[[1, 1, 0],
+                          [0, 0, 1],
+                          [1, 0, 1]],
+                         [[0, 1, 1],
+                          [1, 0, 0],
+                          [1, 1, 0]]], dtype=bool)
+        expected = np.array([[[0, 0, -1],
+                              [-1, -1, 5],
+                              [6, -1, 5]],
+                             [[-1, 10, 10],
+                              [12, -1, -1],
+                              [12, 12, -1]]])
+        self.assertTrue(np.array_equal(label_components(mask), expected))
+
+    def test__scenarios(self):
+        games = [self._make_game(scenario) for scenario in [capture1, capture2, capture3]]
+        scores = score_games(games)
+        self.assertEqual(scores[0], {Stone.BLACK: -1, Stone.WHITE: 45})
+        self.assertEqual(scores[1], {Stone.BLACK: -3, Stone.WHITE: 42})
+        self.assertEqual(scores[2], {Stone.BLACK: -1, Stone.WHITE: 43})
+
+    def test__neutral(self):
+        game = self._make_game(capture2)
+        game.place_black(1, 1)
+        self.assertEqual(score_games([game]), [game.get_scores()])
+
+    def test__empty_board(self):
+        black, white = score_boards(np.zeros((2, 5, 5), dtype=np.int8))
+        self.assertEqual(list(black), [0, 0])
+        self.assertEqual(list(white), [0, 0])
+
+    def test__random_games(self):
+        rng = random.Random(0)
+        games = []
+        for _ in range(20):
+            game = self._make_game()
+            stone = Stone.BLACK
+            for _ in range(rng.randrange(80)):
+                action = game.sample_legal_move(stone, rng)
+                if action is None:
+                    break
+                game._place_stone(stone, *action)
+                stone = Stone.WHITE if stone == Stone.BLACK else Stone.BLACK
+            games.append(game)
+        self.assertEqual(score_games(games), [game.get_scores() for game in games])
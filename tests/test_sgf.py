@@ -0,0 +1,191 @@
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from src.game import Game, GameUI
+from src.sgf import (GameRecord, parse_sgf, read_sgf, write_sgf, iter_records, iter_trees,
+                     replay_records, result_string)
+from src.utils import Stone, MoveStatus
+from src.exceptions import SGFException
+
+# two game trees with escapes, variations and brackets in values
+SGF_TEXT = '''(;GM[1]FF[4]SZ[9]KM[6.5]PB[Black \\] name]PW[White]RE[W+2.5]AB[aa:ab]
+                  ;W[cc];B[];W[tt]
+                  (;B[dd];W[ee])
+                  (;B[ff]C[a variation (skipped) \\]])
+                 )
+                 (;SZ[5];B[aa];W[bb])'''
+
+def position(game):
+    '''
+    Return the board, ko, hash, position history and captures of a game's snapshot
+    '''
+    state = game.snapshot()[2]
+    return state[0], state[3], state[4], state[5], state[6]
+
+
+class TestSGF(unittest.TestCase):
+    '''
+    Test case for SGF import, export and bulk replay
+    '''
+    def setUp(self):
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': 7,
+                        'enable_self_destruct': False
+        }
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _random_game(self, seed, board_size=7):
+        game = Game(dict(self.configs, board_size=board_size))
+        rng = random.Random(seed)
+        stone = Stone.BLACK
+        for _ in range(60):
+            move = game.sample_legal_move(stone, rng)
+            if move is None or rng.random() < 0.05:
+                game.pass_turn(stone)
+            else:
+                game.try_play(stone, *move)
+            stone = Stone.WHITE if stone == Stone.BLACK else Stone.BLACK
+        return game
+
+    def test__parse(self):
+        first, second = parse_sgf(SGF_TEXT)
+        self.assertEqual(first.board_size, 9)
+        self.assertEqual(first.komi, 6.5)
+        self.assertEqual(first.black, 'Black ] name')
+        self.assertEqual(first.result, 'W+2.5')
+        self.assertEqual(first.setup, [(Stone.BLACK, (0, 0)), (Stone.BLACK, (1, 0))])
+        self.assertEqual(first.moves, [(Stone.WHITE, (2, 2)), (Stone.BLACK, None),
+                                       (Stone.WHITE, None), (Stone.BLACK, (3, 3)),
+                                       (Stone.WHITE, (4, 4))])
+        self.assertEqual(second.board_size, 5)
+        self.assertEqual(second.moves, [(Stone.BLACK, (0, 0)), (Stone.WHITE, (1, 1))])
+
+    def test__stream(self):
+        '''
+        Records read in chunks match the records of the whole text, wherever the chunks split it
+        '''
+        path = os.path.join(self.directory, 'games.sgf')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write('header [ (;SZ[5]C[(\\\\)];B[aa])\r\n' + SGF_TEXT)
+        expected = read_sgf(path)
+        self.assertEqual(len(expected), 3)
+        for chunk_size in range(1, 20):
+            self.assertEqual(list(iter_records([path], chunk_size)), expected)
+        self.assertEqual(list(iter_trees(['(;B[a', 'a]', ')x(;W[\\', ']])'])),
+                         ['(;B[aa])', '(;W[\\]])'])
+        for chunks in (['(;B[aa]'], ['(;B[aa])', ')']):
+            with self.assertRaises(SGFException):
+                list(iter_trees(chunks))
+
+    def test__invalid(self):
+        for text in ['(;SZ[9];B[zz])', '(;SZ[9];B[aa]', '(;SZ[x])', ';B[aa])']:
+            with self.assertRaises(SGFException):
+                parse_sgf(text)
+
+    def test__round_trip(self):
+        game = self._random_game(0)
+        record = GameRecord.from_game(game, result_string(game.get_scores()), 'AI 2', 'AI 2')
+        self.assertEqual(len(record.moves), 60)
+        self.assertIn((Stone.BLACK, None), record.moves + [(Stone.BLACK, None)])
+
+        path = os.path.join(self.directory, 'game.sgf')
+        write_sgf(path, [record])
+        restored, = read_sgf(path)
+        self.assertEqual(restored, record)
+
+        replayed = Game(self.configs)
+        self.assertEqual(restored.replay(replayed), len(record.moves))
+        self.assertEqual(position(replayed), position(game))
+        self.assertEqual(replayed.moves, game.moves)
+
+    def test__reset(self):
+        '''
+        A reset game replays like a fresh one
+        '''
+        game = self._random_game(1)
+        fresh = Game(self.configs)
+        game.reset()
+        self.assertEqual(position(game), position(fresh))
+        self.assertEqual(game.count_pass, 0)
+        self.assertEqual(game.moves, [])
+        self.assertEqual(game.legal_mask(Stone.WHITE).tolist(), fresh.legal_mask(Stone.WHITE).tolist())
+
+        record = GameRecord.from_game(self._random_game(2))
+        record.replay(game)
+        record.replay(fresh)
+        self.assertEqual(position(game), position(fresh))
+        self.assertEqual(sorted(game.get_legal_actions(Stone.BLACK)),
+                         sorted(fresh.get_legal_actions(Stone.BLACK)))
+
+    def test__illegal_move(self):
+        record = GameRecord(5, [(Stone.BLACK, (0, 0)), (Stone.WHITE, (0, 0)),
+                                (Stone.BLACK, (1, 1))])
+        self.assertEqual(record.replay(Game(dict(self.configs, board_size=5))), 1)
+
+    def test__replay_matches_try_play(self):
+        '''
+        Replay plays exactly the moves try_play accepts and leaves the same position
+        '''
+        statuses = set()
+        for seed in range(20):
+            rng = random.Random(seed)
+            board_size = rng.choice([3, 4, 5])
+            config = dict(self.configs, board_size=board_size, enable_superko=seed % 2 == 1)
+            expected = Game(config)
+            game = Game(config)
+            for _ in range(100):
+                stone = rng.choice([Stone.BLACK, Stone.WHITE])
+                empty = [(int(y), int(x)) for y, x in zip(*np.nonzero(game.board[:, :] == Stone.EMPTY))]
+                if rng.random() < 0.05:
+                    move = None
+                elif empty and rng.random() < 0.8:
+                    move = rng.choice(empty)
+                else:
+                    move = (rng.randrange(-1, board_size + 1), rng.randrange(board_size))
+                if move is None:
+                    expected.pass_turn(stone)
+                    status = MoveStatus.OK
+                else:
+                    status = expected.try_play(stone, *move)
+                statuses.add(status)
+                self.assertEqual(game.replay([(stone, move)]), int(status == MoveStatus.OK))
+
+            self.assertEqual(position(game), position(expected))
+            self.assertEqual(game.moves, expected.moves)
+            for stone in (Stone.BLACK, Stone.WHITE):
+                self.assertEqual(game.legal_mask(stone).tolist(), expected.legal_mask(stone).tolist())
+        self.assertEqual(len(statuses), 5)
+
+    def test__bulk_replay(self):
+        records = [GameRecord.from_game(self._random_game(seed, board_size))
+                   for seed, board_size in enumerate([7, 9, 7, 5])]
+        write_sgf(os.path.join(self.directory, 'a.sgf'), records[:2])
+        os.mkdir(os.path.join(self.directory, 'more'))
+        write_sgf(os.path.join(self.directory, 'more', 'b.sgf'), records[2:])
+        with open(os.path.join(self.directory, 'notes.txt'), 'w') as f:
+            f.write('not a record')
+
+        self.assertEqual(list(iter_records([self.directory])), records)
+        records.append(GameRecord(5, [(Stone.BLACK, (0, 0)), (Stone.WHITE, (0, 0))]))
+        stats = replay_records(records, self.configs)
+        self.assertEqual(stats['games'], 5)
+        self.assertEqual(stats['invalid'], 1)
+        self.assertEqual(stats['positions'], 4 * 60 + 1)
+        self.assertGreater(stats['positions_per_second'], 0)
+
+    def test__game_ui_record(self):
+        ui = GameUI(dict(self.configs, seed=0, max_moves=30), 'AI 2', 'AI 2', render=False)
+        self.assertIsNone(ui.record().result)
+        scores = ui.play()
+        record = ui.record()
+        self.assertEqual(len(record.moves), ui.num_moves)
+        self.assertEqual(record.result, result_string(scores))
+        self.assertEqual(record.black, 'AI 2')
+        self.assertEqual(parse_sgf(record.to_sgf()), [record])
+        self.assertEqual(result_string({Stone.BLACK: 3, Stone.WHITE: 3}), '0')
+        self.assertEqual(result_string({Stone.BLACK: 1, Stone.WHITE: 3.5}), 'W+2.5')
@@ -0,0 +1,79 @@
+import pickle
+import random
+import unittest
+from src.game import Game
+from src.utils import Stone
+from tests.utils import capture2, get_state
+
+def play_random(game, stone, rng, num_moves):
+    '''
+    Play random legal moves, returning the stone to play next
+    '''
+    for _ in range(num_moves):
+        game.make_move(stone, game.sample_legal_move(stone, rng))
+        stone = Stone.WHITE if stone == Stone.BLACK else Stone.BLACK
+    return stone
+
+
+class TestSnapshot(unittest.TestCase):
+    '''
+    Test case for snapshots and clones of a game
+    '''
+    def setUp(self):
+        self.board_size = 7
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False
+        }
+
+        self.game = Game(self.configs)
+
+    def test__clone(self):
+        capture2(self.game)
+        clone = self.game.clone()
+        self.assertEqual(get_state(clone), get_state(self.game))
+
+        state = get_state(self.game)
+        clone.place_black(0, 0)
+        self.assertEqual(get_state(self.game), state)
+        self.assertTrue(self.game.legal_mask(Stone.BLACK)[0, 0])
+
+    def test__restore(self):
+        capture2(self.game)
+        snapshot = self.game.snapshot()
+        state = get_state(self.game)
+        play_random(self.game, Stone.BLACK, random.Random(0), 30)
+        self.game.restore(snapshot)
+        self.assertEqual(get_state(self.game), state)
+
+    def test__pickle(self):
+        for backend in ('numpy', 'padded'):
+            configs = dict(self.configs, board_backend=backend)
+            game = Game(configs)
+            play_random(game, Stone.BLACK, random.Random(1), 40)
+            restored = Game(configs)
+            restored.restore(pickle.loads(pickle.dumps(game.snapshot())))
+            self.assertEqual(get_state(restored), get_state(game))
+
+    def test__board_size_mismatch(self):
+        game = Game(dict(self.configs, board_size=9))
+        with self.assertRaises(ValueError):
+            game.restore(self.game.snapshot())
+
+    def test__random_games(self):
+        for self_destruct in (False, True):
+            configs = dict(self.configs, enable_self_destruct=self_destruct)
+            rng = random.Random(self_destruct)
+            game = Game(configs)
+            stone = Stone.BLACK
+            for _ in range(10):
+                stone = play_random(game, stone, rng, rng.randrange(10))
+
+                # a clone played on with the same moves stays identical
+                clone = game.clone()
+                seed = rng.random()
+                play_random(game, stone, random.Random(seed), 10)
+                play_random(clone, stone, random.Random(seed), 10)
+                self.assertEqual(get_state(clone), get_state(game))
@@ -0,0 +1,127 @@
+import json
+import random
+import time
+import unittest
+import numpy as np
+from src.game import GameUI
+from src.telemetry import LatencyHistogram, BUCKET_RATIO
+from src.tournament import aggregate_telemetry
+from src.utils import Stone
+
+class SlowPlayer:
+    '''
+    Player that takes longer than the deadline on its first moves, then passes
+    '''
+    def __init__(self, num_slow_moves, delay):
+        self.num_slow_moves = num_slow_moves
+        self.delay = delay
+        self.calls = 0
+
+    def nextMove(self, ui):
+        self.calls += 1
+        if self.calls <= self.num_slow_moves:
+            time.sleep(self.delay)
+            return ui.game.get_legal_actions(ui.turn)[0]
+        return 'pass'
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    '''
+    Test case for the streaming latency histogram
+    '''
+    def test__quantiles(self):
+        rng = random.Random(0)
+        samples = [rng.lognormvariate(-7, 1.5) for _ in range(5000)]
+        histogram = LatencyHistogram()
+        for sample in samples:
+            histogram.add(sample)
+
+        self.assertEqual(histogram.count, 5000)
+        self.assertAlmostEqual(histogram.total, sum(samples))
+        self.assertEqual(histogram.max, max(samples))
+        for q in (0.5, 0.95, 0.99):
+            exact = np.quantile(samples, q)
+            self.assertTrue(exact / BUCKET_RATIO <= histogram.quantile(q) <= exact * BUCKET_RATIO)
+        summary = histogram.summary()
+        self.assertLessEqual(summary['p50'], summary['p95'])
+        self.assertLessEqual(summary['p99'], summary['max'])
+
+    def test__empty(self):
+        self.assertEqual(LatencyHistogram().summary(),
+                         {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0})
+
+    def test__merge_and_serialize(self):
+        first, second, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for i in range(1, 200):
+            sample = i * 1e-4
+            (first if i % 3 else second).add(sample)
+            combined.add(sample)
+        second.add(0)
+        combined.add(0)
+
+        restored = LatencyHistogram.from_dict(json.loads(json.dumps(second.to_dict())))
+        merged = LatencyHistogram().merge(first).merge(restored)
+        self.assertEqual(merged.buckets, combined.buckets)
+        self.assertEqual((merged.count, merged.max), (combined.count, combined.max))
+        self.assertAlmostEqual(merged.total, combined.total)
+        self.assertEqual(merged.quantile(0.95), combined.quantile(0.95))
+
+
+class TestGameTelemetry(unittest.TestCase):
+    '''
+    Test case for the per-move latencies and deadline of GameUI
+    '''
+    def setUp(self):
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': 5,
+                        'enable_self_destruct': False,
+                        'max_moves': 20,
+                        'seed': 0
+        }
+
+    def test__telemetry(self):
+        ui = GameUI(self.configs, 'AI 2', 'AI 2', render=False)
+        ui.play()
+        telemetry = json.loads(json.dumps(ui.telemetry()))
+        self.assertEqual(telemetry['black']['player'], 'AI 2')
+        moves = telemetry['black']['think']['count'] + telemetry['white']['think']['count']
+        self.assertGreaterEqual(moves, ui.num_moves)
+        self.assertEqual(telemetry['black']['apply']['count'], telemetry['black']['think']['count'])
+        self.assertEqual(telemetry['render']['count'], 0)
+        self.assertEqual(telemetry['black']['timeouts'], 0)
+
+        players = aggregate_telemetry([{'telemetry': telemetry}] * 2)
+        self.assertEqual(list(players), ['AI 2'])
+        self.assertEqual(players['AI 2']['think'].count, 2 * moves)
+
+    def test__deadline(self):
+        '''
+        Moves returned after the deadline are replaced by passes
+        '''
+        ui = GameUI(dict(self.configs, move_deadline=0.01), 'AI 2', 'AI 2', render=False)
+        ui.players[Stone.BLACK] = SlowPlayer(num_slow_moves=2, delay=0.03)
+        ui.play()
+        self.assertEqual(ui.num_timeouts, {Stone.BLACK: 2, Stone.WHITE: 0})
+        self.assertFalse((ui.game.board[:, :] == Stone.BLACK).any())
+        self.assertGreaterEqual(ui.think_times[Stone.BLACK].max, 0.03)
+
+    def test__no_deadline(self):
+        ui = GameUI(self.configs, 'AI 2', 'AI 2', render=False)
+        ui.players[Stone.BLACK] = SlowPlayer(num_slow_moves=1, delay=0.01)
+        ui.play()
+        self.assertEqual(ui.num_timeouts[Stone.BLACK], 0)
+        self.assertTrue((ui.game.board[:, :] == Stone.BLACK).any())
+
+    def test__deadline_shortens_search(self):
+        '''
+        MCTS players search within the time left before the deadline instead of their time budget
+        '''
+        config = dict(self.configs, mcts_time=5.0, mcts_playouts=None, move_deadline=0.2,
+                      max_moves=4)
+        ui = GameUI(config, 'AI 4', 'AI 4', render=False)
+        self.assertIsNone(ui.time_left())
+        ui.play()
+        self.assertEqual(ui.num_timeouts, {Stone.BLACK: 0, Stone.WHITE: 0})
+        self.assertLess(ui.think_times[Stone.BLACK].max, 0.2)
+        self.assertIsNone(ui.time_left())
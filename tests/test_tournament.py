@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+from src.game import GameUI
+from src.tournament import play_game, run_tournament
+
+class TestTournament(unittest.TestCase):
+    '''
+    Test case for headless games and the tournament runner
+    '''
+    def setUp(self):
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': 5,
+                        'enable_self_destruct': False,
+                        'max_moves': 75
+        }
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'results.jsonl')
+
+    def _read_results(self):
+        with open(self.output) as f:
+            return sorted((json.loads(line) for line in f), key=lambda result: result['game'])
+
+    def test__headless_game(self):
+        ui = GameUI(dict(self.configs, seed=0), 'AI 2', 'AI 2', render=False)
+        scores = ui.play()
+        self.assertEqual(scores, ui.game.get_scores())
+        self.assertTrue(0 < ui.num_moves <= 75)
+
+    def test__deterministic_game(self):
+        first = play_game(self.configs, 'AI 2', 'AI 2', 0, 1234)
+        second = play_game(self.configs, 'AI 2', 'AI 2', 0, 1234)
+        for result in first, second:
+            del result['wall_time'], result['telemetry']
+        self.assertEqual(first, second)
+
+    def test__workers(self):
+        wins = run_tournament(self.configs, 'AI 2', 'AI 2', 6, self.output, workers=1, seed=3)
+        self.assertEqual(sum(wins.values()), 6)
+        serial = self._read_results()
+        os.remove(self.output)
+
+        run_tournament(self.configs, 'AI 2', 'AI 2', 6, self.output, workers=2, seed=3)
+        parallel = self._read_results()
+        self.assertEqual(len(parallel), 6)
+        for result in serial + parallel:
+            del result['wall_time'], result['telemetry']
+        self.assertEqual(serial, parallel)
+
+    def test__instrumented_game(self):
+        result = play_game(self.configs, 'AI 2', 'AI 2', 0, 1234, instrumented=True)
+        counters = result['instrumentation']
+        self.assertEqual(counters['get_scores']['calls'], 1)
+        self.assertGreater(counters['resolve_board']['calls'], 0)
+
+        plain = play_game(self.configs, 'AI 2', 'AI 2', 0, 1234)
+        self.assertNotIn('instrumentation', plain)
+        self.assertEqual(plain['moves'], result['moves'])
@@ -0,0 +1,88 @@
+import random
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from src.game import Game
+from src.utils import Stone
+from src.transposition import TranspositionTable, table_key, PASS, NO_MOVE, BUCKET_SIZE
+from src.AI4.AI4 import MCTS, Node, search_root
+
+def store_in_worker(name, keys):
+    table = TranspositionTable.attach(name)
+    for key in keys:
+        table.store(key, 5, 0.25, 7)
+    return table.stores
+
+def probe_in_worker(name, keys):
+    table = TranspositionTable.attach(name)
+    return [table.probe(key) for key in keys]
+
+
+class TestTranspositionTable(unittest.TestCase):
+    '''
+    Test case for the shared memory transposition table
+    '''
+    def setUp(self):
+        self.table = TranspositionTable.create(64)
+
+    def tearDown(self):
+        self.table.close()
+
+    def test__store_probe(self):
+        key = random.Random(0).getrandbits(64)
+        self.assertIsNone(self.table.probe(key))
+        self.table.store(key, 10, 0.75, PASS)
+        self.assertEqual(self.table.probe(key), (10, 0.75, PASS))
+        self.table.store(key, 3, 0.5, 4)
+        self.assertEqual(self.table.probe(key), (10, 0.75, PASS))
+        self.table.store(key, 12, 0.5, 4)
+        self.assertEqual(self.table.probe(key), (12, 0.5, 4))
+        self.assertEqual(self.table.stats['hits'], 3)
+
+    def test__side_to_move(self):
+        self.assertNotEqual(table_key(123, Stone.BLACK), table_key(123, Stone.WHITE))
+
+    def test__replacement(self):
+        # keys of one bucket: the least visited record makes room for a new key
+        keys = [64 * i + 5 for i in range(BUCKET_SIZE + 1)]
+        for visits, key in enumerate(keys[:-1], 1):
+            self.table.store(key, visits, 0.0, NO_MOVE)
+        self.table.store(keys[-1], 100, 0.0, NO_MOVE)
+        self.assertIsNone(self.table.probe(keys[0]))
+        for key in keys[1:]:
+            self.assertIsNotNone(self.table.probe(key))
+
+    def test__torn_record(self):
+        key = 1234567
+        self.table.store(key, 10, 0.5, 3)
+        slot = key % self.table.num_entries
+        self.table._words[slot, 1] += 1
+        self.assertIsNone(self.table.probe(key))
+
+    def test__across_processes(self):
+        keys = [random.Random(i).getrandbits(64) for i in range(20)]
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(executor.submit(store_in_worker, self.table.name, keys).result(), 20)
+        # a new worker process still finds the records of the first one
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            records = executor.submit(probe_in_worker, self.table.name, keys).result()
+        self.assertEqual(records, [(5, 0.25, 7)] * len(keys))
+
+    def test__search_shares_table(self):
+        configs = {'black_stone': 'b',
+                   'white_stone': 'w',
+                   'board_size': 5,
+                   'enable_self_destruct': False
+        }
+        game = Game(configs)
+        search = MCTS(rng=random.Random(0), table=self.table)
+        root = Node(None, Stone.WHITE, None, game.position_hash)
+        search.search(game, root, Stone.BLACK, max_playouts=50)
+        visits, value, move = self.table.probe(table_key(root.position_hash, Stone.BLACK))
+        self.assertEqual(visits, 50)
+        best = max(root.children.values(), key=lambda child: child.visits).move
+        self.assertEqual(move, PASS if best is None else best[0] * 5 + best[1])
+
+        # another search starts from the recorded statistics
+        search_root(configs, game.snapshot(), Stone.BLACK, 1.4, None, 1,
+                    max_playouts=20, table_name=self.table.name)
+        self.assertGreater(self.table.hits, 1)
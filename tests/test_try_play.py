@@ -0,0 +1,84 @@
+import random
+import unittest
+from src.game import Game
+from src.utils import Stone, MoveStatus
+from src.exceptions import SelfDestructException, KoException, NewException
+
+def expected_status(game, stone, y, x):
+    '''
+    Find the status of a move by making it on a clone with the exception-raising group manager
+    '''
+    if not game.is_within_bounds(y, x):
+        return MoveStatus.OUT_OF_BOUNDS
+    trial = game.clone()
+    try:
+        trial.gm.make_move(stone, y, x)
+    except SelfDestructException:
+        return MoveStatus.SUICIDE
+    except KoException:
+        return MoveStatus.KO
+    except Exception:
+        return MoveStatus.OCCUPIED
+    return MoveStatus.OK
+
+
+class TestTryPlay(unittest.TestCase):
+    '''
+    Test case for the exception-free move API
+    '''
+    def setUp(self):
+        self.board_size = 5
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False
+        }
+
+        self.game = Game(self.configs)
+
+    def test__statuses(self):
+        self.assertEqual(self.game.try_play(Stone.BLACK, 5, 0), MoveStatus.OUT_OF_BOUNDS)
+        self.assertEqual(self.game.try_play(Stone.BLACK, -1, 0), MoveStatus.OUT_OF_BOUNDS)
+        self.assertEqual(self.game.try_play(Stone.BLACK, 0, 1), MoveStatus.OK)
+        self.assertEqual(self.game.try_play(Stone.WHITE, 0, 1), MoveStatus.OCCUPIED)
+        self.assertEqual(self.game.try_play(Stone.BLACK, 1, 0), MoveStatus.OK)
+        self.assertEqual(self.game.try_play(Stone.WHITE, 0, 0), MoveStatus.SUICIDE)
+        self.assertEqual(self.game.board[0, 0], Stone.EMPTY)
+
+    def test__ko(self):
+        for y, x in [(0, 0), (1, 1), (0, 2)]:
+            self.game.place_black(y, x)
+        self.game.place_white(1, 0)
+        self.game.place_white(0, 1)
+        hash_before = self.game.position_hash
+        self.assertEqual(self.game.try_play(Stone.BLACK, 0, 0), MoveStatus.KO)
+        self.assertEqual(self.game.position_hash, hash_before)
+        with self.assertRaises(KoException):
+            self.game.place_black(0, 0)
+
+    def test__wrappers_raise(self):
+        self.game.place_black(0, 1)
+        self.game.place_black(1, 0)
+        with self.assertRaises(NewException):
+            self.game.place_white(0, 0)
+        with self.assertRaisesRegex(Exception, 'occupied'):
+            self.game.place_white(0, 1)
+        with self.assertRaisesRegex(Exception, 'Invalid'):
+            self.game.place_white(9, 9)
+
+    def test__random_games(self):
+        rng = random.Random(0)
+        for config in (self.configs, dict(self.configs, enable_superko=True),
+                       dict(self.configs, enable_self_destruct=True, enable_superko=True)):
+            game = Game(config)
+            stone = Stone.BLACK
+            for _ in range(60):
+                for y in range(-1, self.board_size + 1):
+                    for x in range(-1, self.board_size + 1):
+                        self.assertEqual(game.gm.check_move(stone, y, x),
+                                         expected_status(game, stone, y, x), (y, x))
+                move = game.sample_legal_move(stone, rng)
+                if move is not None and game.try_play(stone, *move) != MoveStatus.OK:
+                    game.pass_turn()
+                stone = Stone.BLACK + Stone.WHITE - stone
@@ -0,0 +1,95 @@
+import random
+import unittest
+from src.game import Game
+from src.utils import Stone
+from tests.utils import get_state
+
+class TestMakeUnmake(unittest.TestCase):
+    '''
+    Test case for taking back moves with the move journal
+    '''
+    def setUp(self):
+        self.board_size = 7
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False
+        }
+
+        self.game = Game(self.configs)
+
+    def test__capture(self):
+        for y, x in [(4, 3), (3, 4), (4, 4)]:
+            self.game.place_black(y, x)
+        for y, x in [(2, 4), (3, 3), (4, 2), (5, 3), (5, 4), (4, 5)]:
+            self.game.place_white(y, x)
+        state = get_state(self.game)
+
+        # white captures the black group as in capture2
+        self.game.make_move(Stone.WHITE, (3, 5))
+        self.assertEqual(self.game.num_black_captured, 3)
+        self.game.unmake_move()
+        self.assertEqual(get_state(self.game), state)
+
+    def test__merge(self):
+        self.game.place_black(3, 2)
+        self.game.place_black(3, 4)
+        self.game.place_black(2, 3)
+        self.game.place_white(4, 3)
+        state = get_state(self.game)
+
+        self.game.make_move(Stone.BLACK, (3, 3))
+        self.assertTrue(self.game.gm.is_same_group(3, 2, 3, 4))
+        self.game.unmake_move()
+        self.assertEqual(get_state(self.game), state)
+        self.assertFalse(self.game.gm.is_same_group(3, 2, 3, 4))
+
+    def test__self_destruct(self):
+        game = Game(dict(self.configs, enable_self_destruct=True))
+        for y, x in [(2, 2), (2, 3), (2, 4), (3, 4), (4, 4), (4, 3), (4, 2), (3, 2)]:
+            game.place_black(y, x)
+        for y, x in [(1, 1), (1, 2), (1, 3), (1, 4), (1, 5),
+                     (2, 5), (3, 5), (4, 5), (5, 5),
+                     (5, 4), (5, 3), (5, 2), (5, 1),
+                     (4, 1), (3, 1), (2, 1)]:
+            game.place_white(y, x)
+        state = get_state(game)
+        game.make_move(Stone.BLACK, (3, 3))
+        self.assertEqual(game.num_black_captured, 9)
+        game.unmake_move()
+        self.assertEqual(get_state(game), state)
+
+    def test__illegal_move(self):
+        self.game.place_white(0, 1)
+        self.game.place_white(1, 0)
+        state = get_state(self.game)
+        with self.assertRaises(Exception):
+            self.game.make_move(Stone.BLACK, (0, 0))
+        self.assertEqual(get_state(self.game), state)
+        self.assertEqual(self.game.gm._undo_stack, [])
+
+    def test__random_games(self):
+        for self_destruct in (False, True):
+            rng = random.Random(self_destruct)
+            game = Game(dict(self.configs, enable_self_destruct=self_destruct))
+            states = []
+            stone = Stone.BLACK
+            for _ in range(150):
+                states.append(get_state(game))
+                move = game.sample_legal_move(stone, rng)
+                if rng.random() < 0.05:
+                    move = None
+                game.make_move(stone, move)
+                stone = Stone.WHITE if stone == Stone.BLACK else Stone.BLACK
+
+                # occasionally take back a few moves and play on from there
+                if rng.random() < 0.1:
+                    for _ in range(rng.randrange(1, 4)):
+                        game.unmake_move()
+                        self.assertEqual(get_state(game), states.pop())
+                        stone = Stone.WHITE if stone == Stone.BLACK else Stone.BLACK
+
+            while states:
+                game.unmake_move()
+                self.assertEqual(get_state(game), states.pop())
@@ -0,0 +1,113 @@
+import unittest
+import numpy as np
+from src.game import Game
+from src.vecgame import VecGame, PASS
+from src.utils import Stone
+from src.exceptions import SelfDestructException, KoException
+from tests.utils import (capture1, capture2, capture3,
+                         self_destruct1, self_destruct2, self_destruct3)
+
+class MoveRecorder(object):
+    '''
+    Stand-in for a game that records the moves of a scenario
+    '''
+    def __init__(self):
+        self.moves = []
+
+    def place_black(self, y, x):
+        self.moves.append((Stone.BLACK, y, x))
+
+    def place_white(self, y, x):
+        self.moves.append((Stone.WHITE, y, x))
+
+
+class TestVecGame(unittest.TestCase):
+    '''
+    Test case for the batched engine, checked against Game
+    '''
+    def setUp(self):
+        self.board_size = 7
+
+        self.configs = {'black_stone': 'b',
+                        'white_stone': 'w',
+                        'board_size': self.board_size,
+                        'enable_self_destruct': False
+        }
+
+    def assertSameState(self, vec_game, i, game):
+        self.assertTrue(np.array_equal(vec_game.boards[i], np.asarray(game.board)))
+        ko = game.gm._ko
+        self.assertEqual(vec_game.ko[i], -1 if ko is None else ko[0] * self.board_size + ko[1])
+        self.assertEqual(vec_game.num_captured[i, Stone.BLACK], game.num_black_captured)
+        self.assertEqual(vec_game.num_captured[i, Stone.WHITE], game.num_white_captured)
+        self.assertEqual(vec_game.count_pass[i], game.count_pass)
+        for stone in (Stone.BLACK, Stone.WHITE):
+            self.assertTrue(np.array_equal(vec_game.legal_masks(stone)[i], game.legal_mask(stone)))
+
+    def _replay(self, scenario, configs):
+        '''
+        Replay a scenario in both engines, expecting the same exception from each
+        '''
+        recorder = MoveRecorder()
+        scenario(recorder)
+        game = Game(configs)
+        vec_game = VecGame(configs, 1)
+        for stone, y, x in recorder.moves:
+            try:
+                game.make_move(stone, (y, x))
+            except (SelfDestructException, KoException) as e:
+                with self.assertRaises(type(e)):
+                    vec_game.step([y * self.board_size + x], stone)
+                continue
+            vec_game.step([y * self.board_size + x], stone)
+            self.assertSameState(vec_game, 0, game)
+        return vec_game, game
+
+    def test__scenarios(self):
+        for self_destruct in (False, True):
+            configs = dict(self.configs, enable_self_destruct=self_destruct)
+            for scenario in (capture1, capture2, capture3,
+                             self_destruct1, self_destruct2, self_destruct3):
+                vec_game, game = self._replay(scenario, configs)
+                black, white = vec_game.get_scores()
+                self.assertEqual({Stone.BLACK: black[0], Stone.WHITE: white[0]}, game.get_scores())
+
+    def test__ko(self):
+        def ko(game):
+            game.place_black(0, 0)
+            game.place_black(1, 1)
+            game.place_black(0, 2)
+            game.place_white(1, 0)
+            game.place_white(0, 1)
+            game.place_black(0, 0)
+        self._replay(ko, self.configs)
+
+    def test__occupied(self):
+        vec_game = VecGame(self.configs, 2)
+        vec_game.step([0, 1])
+        with self.assertRaises(Exception):
+            vec_game.step([2, 1])
+        self.assertEqual(vec_game.turn.tolist(), [Stone.WHITE, Stone.WHITE])
+
+    def test__random_games(self):
+        for self_destruct in (False, True):
+            configs = dict(self.configs, enable_self_destruct=self_destruct)
+            num_games = 8
+            vec_game = VecGame(configs, num_games)
+            games = [Game(configs) for _ in range(num_games)]
+            rng = np.random.default_rng(int(self_destruct))
+            for _ in range(150):
+                turn = vec_game.turn.copy()
+                is_over = vec_game.is_over()
+                moves = vec_game.sample_moves(rng)
+                vec_game.step(moves)
+                for i, game in enumerate(games):
+                    if is_over[i]:
+                        continue
+                    move = None if moves[i] == PASS else divmod(int(moves[i]), self.board_size)
+                    game.make_move(int(turn[i]), move)
+                    self.assertSameState(vec_game, i, game)
+
+            black, white = vec_game.get_scores()
+            for i, game in enumerate(games):
+                self.assertEqual({Stone.BLACK: black[i], Stone.WHITE: white[i]}, game.get_scores())
@@ -0,0 +1,99 @@
+import unittest
+from src.game import Game
+from src.utils import Stone
+from src.zobrist import get_zobrist_table
+from src.exceptions import KoException
+from tests.utils import (
+    capture1, capture2, capture3, self_destruct1, self_destruct3)
+
+class TestZobristHash(unittest.TestCase):
+    '''
+    Test case for the incremental zobrist hash of the board position
+    '''
+    def setUp(self):
+        self.board_size = 7
+
+        configs = {'black_stone': 'b',
+                   'white_stone': 'w',
+                   'board_size': self.board_size,
+                   'enable_self_destruct': True
+        }
+
+        self.game = Game(configs)
+        self.table = get_zobrist_table(self.board_size)
+
+    def assertHashMatchesBoard(self):
+        self.assertEqual(self.game.position_hash, self.table.hash_board(self.game.board))
+
+    def test__empty(self):
+        self.assertEqual(self.game.position_hash, 0)
+        self.assertHashMatchesBoard()
+
+    def test__place_stone(self):
+        self.game.place_black(3, 3)
+        self.assertEqual(self.game.position_hash, self.table.keys[Stone.BLACK][3][3])
+        self.game.place_white(3, 4)
+        self.assertHashMatchesBoard()
+
+    def test__captures(self):
+        for scenario in [capture1, capture2, capture3, self_destruct1, self_destruct3]:
+            self.setUp()
+            scenario(self.game)
+            self.assertHashMatchesBoard()
+            self.assertIn(self.game.position_hash, self.game.gm._position_history)
+
+    def test__ko_undo(self):
+        self.game.place_black(0, 0)
+        self.game.place_black(1, 1)
+        self.game.place_black(0, 2)
+        self.game.place_white(1, 0)
+        self.game.place_white(0, 1)
+        position_hash = self.game.position_hash
+
+        with self.assertRaises(KoException):
+            self.game.place_black(0, 0)
+        self.assertEqual(self.game.position_hash, position_hash)
+        self.assertHashMatchesBoard()
+
+
+class TestSuperko(unittest.TestCase):
+    '''
+    Test case for the positional superko rule
+    '''
+    def setUp(self):
+        self.board_size = 7
+
+        configs = {'black_stone': 'b',
+                   'white_stone': 'w',
+                   'board_size': self.board_size,
+                   'enable_self_destruct': True,
+                   'enable_superko': True
+        }
+
+        self.game = Game(configs)
+
+    def test__self_destruct_repeats_position(self):
+        # a single stone self-destruct leaves the board exactly as it was
+        with self.assertRaises(KoException):
+            self_destruct1(self.game)
+        self.assertEqual(self.game.board[4, 4], Stone.EMPTY)
+        self.assertEqual(self.game.num_black_captured, 0)
+        self.assertIsNone(self.game.gm._get_group(4, 4))
+        self.assertEqual(self.game.gm._get_group(4, 5).num_liberties, 4)
+
+    def test__new_position(self):
+        capture1(self.game)
+        self.assertEqual(self.game.num_black_captured, 1)
+        self.assertEqual(len(self.game.gm._position_history), 6)
+
+    def test__ko(self):
+        self.game.place_black(0, 0)
+        self.game.place_black(1, 1)
+        self.game.place_black(0, 2)
+        self.game.place_white(1, 0)
+        self.game.place_white(0, 1)
+
+        with self.assertRaises(KoException):
+            self.game.place_black(0, 0)
+        self.assertEqual(self.game.board[0, 0], Stone.EMPTY)
+        self.assertEqual(self.game.board[0, 1], Stone.WHITE)
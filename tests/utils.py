@@ -1,3 +1,6 @@
+import numpy as np
+from src.utils import Stone
+
 def capture1(game):
     '''
     Case of capture where white captures black as follows
@@ -119,3 +122,21 @@ def self_destruct3(game):
         game.place_white(y, x)
 
     game.place_black(3, 3)
+
+def get_state(game):
+    '''
+    Return everything observable about the game state
+    '''
+    gm = game.gm
+    groups = []
+    for y in range(game.board_size):
+        for x in range(game.board_size):
+            g = gm._get_group(y, x)
+            if g is None:
+                groups.append(None)
+            else:
+                groups.append((g.stone, g.liberty_bits, g.removed_liberty_bits, g.coord_bits))
+    return (np.asarray(game.board).tolist(), groups, gm._ko, gm.position_hash,
+            dict(gm._num_captured_stones), set(gm._position_history), game.count_pass,
+            sorted(game.get_legal_actions(Stone.BLACK)),
+            sorted(game.get_legal_actions(Stone.WHITE)))